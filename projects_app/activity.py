@@ -0,0 +1,199 @@
+"""
+Journal d'activité : historique des écritures sur les issues, commentaires
+et contributeurs (qui, quand, quels champs).
+
+L'enregistrement n'ajoute presque rien à la latence des requêtes :
+- record() prépare l'entrée en mémoire et ne l'ajoute au tampon du processus
+  qu'après validation de la transaction (une écriture annulée n'est pas journalisée) ;
+- le tampon est écrit par bulk_create (lots de BATCH_SIZE lignes, chacun dans
+  sa transaction), après l'envoi de la réponse (signal request_finished) ou,
+  si FLUSH_INTERVAL est défini, par un thread d'arrière-plan qui regroupe les
+  entrées de plusieurs requêtes.
+
+Configuration dans settings.SOFTDESK_ACTIVITY :
+- FLUSH_INTERVAL : secondes entre deux écritures du thread (None : fin de requête) ;
+- MAX_BUFFER : au-delà, le tampon est écrit immédiatement ;
+- BATCH_SIZE : lignes par INSERT.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Activity, Project
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "FLUSH_INTERVAL": None,
+    "MAX_BUFFER": 500,
+    "BATCH_SIZE": 500,
+}
+
+# Champs suivis par type d'objet ; les champs texte sont signalés sans leur contenu
+ISSUE_FIELDS = ("title", "description", "tag", "priority", "status", "assignee_id", "project_id")
+COMMENT_FIELDS = ("description",)
+CONTRIBUTOR_FIELDS = ("user_id", "role")
+TEXT_FIELDS = ("description",)
+
+
+def get_conf():
+    return {**DEFAULTS, **getattr(settings, "SOFTDESK_ACTIVITY", {})}
+
+
+class ActivityBuffer:
+    """
+    Tampon des entrées en attente, partagé par les threads du processus.
+    """
+    def __init__(self):
+        self._entries = []
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, entry):
+        conf = get_conf()
+        with self._lock:
+            self._entries.append(entry)
+            full = len(self._entries) >= conf["MAX_BUFFER"]
+        if conf["FLUSH_INTERVAL"]:
+            self.ensure_flusher(conf["FLUSH_INTERVAL"])
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Écrit les entrées en attente ; renvoie le nombre d'entrées écrites.
+        Une erreur d'écriture est journalisée sans remonter : l'historique ne
+        doit jamais faire échouer une requête. Elle ne perd que le lot fautif.
+        """
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return 0
+        try:
+            entries = without_orphans(entries)
+        except Exception:
+            logger.exception("Écriture de %d entrées d'activité impossible.", len(entries))
+            return 0
+        size = get_conf()["BATCH_SIZE"]
+        written = 0
+        for start in range(0, len(entries), size):
+            batch = entries[start:start + size]
+            try:
+                with transaction.atomic():
+                    Activity.objects.bulk_create(batch)
+            except Exception:
+                logger.exception("Écriture de %d entrées d'activité impossible.", len(batch))
+                continue
+            written += len(batch)
+        return written
+
+    def ensure_flusher(self, interval):
+        """
+        Démarre le thread d'écriture périodique au premier ajout (et après un fork :
+        les threads ne sont pas hérités par les workers).
+        """
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+        # Entrées restantes à l'arrêt du processus
+        atexit.register(self.flush)
+        threading.Thread(target=self._run_flusher, args=(interval,), name="activity-flusher", daemon=True).start()
+
+    def _run_flusher(self, interval):
+        while True:
+            time.sleep(interval)
+            self.flush()
+            # Connexion propre au thread : libérée selon CONN_MAX_AGE
+            close_old_connections()
+
+
+buffer = ActivityBuffer()
+
+
+def without_orphans(entries):
+    """
+    Entrées dont le projet existe encore (purgé depuis, par la même requête ou
+    le même lot : historique supprimé avec lui) ; l'auteur supprimé depuis
+    devient anonyme, comme le ferait on_delete=SET_NULL.
+    """
+    project_ids = set(
+        Project.objects.filter(pk__in={entry.project_id for entry in entries}).values_list("pk", flat=True)
+    )
+    actor_ids = {entry.actor_id for entry in entries if entry.actor_id is not None}
+    if actor_ids:
+        actor_ids = set(get_user_model().objects.filter(pk__in=actor_ids).values_list("pk", flat=True))
+    kept = []
+    for entry in entries:
+        if entry.project_id not in project_ids:
+            continue
+        if entry.actor_id not in actor_ids:
+            entry.actor_id = None
+        kept.append(entry)
+    return kept
+
+
+def snapshot(instance, fields) -> dict:
+    return {field: getattr(instance, field) for field in fields}
+
+
+def initial(instance, fields) -> dict:
+    """
+    Valeurs d'un objet créé, au format de diff() (champs texte exclus).
+    """
+    return {field.removesuffix("_id"): [None, getattr(instance, field)] for field in fields if field not in TEXT_FIELDS}
+
+
+def diff(before, after) -> dict:
+    """
+    Champs modifiés : {"status": ["TODO", "DONE"], "description": None, ...}.
+    Les clés perdent leur suffixe _id (assignee_id → assignee) ; les champs
+    texte valent None (modifiés, contenu non conservé).
+    """
+    changes = {}
+    for field, old in before.items():
+        new = after.get(field, old)
+        if old != new:
+            changes[field.removesuffix("_id")] = None if field in TEXT_FIELDS else [old, new]
+    return changes
+
+
+def record(verb, project_id, target_id, actor=None, issue_id=None, changes=None):
+    """
+    Journalise une action, après validation de la transaction en cours.
+    """
+    entry = Activity(
+        verb=verb,
+        project_id=project_id,
+        target_id=target_id,
+        issue_id=issue_id,
+        actor_id=actor.pk if actor is not None and actor.is_authenticated else None,
+        changes=changes or {},
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: buffer.append(entry))
+
+
+def flush_on_request_finished(sender, **kwargs):
+    """
+    Fin de requête (réponse déjà envoyée) : écrit le tampon, sauf si le
+    thread d'arrière-plan s'en charge.
+    """
+    if not get_conf()["FLUSH_INTERVAL"] and len(buffer):
+        buffer.flush()
+        # Même règle que Django pour la connexion rouverte par l'écriture
+        close_old_connections()
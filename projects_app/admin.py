@@ -1,3 +1,90 @@
 from django.contrib import admin
 
-# Register your models here.
+from softdesk.admin import LargeTableAdminMixin
+
+from .attachments import delete_attachments
+from .deletion import purge_issue, purge_project
+from .directory import invalidate_member_directory
+from .inbox import invalidate_inbox_counts
+from .models import Attachment, Comment, Contributor, Issue, Project
+
+
+@admin.register(Project)
+class ProjectAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "name", "type", "author", "created_at")
+    list_select_related = ("author",)
+    list_filter = ("type",)
+    # Recherches indexables : identifiant exact, début du nom
+    search_fields = ("=id", "^name")
+    autocomplete_fields = ("author",)
+    purge = staticmethod(purge_project)
+
+    def save_model(self, request, obj, form, change):
+        """
+        Comme via l'API : l'auteur d'un nouveau projet en est contributeur (rôle AUTHOR).
+        """
+        super().save_model(request, obj, form, change)
+        Contributor.objects.get_or_create(
+            user_id=obj.author_id, project=obj, defaults={"role": Contributor.ROLE_AUTHOR},
+        )
+        invalidate_member_directory(obj.pk)
+
+
+@admin.register(Contributor)
+class ContributorAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "user", "project", "role", "created_at")
+    list_select_related = ("user", "project")
+    list_filter = ("role",)
+    search_fields = ("=project__id", "^user__username")
+    autocomplete_fields = ("user", "project")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_member_directory(obj.project_id, form.initial.get("project"))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_member_directory(obj.project_id)
+
+    def delete_queryset(self, request, queryset):
+        project_ids = set(queryset.values_list("project_id", flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_member_directory(*project_ids)
+
+
+@admin.register(Issue)
+class IssueAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "title", "project", "status", "priority", "tag", "assignee", "updated_at")
+    list_select_related = ("project", "assignee")
+    list_filter = ("status", "priority", "tag")
+    search_fields = ("=id", "^title")
+    autocomplete_fields = ("project", "author", "assignee")
+    purge = staticmethod(purge_issue)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_inbox_counts(
+            obj.author_id, obj.assignee_id, form.initial.get("author"), form.initial.get("assignee"),
+        )
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_inbox_counts(obj.author_id, obj.assignee_id)
+
+
+@admin.register(Comment)
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "issue", "author", "created_at")
+    list_select_related = ("issue", "author")
+    search_fields = ("=id", "=issue__id")
+    # Pas d'autocomplétion sur l'issue : identifiant saisi ou choisi dans la liste des issues
+    raw_id_fields = ("issue",)
+    autocomplete_fields = ("author",)
+
+    def delete_model(self, request, obj):
+        delete_attachments(Attachment.objects.filter(comment_id=obj.pk))
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        delete_attachments(Attachment.objects.filter(comment_id__in=queryset.values("pk")))
+        super().delete_queryset(request, queryset)
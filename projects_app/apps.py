@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ProjectsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'projects_app'
+
+    def ready(self):
+        from django.core.signals import request_finished
+
+        from .activity import flush_on_request_finished
+
+        # Journal d'activité écrit après l'envoi de la réponse (voir activity.py)
+        request_finished.connect(flush_on_request_finished, dispatch_uid="projects_app.activity_flush")
@@ -0,0 +1,123 @@
+"""
+Archivage des issues terminées depuis longtemps.
+
+La plupart des issues sont DONE et anciennes, mais elles alourdissent chaque
+parcours et chaque index de la table Issue. L'archivage les déplace, avec
+leurs commentaires, dans les tables ArchivedIssue / ArchivedComment :
+- par lots bornés, un lot par transaction (comme la purge, voir deletion.py) ;
+- en conservant les identifiants et les dates d'origine.
+
+Les issues archivées restent lisibles via ?include_archived=1 (mêmes
+serializers) et sont restaurées (identifiants et commentaires conservés) dès
+qu'on les modifie : réouverture, nouveau commentaire...
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .deletion import get_batch_size
+from .inbox import invalidate_inbox_counts
+from .models import ArchivedComment, ArchivedIssue, Comment, Issue
+
+# Ancienneté minimale (jours depuis la dernière mise à jour) d'une issue DONE archivable
+DEFAULT_ARCHIVE_AFTER_DAYS = 180
+
+
+def get_archive_cutoff(days=None):
+    """
+    Date limite : les issues DONE non modifiées depuis sont archivables.
+    """
+    days = days or getattr(settings, "SOFTDESK_ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable_issues(cutoff):
+    return Issue.objects.filter(status=Issue.Status.DONE, updated_at__lt=cutoff)
+
+
+def _copy_rows(queryset, target, chunk_size=None, **extra):
+    """
+    Copie les lignes du queryset dans le modèle `target` (colonnes de même nom),
+    sans passer par save() : identifiants et dates sont repris tels quels.
+    Lecture par tranches de `chunk_size` lignes, par identifiant croissant :
+    la mémoire reste bornée quel que soit le nombre de commentaires du lot.
+    """
+    fields = target._meta.concrete_fields
+    columns = [field.attname for field in fields if field.attname not in extra]
+    pk_name = target._meta.pk.attname
+    chunk_size = get_batch_size(chunk_size)
+    using = router.db_for_write(target)
+    source = queryset.order_by("pk").values(*columns)
+    copied, last_pk = 0, None
+    while True:
+        chunk = source if last_pk is None else source.filter(pk__gt=last_pk)
+        rows = [target(**row, **extra) for row in chunk[:chunk_size]]
+        if not rows:
+            return copied
+        last_pk = getattr(rows[-1], pk_name)
+        batch_size = connections[using].ops.bulk_batch_size(fields, rows) or len(rows)
+        for start in range(0, len(rows), batch_size):
+            # raw=True : valeurs insérées telles quelles (auto_now ignoré, identifiants conservés)
+            target._base_manager.using(using)._insert(rows[start:start + batch_size], fields=fields, raw=True)
+        copied += len(rows)
+
+
+def _delete_rows(queryset):
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def archive_issues(days=None, batch_size=None, on_progress=None) -> dict:
+    """
+    Archive les issues DONE non modifiées depuis `days` jours, par lots.
+    `on_progress(counts)` est appelé après chaque lot validé.
+    """
+    cutoff = get_archive_cutoff(days)
+    size = get_batch_size(batch_size)
+    counts = {"issues": 0, "comments": 0}
+
+    while True:
+        with transaction.atomic():
+            # Verrou sur le lot : une issue rouverte entre-temps n'est pas archivée
+            pks = list(
+                archivable_issues(cutoff).select_for_update().order_by().values_list("pk", flat=True)[:size]
+            )
+            if not pks:
+                break
+            issues = Issue.objects.filter(pk__in=pks)
+            comments = Comment.objects.filter(issue_id__in=pks)
+            users = set(issues.values_list("author_id", "assignee_id").distinct())
+
+            counts["issues"] += _copy_rows(issues, ArchivedIssue, size, archived_at=timezone.now())
+            counts["comments"] += _copy_rows(comments, ArchivedComment, size)
+            _delete_rows(comments)
+            _delete_rows(issues)
+
+        invalidate_inbox_counts(*(user_id for pair in users for user_id in pair))
+        if on_progress:
+            on_progress(counts)
+    return counts
+
+
+def restore_issue(issue_id):
+    """
+    Réinsère une issue archivée et ses commentaires dans les tables vivantes.
+    La date de mise à jour de l'issue est celle de la restauration : elle n'est
+    pas réarchivée au prochain passage d'archive_issues.
+    Renvoie False si l'issue n'est pas (ou plus) archivée.
+    """
+    with transaction.atomic():
+        archived = ArchivedIssue.objects.select_for_update().filter(pk=issue_id)
+        row = archived.values("author_id", "assignee_id").first()
+        if row is None:
+            return False
+        comments = ArchivedComment.objects.filter(issue_id=issue_id)
+        _copy_rows(archived, Issue, updated_at=timezone.now())
+        _copy_rows(comments, Comment)
+        _delete_rows(comments)
+        _delete_rows(archived)
+
+    invalidate_inbox_counts(row["author_id"], row["assignee_id"])
+    return True
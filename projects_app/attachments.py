@@ -0,0 +1,294 @@
+"""
+Pièces jointes des issues et des commentaires (journaux, captures...).
+
+Aucun fichier n'est gardé en mémoire par les workers :
+- envoi : le corps brut de la requête est lu par blocs (CHUNK_SIZE) et écrit
+  dans un fichier temporaire, en calculant son SHA-256 au passage ;
+- stockage dédupliqué : un contenu déjà connu n'est pas réécrit, la pièce jointe
+  référence le même AttachmentBlob (var/attachments/ab/cd/<sha256>) ;
+- téléchargement : FileResponse lit le fichier par blocs, avec prise en charge
+  des requêtes Range (reprise, lecture partielle) ; avec SENDFILE, l'envoi est
+  délégué au serveur web (X-Accel-Redirect pour nginx, X-Sendfile pour Apache).
+
+Configuration dans settings.SOFTDESK_ATTACHMENTS (voir DEFAULTS) ;
+emplacement des fichiers : settings.SOFTDESK_ATTACHMENTS_DIR.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Exists, OuterRef
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header
+
+from .models import Attachment, AttachmentBlob
+
+DEFAULTS = {
+    "MAX_SIZE": 50 * 1024 * 1024,
+    "CHUNK_SIZE": 64 * 1024,
+    "SENDFILE": None,
+    "SENDFILE_PREFIX": "/protected/attachments/",
+}
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+# Une seule plage est servie ; plusieurs plages (multipart/byteranges) : contenu complet
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class UploadError(ValueError):
+    """
+    Envoi refusé (corps vide ou incomplet) ; le message est destiné au client.
+    """
+
+
+class UploadTooLarge(UploadError):
+    """
+    Contenu au-delà de MAX_SIZE.
+    """
+
+
+def get_conf():
+    return {**DEFAULTS, **getattr(settings, "SOFTDESK_ATTACHMENTS", {})}
+
+
+def blob_path(sha256):
+    """
+    Chemin du contenu : deux niveaux de répertoires pour limiter la taille de chacun.
+    """
+    return settings.SOFTDESK_ATTACHMENTS_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def clean_filename(name) -> str:
+    """
+    Nom de fichier affiché, sans chemin (« C:\\logs\\app.log » → « app.log »).
+    """
+    return PurePosixPath((name or "").replace("\\", "/")).name.strip()[:255]
+
+
+def receive_file(stream, expected_size=None):
+    """
+    Copie le flux dans un fichier temporaire du stockage, par blocs.
+    Renvoie (chemin temporaire, sha256, taille) ; le fichier est supprimé en cas d'erreur.
+    """
+    conf = get_conf()
+    tmp_dir = settings.SOFTDESK_ATTACHMENTS_DIR / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    # Même système de fichiers que la destination : os.replace reste atomique
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := stream.read(conf["CHUNK_SIZE"]):
+                size += len(chunk)
+                if size > conf["MAX_SIZE"]:
+                    raise UploadTooLarge(f"Fichier trop volumineux ({conf['MAX_SIZE']} octets au maximum).")
+                digest.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        if not size:
+            raise UploadError("Fichier vide.")
+        if expected_size is not None and size != expected_size:
+            raise UploadError("Corps de la requête incomplet.")
+        # Lisible par le serveur web (SENDFILE)
+        os.chmod(tmp, 0o644)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp, digest.hexdigest(), size
+
+
+def create_attachment(stream, *, project_id, issue_id, comment_id=None, filename, content_type=None,
+                      author=None, expected_size=None) -> Attachment:
+    """
+    Enregistre le contenu du flux et crée la pièce jointe.
+    Le fichier est reçu hors transaction ; seuls la déduplication et la création
+    des lignes se font sous verrou.
+    """
+    tmp, sha256, size = receive_file(stream, expected_size)
+    try:
+        with transaction.atomic():
+            # Verrou : un nettoyage concurrent (delete_orphan_blobs) ne supprime pas ce contenu
+            blob, _ = AttachmentBlob.objects.select_for_update().get_or_create(sha256=sha256, defaults={"size": size})
+            path = blob_path(sha256)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, path)
+            return Attachment.objects.create(
+                project_id=project_id,
+                issue_id=issue_id,
+                comment_id=comment_id,
+                blob=blob,
+                filename=filename,
+                content_type=(content_type or DEFAULT_CONTENT_TYPE)[:255],
+                author=author,
+            )
+    finally:
+        # Contenu déjà stocké (doublon) ou transaction annulée
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def _delete_blob_batch(queryset, using):
+    """
+    Supprime les contenus orphelins du lot (lignes et fichiers), sous verrou.
+    Renvoie la liste des (pk, sha256) supprimés.
+    """
+    with transaction.atomic(using=using):
+        orphans = list(
+            queryset.select_for_update()
+            .filter(~Exists(Attachment.objects.filter(blob_id=OuterRef("pk"))))
+            .values_list("pk", "sha256")
+        )
+        if orphans:
+            AttachmentBlob.objects.filter(pk__in=[pk for pk, _ in orphans])._raw_delete(using)
+            # Fichiers supprimés sous verrou : un envoi concurrent du même contenu
+            # attend la fin de la transaction, puis réécrit le fichier
+            for _, sha256 in orphans:
+                blob_path(sha256).unlink(missing_ok=True)
+    return orphans
+
+
+def delete_orphan_blobs(blob_ids=None, batch_size=1000) -> int:
+    """
+    Supprime les contenus qui ne sont plus référencés par aucune pièce jointe
+    (ligne et fichier), parmi `blob_ids` ou, sans `blob_ids`, dans toute la table
+    (anti-jointure parcourue par identifiant croissant : reprend aussi les
+    orphelins laissés par une purge interrompue). Renvoie leur nombre.
+    """
+    using = router.db_for_write(AttachmentBlob)
+    blobs = AttachmentBlob.objects.order_by("pk")
+    removed = 0
+    if blob_ids is not None:
+        blob_ids = sorted(set(blob_ids))
+        for start in range(0, len(blob_ids), batch_size):
+            removed += len(_delete_blob_batch(blobs.filter(pk__in=blob_ids[start:start + batch_size]), using))
+        return removed
+
+    last_pk = 0
+    while True:
+        batch = list(blobs.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return removed
+        last_pk = batch[-1]
+        removed += len(_delete_blob_batch(blobs.filter(pk__in=batch), using))
+
+
+def delete_attachments(queryset) -> int:
+    """
+    Supprime les pièces jointes du queryset, puis les contenus devenus inutiles.
+    """
+    blob_ids = set(queryset.values_list("blob_id", flat=True))
+    deleted, _ = queryset.delete()
+    delete_orphan_blobs(blob_ids)
+    return deleted
+
+
+def parse_range(header, size):
+    """
+    Plage demandée (début, fin incluse) ; None pour servir le contenu complet
+    (en-tête absent, invalide ou à plusieurs plages). ValueError si la plage
+    est hors du fichier (416).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffixe : les N derniers octets
+        length = int(last)
+        if not length:
+            raise ValueError("Plage vide.")
+        start, end = max(size - length, 0), size - 1
+    if start >= size:
+        raise ValueError("Plage hors du fichier.")
+    return start, end
+
+
+class FileRange:
+    """
+    Lecture bornée d'un fichier ouvert, à partir de sa position courante.
+    """
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def attachment_response(request, attachment):
+    """
+    Réponse de téléchargement : 304 si le client a déjà ce contenu (ETag = SHA-256),
+    206 pour une plage, contenu complet sinon.
+    """
+    blob = attachment.blob
+    etag = f'"{blob.sha256}"'
+    conf = get_conf()
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None and conf["SENDFILE"]:
+        # Le serveur web lit le fichier et gère lui-même les plages
+        response = HttpResponse(content_type=attachment.content_type)
+        path = blob_path(blob.sha256)
+        if conf["SENDFILE"] == "X-Accel-Redirect":
+            relative = path.relative_to(settings.SOFTDESK_ATTACHMENTS_DIR).as_posix()
+            response["X-Accel-Redirect"] = conf["SENDFILE_PREFIX"] + relative
+        else:
+            response[conf["SENDFILE"]] = str(path)
+    elif response is None:
+        response = file_response(request, attachment, etag)
+
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    # Contenu fixe pour un identifiant donné, mais soumis aux permissions : revalidation
+    response["Cache-Control"] = "private, no-cache"
+    if response.status_code != 304:
+        response["Content-Disposition"] = content_disposition_header(True, attachment.filename)
+    return response
+
+
+def file_response(request, attachment, etag):
+    size = attachment.blob.size
+    requested = request.META.get("HTTP_RANGE", "")
+    # If-Range : la plage n'est servie que si le contenu n'a pas changé
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range is not None and if_range.strip() != etag:
+        requested = ""
+    try:
+        span = parse_range(requested, size) if requested else None
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    file = open(blob_path(attachment.blob.sha256), "rb")
+    if span is None:
+        return FileResponse(file, content_type=attachment.content_type)
+
+    start, end = span
+    file.seek(start)
+    response = FileResponse(FileRange(file, end - start + 1), status=206, content_type=attachment.content_type)
+    response["Content-Length"] = str(end - start + 1)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
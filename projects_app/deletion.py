@@ -0,0 +1,222 @@
+"""
+Suppression par lots des projets, des issues et des utilisateurs.
+
+Le collecteur de Django (on_delete=CASCADE) charge en mémoire toutes les
+issues et tous les commentaires liés avant de les supprimer : sur un gros
+projet, la mémoire explose et les tables restent verrouillées longtemps.
+
+Ici, les dépendances sont supprimées par lots bornés, dans l'ordre
+pièces jointes → liens → correspondances d'import → commentaires → issues
+(vivantes puis archivées) → contributeurs → activité → projet, avec des DELETE ensemblistes (_raw_delete)
+qui ne chargent aucun objet Python. Les contenus de pièces jointes qui ne
+sont plus référencés sont supprimés en dernier (lignes et fichiers) : ceux
+des pièces jointes purgées, relevés avant leur suppression ; avec
+sweep_blobs=True, tous les contenus orphelins de la table.
+
+Chaque lot est validé dans sa propre transaction : une purge interrompue
+peut être relancée telle quelle, elle reprend là où elle s'était arrêtée.
+Les contenus des pièces jointes supprimées avant l'interruption ne sont plus
+relevés : la relance doit balayer la table (sweep_blobs=True, comme la
+commande purge).
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from django.db.models import Q
+
+from .attachments import delete_orphan_blobs
+from .directory import invalidate_member_directory
+from .models import (
+    Project, Contributor, Issue, Comment, ArchivedIssue, ArchivedComment, Activity, Attachment, IssueLink,
+    ImportedIssue,
+)
+
+# Nombre de lignes supprimées par transaction (surchargeable dans settings.py)
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_batch_size(batch_size=None) -> int:
+    """
+    Taille de lot effective : argument explicite, sinon SOFTDESK_DELETE_BATCH_SIZE.
+    """
+    return batch_size or getattr(settings, "SOFTDESK_DELETE_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+def delete_in_batches(queryset, batch_size=None, label="", on_progress=None) -> int:
+    """
+    Supprime les lignes du queryset par lots de `batch_size`.
+    - Seules les clés primaires du lot sont lues.
+    - La suppression est un DELETE ... WHERE id IN (...) sans cascade Python :
+      les dépendances doivent avoir été supprimées avant.
+    - `on_progress(label, total)` est appelé après chaque lot validé.
+    Retourne le nombre total de lignes supprimées.
+    """
+    model = queryset.model
+    using = router.db_for_write(model)
+    size = get_batch_size(batch_size)
+    pks_qs = queryset.order_by().values_list("pk", flat=True)
+    total = 0
+
+    while True:
+        with transaction.atomic(using=using):
+            pks = list(pks_qs[:size])
+            if not pks:
+                break
+            total += model._base_manager.using(using).filter(pk__in=pks)._raw_delete(using)
+        if on_progress:
+            on_progress(label, total)
+    return total
+
+
+def _run_steps(steps, batch_size=None, on_progress=None) -> dict:
+    """
+    Exécute les étapes (libellé, queryset) dans l'ordre et renvoie les compteurs.
+    """
+    return {
+        label: delete_in_batches(qs, batch_size=batch_size, label=label, on_progress=on_progress)
+        for label, qs in steps
+    }
+
+
+def _delete_row(queryset, label, on_progress=None) -> int:
+    """
+    Supprime la ligne « racine » via le collecteur Django.
+    Ses dépendances volumineuses ont déjà été purgées : le collecteur ne
+    traite plus que les relations résiduelles (logs admin, groupes...).
+    """
+    deleted, _ = queryset.delete()
+    if on_progress:
+        on_progress(label, deleted)
+    return deleted
+
+
+def _blob_ids(attachments):
+    """
+    Contenus des pièces jointes à purger, relevés avant leur suppression.
+    """
+    return set(attachments.order_by().values_list("blob_id", flat=True).distinct())
+
+
+def _delete_blobs(blob_ids, batch_size=None, on_progress=None) -> int:
+    """
+    Supprime les contenus devenus orphelins parmi `blob_ids` (voir attachments.py) ;
+    sans `blob_ids`, balaye toute la table (reprise d'une purge interrompue).
+    """
+    removed = delete_orphan_blobs(blob_ids, batch_size=get_batch_size(batch_size))
+    if on_progress:
+        on_progress("blobs", removed)
+    return removed
+
+
+def project_steps(project_id):
+    """
+    Étapes de purge des dépendances d'un projet, sans le projet lui-même.
+    """
+    return [
+        ("attachments", Attachment.objects.filter(project_id=project_id)),
+        ("issue_links", IssueLink.objects.filter(project_id=project_id)),
+        # Projet d'origine de l'import, ou projet actuel de l'issue (déplacée depuis)
+        ("imported_issues", ImportedIssue.objects.filter(
+            Q(project_id=project_id)
+            | Q(issue_id__in=Issue.objects.filter(project_id=project_id).values("pk"))
+            | Q(issue_id__in=ArchivedIssue.objects.filter(project_id=project_id).values("pk"))
+        )),
+        ("comments", Comment.objects.filter(issue__project_id=project_id)),
+        ("issues", Issue.objects.filter(project_id=project_id)),
+        ("archived_comments", ArchivedComment.objects.filter(issue__project_id=project_id)),
+        ("archived_issues", ArchivedIssue.objects.filter(project_id=project_id)),
+        ("contributors", Contributor.objects.filter(project_id=project_id)),
+        ("activities", Activity.objects.filter(project_id=project_id)),
+    ]
+
+
+def purge_issue(issue_id, batch_size=None, on_progress=None, sweep_blobs=False) -> dict:
+    """
+    Supprime une issue, ses pièces jointes, ses liens et ses commentaires par lots.
+    """
+    attachments = Attachment.objects.filter(issue_id=issue_id)
+    blob_ids = None if sweep_blobs else _blob_ids(attachments)
+    counts = _run_steps(
+        [
+            ("attachments", attachments),
+            ("issue_links", IssueLink.objects.filter(Q(source_id=issue_id) | Q(target_id=issue_id))),
+            ("imported_issues", ImportedIssue.objects.filter(issue_id=issue_id)),
+            ("comments", Comment.objects.filter(issue_id=issue_id)),
+        ],
+        batch_size=batch_size, on_progress=on_progress,
+    )
+    counts["issue"] = _delete_row(Issue.objects.filter(pk=issue_id), "issue", on_progress)
+    counts["blobs"] = _delete_blobs(blob_ids, batch_size, on_progress)
+    return counts
+
+
+def purge_project(project_id, batch_size=None, on_progress=None, sweep_blobs=False) -> dict:
+    """
+    Supprime un projet et toutes ses dépendances par lots bornés.
+    Idempotent : relancer la purge après une interruption termine le travail
+    (avec sweep_blobs=True pour les contenus des pièces jointes déjà supprimées).
+    """
+    blob_ids = None if sweep_blobs else _blob_ids(Attachment.objects.filter(project_id=project_id))
+    counts = _run_steps(project_steps(project_id), batch_size=batch_size, on_progress=on_progress)
+    counts["project"] = _delete_row(Project.objects.filter(pk=project_id), "project", on_progress)
+    counts["blobs"] = _delete_blobs(blob_ids, batch_size, on_progress)
+    invalidate_member_directory(project_id)
+    return counts
+
+
+def purge_user(user_id, batch_size=None, on_progress=None, sweep_blobs=False) -> dict:
+    """
+    Supprime un utilisateur (droit à l'oubli) et ses données par lots :
+    1. les projets dont il est l'auteur (purge complète de chaque projet) ;
+    2. ses pièces jointes, ses commentaires, et ceux des issues qu'il a créées
+       ou qui lui sont assignées ;
+    3. ces issues (archives comprises), puis ses participations aux autres projets ;
+    4. enfin le compte lui-même.
+    """
+    User = get_user_model()
+    counts = {}
+    # Annuaires des projets dont l'utilisateur est membre, à invalider en fin de purge
+    member_of = list(Contributor.objects.filter(user_id=user_id).values_list("project_id", flat=True))
+
+    def add(partial):
+        for label, value in partial.items():
+            counts[label] = counts.get(label, 0) + value
+
+    # Projets possédés : traités un par un, chaque purge retire le projet de la liste
+    owned = Project.objects.filter(author_id=user_id).order_by("pk").values_list("pk", flat=True)
+    while (project_id := owned.first()) is not None:
+        add(purge_project(project_id, batch_size=batch_size, on_progress=on_progress, sweep_blobs=sweep_blobs))
+
+    issues = Issue.objects.filter(Q(author_id=user_id) | Q(assignee_id=user_id))
+    archived_issues = ArchivedIssue.objects.filter(Q(author_id=user_id) | Q(assignee_id=user_id))
+    attachments = Attachment.objects.filter(
+        Q(author_id=user_id)
+        | Q(issue_id__in=issues.values("pk"))
+        | Q(issue_id__in=archived_issues.values("pk"))
+        | Q(comment_id__in=Comment.objects.filter(author_id=user_id).values("pk"))
+        | Q(comment_id__in=ArchivedComment.objects.filter(author_id=user_id).values("pk"))
+    )
+    blob_ids = None if sweep_blobs else _blob_ids(attachments)
+    add(_run_steps(
+        [
+            ("attachments", attachments),
+            ("issue_links", IssueLink.objects.filter(
+                Q(source_id__in=issues.values("pk")) | Q(target_id__in=issues.values("pk"))
+                | Q(source_id__in=archived_issues.values("pk")) | Q(target_id__in=archived_issues.values("pk"))
+            )),
+            ("imported_issues", ImportedIssue.objects.filter(
+                Q(issue_id__in=issues.values("pk")) | Q(issue_id__in=archived_issues.values("pk"))
+            )),
+            ("comments", Comment.objects.filter(Q(author_id=user_id) | Q(issue__in=issues))),
+            ("issues", issues),
+            ("archived_comments", ArchivedComment.objects.filter(Q(author_id=user_id) | Q(issue__in=archived_issues))),
+            ("archived_issues", archived_issues),
+            ("contributors", Contributor.objects.filter(user_id=user_id)),
+        ],
+        batch_size=batch_size, on_progress=on_progress,
+    ))
+    counts["user"] = _delete_row(User.objects.filter(pk=user_id), "user", on_progress)
+    counts["blobs"] = counts.get("blobs", 0) + _delete_blobs(blob_ids, batch_size, on_progress)
+    invalidate_member_directory(*member_of)
+    return counts
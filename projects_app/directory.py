@@ -0,0 +1,117 @@
+"""
+Annuaire des membres d'un projet, pour l'autocomplétion de l'assigné.
+
+La liste des membres (id, username, prénom, nom) est chargée en une requête
+puis mise en cache par projet, avec son index de préfixes :
+- clés normalisées (casse repliée, accents retirés) : username, prénom, nom
+  et « prénom nom », triées ;
+- une recherche ?q= est une recherche dichotomique (bisect) dans ces clés,
+  sans requête SQL ni parcours de toute la liste.
+
+Le cache est invalidé par les écritures sur les contributeurs et par la
+modification d'un profil ; la durée de vie borne l'écart après des
+écritures hors API (cache par processus).
+"""
+
+import unicodedata
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Contributor
+
+# Durée de vie de l'annuaire en cache (secondes)
+DIRECTORY_TTL = 300
+
+# Nombre de résultats par défaut et plafond de ?limit=
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+MEMBER_FIELDS = ("id", "username", "first_name", "last_name")
+
+
+def _cache_key(project_id) -> str:
+    return f"member-directory:{project_id}"
+
+
+def fold(text) -> str:
+    """
+    Forme de comparaison : casse repliée, sans accents (« Hélène » → « helene »).
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).strip()
+
+
+def build_directory(project_id) -> dict:
+    """
+    Membres actifs du projet et index de préfixes :
+    {"members": {id: membre}, "keys": [clé, ...], "ids": [id, ...], "order": [id, ...]}
+    (keys/ids parallèles, triés ; order : identifiants par username).
+    """
+    rows = (
+        Contributor.objects.filter(project_id=project_id, user__is_active=True)
+        .order_by()
+        .values_list(*(f"user__{field}" for field in MEMBER_FIELDS))
+    )
+    members, index = {}, set()
+    for row in rows:
+        member = dict(zip(MEMBER_FIELDS, row))
+        members[member["id"]] = member
+        full_name = f"{member['first_name']} {member['last_name']}"
+        for value in (member["username"], member["first_name"], member["last_name"], full_name):
+            key = fold(value)
+            if key:
+                index.add((key, member["id"]))
+    entries = sorted(index)
+    return {
+        "members": members,
+        "keys": [key for key, _ in entries],
+        "ids": [member_id for _, member_id in entries],
+        "order": sorted(members, key=lambda member_id: fold(members[member_id]["username"])),
+    }
+
+
+def get_member_directory(project_id) -> dict:
+    """
+    Annuaire du projet, servi depuis le cache si possible.
+    """
+    key = _cache_key(project_id)
+    directory = cache.get(key)
+    if directory is None:
+        directory = build_directory(project_id)
+        cache.set(key, directory, DIRECTORY_TTL)
+    return directory
+
+
+def search_members(project_id, query="", limit=DEFAULT_LIMIT) -> list:
+    """
+    Membres dont le username, le prénom, le nom ou « prénom nom » commence par `query`.
+    Sans requête : les premiers membres par ordre alphabétique du username.
+    """
+    directory = get_member_directory(project_id)
+    members = directory["members"]
+    prefix = fold(query)
+    if not prefix:
+        return [members[member_id] for member_id in directory["order"][:limit]]
+
+    keys, ids = directory["keys"], directory["ids"]
+    found = {}
+    position = bisect_left(keys, prefix)
+    while position < len(keys) and keys[position].startswith(prefix) and len(found) < limit:
+        found.setdefault(ids[position], members[ids[position]])
+        position += 1
+    return list(found.values())
+
+
+def invalidate_member_directory(*project_ids):
+    """
+    Invalide l'annuaire des projets concernés par une écriture (contributeurs, profils).
+    """
+    cache.delete_many([_cache_key(project_id) for project_id in set(project_ids) if project_id])
+
+
+def invalidate_user_directories(user_id):
+    """
+    Invalide l'annuaire de tous les projets de l'utilisateur (profil modifié).
+    """
+    invalidate_member_directory(*Contributor.objects.filter(user_id=user_id).values_list("project_id", flat=True))
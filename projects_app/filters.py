@@ -0,0 +1,194 @@
+"""
+Filtres DRF pour l'app 'projects_app'.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from .models import Issue
+
+
+def parse_choices(request, name, choices):
+    """
+    Lit un filtre « a,b,c » et refuse les valeurs hors des choix du modèle.
+    Renvoie None si le paramètre est absent.
+    """
+    raw = request.query_params.get(name)
+    if not raw:
+        return None
+    values = [value.strip().upper() for value in raw.split(",") if value.strip()]
+    invalid = sorted(set(values) - set(choices))
+    if invalid:
+        raise ValidationError({name: f"Valeurs invalides : {', '.join(invalid)}."})
+    return values
+
+
+def parse_ids(request, name):
+    """
+    Lit une liste d'identifiants « 1,2,3 » ; None si le paramètre est absent.
+    """
+    raw = request.query_params.get(name)
+    if not raw:
+        return None
+    values = [value.strip() for value in raw.split(",") if value.strip()]
+    if not all(value.isdigit() for value in values):
+        raise ValidationError({name: "Liste d'identifiants entiers attendue."})
+    return [int(value) for value in values]
+
+
+def parse_moment(request, name, end_of_day=False):
+    """
+    Lit une date ISO (2025-09-25) ou une date-heure ISO (2025-09-25T17:53:00Z).
+    Une date seule vaut minuit, ou minuit le lendemain si `end_of_day`
+    (borne haute exclusive couvrant toute la journée).
+    """
+    raw = request.query_params.get(name)
+    if not raw:
+        return None
+    moment = parse_datetime(raw)
+    if moment is None:
+        day = parse_date(raw)
+        if day is None:
+            raise ValidationError({name: "Date ISO 8601 attendue (AAAA-MM-JJ ou date-heure)."})
+        if end_of_day:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class RankOrderingFilter(filters.OrderingFilter):
+    """
+    Tri des issues sur les rangs numériques plutôt que sur les libellés :
+    - ?ordering=priority_rank : priorité la plus haute d'abord (rang 1 = HIGH) ;
+    - ?ordering=priority / -priority : alias de -priority_rank / priority_rank
+      (LOW → HIGH, HIGH → LOW), au lieu de l'ordre alphabétique HIGH, LOW, MEDIUM ;
+    - ?ordering=status : alias de status_rank (TODO → IN_PROGRESS → DONE).
+    À défaut de critère sur la date, -created_at départage les ex aequo
+    (ordre de l'index project, priority_rank, -created_at).
+    """
+    aliases = {"priority": "-priority_rank", "status": "status_rank"}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or ordering == self.get_default_ordering(view):
+            return ordering
+
+        resolved = []
+        for term in ordering:
+            descending = term.startswith("-")
+            field = self.aliases.get(term.lstrip("-"), term.lstrip("-"))
+            if descending:
+                field = field[1:] if field.startswith("-") else f"-{field}"
+            resolved.append(field)
+        if not any(term.lstrip("-") == "created_at" for term in resolved):
+            resolved.append("-created_at")
+        return resolved
+
+
+class RankFilter(filters.BaseFilterBackend):
+    """
+    Filtres numériques sur les rangs :
+    ?priority_rank=1,2 · ?priority_rank__lte=2 · ?status_rank__lt=3 (issues non terminées)...
+    """
+    fields = ("priority_rank", "status_rank")
+    lookups = ("", "__lt", "__lte", "__gt", "__gte")
+
+    def filter_queryset(self, request, queryset, view):
+        for field in self.fields:
+            for lookup in self.lookups:
+                param = field + lookup
+                raw = request.query_params.get(param)
+                if not raw:
+                    continue
+                values = [value.strip() for value in raw.split(",")]
+                if not all(value.isdigit() for value in values) or (lookup and len(values) > 1):
+                    raise ValidationError({param: "Entier (ou liste d'entiers pour l'égalité) attendu."})
+                if lookup:
+                    queryset = queryset.filter(**{param: int(values[0])})
+                else:
+                    queryset = queryset.filter(**{f"{field}__in": [int(value) for value in values]})
+        return queryset
+
+
+class IssueFilter(filters.BaseFilterBackend):
+    """
+    Filtres serveur de la liste des issues (listes séparées par des virgules) :
+    - ?status=TODO,IN_PROGRESS · ?priority=HIGH · ?tag=BUG,TASK
+    - ?assignee=3,4 · ?author=3
+    - ?created_after= / ?created_before= · ?updated_after= / ?updated_before=
+      (bornes basses incluses, bornes hautes exclues ; une date seule couvre la journée).
+    """
+    choice_fields = {
+        "status": Issue.Status.values,
+        "priority": Issue.Priority.values,
+        "tag": Issue.Tag.values,
+    }
+    id_fields = ("assignee", "author")
+    date_fields = ("created", "updated")
+
+    def filter_queryset(self, request, queryset, view):
+        for field, choices in self.choice_fields.items():
+            values = parse_choices(request, field, choices)
+            if values:
+                queryset = queryset.filter(**{f"{field}__in": values})
+
+        for field in self.id_fields:
+            ids = parse_ids(request, field)
+            if ids:
+                queryset = queryset.filter(**{f"{field}_id__in": ids})
+
+        for field in self.date_fields:
+            after = parse_moment(request, f"{field}_after")
+            if after:
+                queryset = queryset.filter(**{f"{field}_at__gte": after})
+            before = parse_moment(request, f"{field}_before", end_of_day=True)
+            if before:
+                queryset = queryset.filter(**{f"{field}_at__lt": before})
+        return queryset
+
+
+# Facettes disponibles : nom public → colonne groupée
+FACETS = {"status": "status", "priority": "priority", "tag": "tag", "assignee": "assignee_id"}
+
+
+def parse_facets(request):
+    """
+    Lit ?facets=status,priority,tag,assignee (ou ?facets=all).
+    """
+    raw = request.query_params.get("facets")
+    if not raw:
+        return []
+    names = [name.strip().lower() for name in raw.split(",") if name.strip()]
+    if names == ["all"]:
+        return list(FACETS)
+    invalid = sorted(set(names) - set(FACETS))
+    if invalid:
+        raise ValidationError({"facets": f"Facettes inconnues : {', '.join(invalid)}."})
+    return list(dict.fromkeys(names))
+
+
+def compute_facets(names, *querysets) -> dict:
+    """
+    Comptes par valeur pour chaque facette demandée, sur le filtre courant.
+    Un GROUP BY par facette et par queryset (issues vivantes, archivées) : le
+    résultat compte une ligne par valeur distincte de la facette, et non par
+    combinaison (assignee × status × ... croîtrait avec le nombre d'utilisateurs).
+    """
+    facets = {}
+    for name in names:
+        # Facettes à choix fermés : toutes les valeurs apparaissent, même à 0
+        choices = IssueFilter.choice_fields.get(name, ())
+        counts = facets[name] = {value: 0 for value in choices}
+        column = FACETS[name]
+        for queryset in querysets:
+            rows = queryset.order_by().values_list(column).annotate(facet_count=Count("pk"))
+            for value, count in rows:
+                counts[value] = counts.get(value, 0) + count
+    return facets
@@ -0,0 +1,397 @@
+"""
+Import en masse d'issues et de commentaires depuis un ancien outil de suivi.
+
+Les fichiers (JSONL ou CSV) sont lus en flux et écrits par lots avec
+bulk_create : la mémoire reste bornée quelle que soit la taille de l'entrée.
+
+- Utilisateurs (username) et projets (name) sont résolus via des tables de
+  correspondance en mémoire, complétées lot par lot (une requête IN par lot
+  pour les valeurs encore inconnues).
+- Les règles d'IssueSerializer.validate / CommentSerializer.validate sont
+  appliquées : auteur et assigné doivent être contributeurs du projet.
+- Les lignes invalides sont écartées (avec leur motif) sans interrompre l'import.
+
+L'état de l'import est conservé dans la base de l'application :
+- le point de reprise de chaque fichier (ImportCheckpoint, nombre
+  d'enregistrements traités) ;
+- la correspondance identifiant externe → issue créée (ImportedIssue),
+  utilisée pour écarter les doublons et par l'import des commentaires
+  (supprimée avec l'issue par les purges, voir deletion.py).
+Il est écrit dans la même transaction que les lignes du lot : un lot validé
+l'est avec son point de reprise, un import interrompu reprend au lot suivant
+sans jamais rejouer un lot déjà enregistré.
+
+Colonnes attendues :
+- issues : external_id, project, author, assignee, title, description,
+  tag, priority, status, created_at, updated_at ;
+- commentaires : issue (external_id de l'issue), author, description,
+  created_at, updated_at.
+Les dates sont facultatives (ISO 8601) et conservées telles quelles.
+"""
+
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .inbox import invalidate_inbox_counts
+from .models import Comment, Contributor, ImportCheckpoint, ImportedIssue, Issue, Project
+
+User = get_user_model()
+
+# Nombre d'enregistrements par transaction
+DEFAULT_BATCH_SIZE = 2000
+
+KINDS = ("issues", "comments")
+
+# Marqueur d'un nom de projet porté par plusieurs projets
+AMBIGUOUS = object()
+
+
+class RowError(Exception):
+    """
+    Enregistrement rejeté ; le message est reporté dans le fichier de rejets.
+    """
+
+
+def read_records(path, fmt):
+    """
+    Itère sur les enregistrements (dictionnaires) d'un fichier JSONL ou CSV.
+    Une ligne JSON illisible produit un RowError à la place du dictionnaire.
+    """
+    with open(path, newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+            return
+        for line in handle:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield RowError(f"JSON invalide : {exc}")
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class ImportState:
+    """
+    État de l'import (points de reprise, correspondance des issues), dans les
+    tables ImportCheckpoint et ImportedIssue.
+    """
+    def get_checkpoint(self, kind, source) -> int:
+        checkpoint = ImportCheckpoint.objects.filter(kind=kind, source=source).first()
+        return checkpoint.records if checkpoint else 0
+
+    def lookup_issues(self, external_ids, live=False) -> dict:
+        """
+        {external_id: (issue_id, project_id)} pour les issues déjà importées.
+        live=True : seulement celles encore présentes dans la table Issue (ni
+        supprimées, ni archivées), les seules auxquelles rattacher un commentaire.
+        """
+        mappings = ImportedIssue.objects.all()
+        if live:
+            mappings = mappings.filter(Exists(Issue.objects.filter(pk=OuterRef("issue_id"))))
+        found = {}
+        # Requêtes IN par tranches (limite du nombre de paramètres SQLite)
+        for chunk in batched(set(external_ids), 500):
+            rows = mappings.filter(external_id__in=chunk).values_list("external_id", "issue_id", "project_id")
+            found.update((external_id, (issue_id, project_id)) for external_id, issue_id, project_id in rows)
+        return found
+
+    def save_batch(self, kind, source, records, issue_map=()):
+        """
+        Enregistre le point de reprise et les issues créées par le lot.
+        À appeler dans la transaction qui crée les lignes du lot.
+        """
+        ImportedIssue.objects.bulk_create(
+            ImportedIssue(external_id=external_id, issue_id=issue_id, project_id=project_id)
+            for external_id, issue_id, project_id in issue_map
+        )
+        ImportCheckpoint.objects.update_or_create(kind=kind, source=source, defaults={"records": records})
+
+
+class Lookups:
+    """
+    Tables de correspondance en mémoire, chargées à la demande :
+    username → id, nom de projet → id, projet → ids des contributeurs.
+    Les valeurs introuvables sont mémorisées (None) pour n'être cherchées qu'une fois.
+    """
+    def __init__(self):
+        self.users = {}
+        self.projects = {}
+        self.members = {}
+
+    def load_users(self, usernames):
+        missing = {name for name in usernames if name and name not in self.users}
+        if missing:
+            self.users.update(dict.fromkeys(missing))
+            self.users.update(User.objects.filter(username__in=missing).values_list("username", "id"))
+
+    def load_projects(self, names):
+        missing = {name for name in names if name and name not in self.projects}
+        if missing:
+            found = {}
+            for name, pk in Project.objects.filter(name__in=missing).values_list("name", "id"):
+                found[name] = AMBIGUOUS if name in found else pk
+            self.projects.update(dict.fromkeys(missing))
+            self.projects.update(found)
+
+    def load_members(self, project_ids):
+        missing = {pk for pk in project_ids if pk not in self.members}
+        if missing:
+            for pk in missing:
+                self.members[pk] = set()
+            for project_id, user_id in Contributor.objects.filter(project_id__in=missing).values_list(
+                "project_id", "user_id"
+            ):
+                self.members[project_id].add(user_id)
+
+    def user_id(self, username, field):
+        if not username:
+            raise RowError(f"{field} manquant.")
+        pk = self.users.get(username)
+        if pk is None:
+            raise RowError(f"{field} inconnu : {username}.")
+        return pk
+
+    def project_id(self, name):
+        if not name:
+            raise RowError("project manquant.")
+        pk = self.projects.get(name)
+        if pk is None:
+            raise RowError(f"Projet inconnu : {name}.")
+        if pk is AMBIGUOUS:
+            raise RowError(f"Nom de projet ambigu : {name}.")
+        return pk
+
+    def check_member(self, project_id, user_id, message):
+        if user_id not in self.members[project_id]:
+            raise RowError(message)
+
+
+@contextmanager
+def historical_timestamps(*models):
+    """
+    Désactive auto_now / auto_now_add le temps de l'import, pour conserver
+    les dates d'origine (bulk_create les écraserait sinon).
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def parse_moment(value, field, default):
+    if not value:
+        return default
+    moment = parse_datetime(value)
+    if moment is None:
+        raise RowError(f"{field} : date invalide ({value}).")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.get_default_timezone())
+    return moment
+
+
+def value_of(record, field) -> str:
+    """
+    Valeur texte normalisée (les champs JSON peuvent être des nombres ou null).
+    """
+    value = record.get(field)
+    return "" if value is None else str(value).strip()
+
+
+def parse_choice(record, field, choices, default):
+    value = value_of(record, field).upper()
+    if not value:
+        return default
+    if value not in choices.values:
+        raise RowError(f"{field} invalide : {value}.")
+    return value
+
+
+def required_text(record, field, max_length=None):
+    value = value_of(record, field)
+    if not value:
+        raise RowError(f"{field} manquant.")
+    if max_length and len(value) > max_length:
+        raise RowError(f"{field} dépasse {max_length} caractères.")
+    return value
+
+
+def build_issue(record, lookups, now):
+    """
+    Issue non sauvegardée, validée comme par IssueSerializer.validate.
+    """
+    project_id = lookups.project_id(value_of(record, "project"))
+    author_id = lookups.user_id(value_of(record, "author"), "author")
+    assignee_id = lookups.user_id(value_of(record, "assignee"), "assignee")
+    lookups.check_member(project_id, author_id, "L'auteur doit être contributeur du projet.")
+    lookups.check_member(project_id, assignee_id, "L'assigné doit être contributeur du même projet.")
+
+    created_at = parse_moment(value_of(record, "created_at"), "created_at", now)
+    issue = Issue(
+        title=required_text(record, "title", Issue._meta.get_field("title").max_length),
+        description=record.get("description") or "",
+        tag=parse_choice(record, "tag", Issue.Tag, Issue.Tag.BUG),
+        priority=parse_choice(record, "priority", Issue.Priority, Issue.Priority.MEDIUM),
+        status=parse_choice(record, "status", Issue.Status, Issue.Status.TODO),
+        project_id=project_id,
+        author_id=author_id,
+        assignee_id=assignee_id,
+        created_at=created_at,
+        updated_at=parse_moment(value_of(record, "updated_at"), "updated_at", created_at),
+    )
+    # bulk_create ne passe pas par save()
+    issue.sync_ranks()
+    return issue
+
+
+def build_comment(record, lookups, issues, now):
+    """
+    Commentaire non sauvegardé, validé comme par CommentSerializer.validate.
+    `issues` : {external_id: (issue_id, project_id)} pour le lot (issues vivantes).
+    """
+    issue_ref = value_of(record, "issue")
+    if issue_ref not in issues:
+        raise RowError(f"Issue inconnue, supprimée ou archivée : {issue_ref or '(vide)'}.")
+    issue_id, project_id = issues[issue_ref]
+    author_id = lookups.user_id(value_of(record, "author"), "author")
+    lookups.check_member(project_id, author_id, "L'auteur doit être contributeur du projet.")
+
+    created_at = parse_moment(value_of(record, "created_at"), "created_at", now)
+    return Comment(
+        issue_id=issue_id,
+        author_id=author_id,
+        description=required_text(record, "description"),
+        created_at=created_at,
+        updated_at=parse_moment(value_of(record, "updated_at"), "updated_at", created_at),
+    )
+
+
+class Importer:
+    """
+    Import d'un fichier, lot par lot.
+    - on_progress(records, created, rejected) : après chaque lot validé ;
+    - on_reject(numéro d'enregistrement, motif, enregistrement).
+    """
+    def __init__(self, kind, path, fmt, state, batch_size=None, on_progress=None, on_reject=None):
+        if kind not in KINDS:
+            raise ValueError(f"Type d'import inconnu : {kind}.")
+        self.kind = kind
+        self.path = path
+        self.fmt = fmt
+        self.state = state
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.on_progress = on_progress
+        self.on_reject = on_reject
+        self.lookups = Lookups()
+        self.source = str(path.resolve())
+        self.stats = {"skipped": 0, "created": 0, "rejected": 0}
+
+    def run(self) -> dict:
+        if self.kind == "issues" and not connection.features.can_return_rows_from_bulk_insert:
+            raise RuntimeError("Cette base ne renvoie pas les identifiants de bulk_create : import impossible.")
+
+        done = self.state.get_checkpoint(self.kind, self.source)
+        self.stats["skipped"] = done
+        records = islice(read_records(self.path, self.fmt), done, None)
+
+        with historical_timestamps(Issue, Comment):
+            for batch in batched(records, self.batch_size):
+                self.import_batch(batch, first=done + 1)
+                done += len(batch)
+                if self.on_progress:
+                    self.on_progress(done, self.stats["created"], self.stats["rejected"])
+        return self.stats
+
+    def reject(self, number, reason, record):
+        self.stats["rejected"] += 1
+        if self.on_reject:
+            self.on_reject(number, reason, record)
+
+    def import_batch(self, batch, first):
+        valid = []
+        for number, record in enumerate(batch, start=first):
+            if isinstance(record, RowError):
+                self.reject(number, str(record), None)
+            elif not isinstance(record, dict):
+                self.reject(number, "Objet JSON attendu.", record)
+            else:
+                valid.append((number, record))
+
+        now = timezone.now()
+        records = first - 1 + len(batch)
+        if self.kind == "issues":
+            issues, external_ids = self.build_issues(valid, now)
+            # Lignes et point de reprise validés ensemble : pas de lot rejoué
+            with transaction.atomic():
+                Issue.objects.bulk_create(issues)
+                issue_map = [(ext, issue.pk, issue.project_id) for ext, issue in zip(external_ids, issues)]
+                self.state.save_batch(self.kind, self.source, records, issue_map)
+            invalidate_inbox_counts(*{issue.assignee_id for issue in issues}, *{issue.author_id for issue in issues})
+            created = len(issues)
+        else:
+            comments = self.build_comments(valid, now)
+            with transaction.atomic():
+                Comment.objects.bulk_create(comments)
+                self.state.save_batch(self.kind, self.source, records)
+            created = len(comments)
+
+        self.stats["created"] += created
+
+    def build_issues(self, valid, now):
+        lookups = self.lookups
+        lookups.load_users(value_of(record, field) for _, record in valid for field in ("author", "assignee"))
+        lookups.load_projects(value_of(record, "project") for _, record in valid)
+        lookups.load_members(pk for pk in lookups.projects.values() if pk is not None and pk is not AMBIGUOUS)
+
+        # Doublons : déjà importés lors d'un passage précédent, ou répétés dans le lot
+        known = set(self.state.lookup_issues(value_of(record, "external_id") for _, record in valid))
+        issues, external_ids = [], []
+        for number, record in valid:
+            try:
+                ext = value_of(record, "external_id")
+                if not ext:
+                    raise RowError("external_id manquant.")
+                if ext in known:
+                    raise RowError(f"Issue déjà importée : {ext}.")
+                issues.append(build_issue(record, lookups, now))
+            except RowError as exc:
+                self.reject(number, str(exc), record)
+                continue
+            known.add(ext)
+            external_ids.append(ext)
+        return issues, external_ids
+
+    def build_comments(self, valid, now):
+        self.lookups.load_users(value_of(record, "author") for _, record in valid)
+        issues = self.state.lookup_issues((value_of(record, "issue") for _, record in valid), live=True)
+        self.lookups.load_members(project_id for _, project_id in issues.values())
+
+        comments = []
+        for number, record in valid:
+            try:
+                comments.append(build_comment(record, self.lookups, issues, now))
+            except RowError as exc:
+                self.reject(number, str(exc), record)
+        return comments
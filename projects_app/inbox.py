@@ -0,0 +1,72 @@
+"""
+Boîte de réception « mon travail » : issues assignées à l'utilisateur ou créées par lui.
+
+Les compteurs (issues ouvertes, répartition par statut) sont calculés en une
+seule requête groupée puis mis en cache par utilisateur. Le cache est invalidé
+par les écritures d'IssueViewSet ; une durée de vie courte borne l'écart
+entre workers (cache par processus) et après des écritures hors API.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Issue
+
+# Durée de vie des compteurs en cache (secondes)
+COUNTS_TTL = 60
+
+BOXES = ("assigned", "authored")
+
+
+def _cache_key(user_id) -> str:
+    return f"inbox-counts:{user_id}"
+
+
+def inbox_queryset(user, box):
+    """
+    Issues de la boîte demandée, limitées aux projets dont l'utilisateur est membre.
+    """
+    field = "assignee" if box == "assigned" else "author"
+    return Issue.objects.visible_to(user).filter(**{field: user})
+
+
+def compute_inbox_counts(user) -> dict:
+    """
+    Compteurs par statut pour les deux boîtes, en une requête GROUP BY status.
+    """
+    rows = (
+        Issue.objects.visible_to(user)
+        .filter(Q(assignee=user) | Q(author=user))
+        .order_by()
+        .values("status")
+        .annotate(
+            assigned=Count("pk", filter=Q(assignee=user)),
+            authored=Count("pk", filter=Q(author=user)),
+        )
+    )
+    counts = {box: {"open": 0, "by_status": {s: 0 for s in Issue.Status.values}} for box in BOXES}
+    for row in rows:
+        for box in BOXES:
+            counts[box]["by_status"][row["status"]] = row[box]
+            if row["status"] != Issue.Status.DONE:
+                counts[box]["open"] += row[box]
+    return counts
+
+
+def get_inbox_counts(user) -> dict:
+    """
+    Compteurs de la boîte de réception, servis depuis le cache si possible.
+    """
+    key = _cache_key(user.pk)
+    counts = cache.get(key)
+    if counts is None:
+        counts = compute_inbox_counts(user)
+        cache.set(key, counts, COUNTS_TTL)
+    return counts
+
+
+def invalidate_inbox_counts(*user_ids):
+    """
+    Invalide les compteurs des utilisateurs concernés par une écriture d'issue.
+    """
+    cache.delete_many([_cache_key(user_id) for user_id in set(user_ids) if user_id])
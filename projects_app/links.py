@@ -0,0 +1,126 @@
+"""
+Graphe de dépendances entre issues (liens BLOCKS, voir IssueLink).
+
+L'arbre des bloqueurs d'une issue (amont) ou des issues qu'elle bloque (aval)
+est calculé en une seule requête récursive (WITH RECURSIVE, SQLite et
+PostgreSQL), au lieu d'un aller-retour par niveau côté client :
+- profondeur bornée (max_depth) ;
+- détection des cycles par le chemin parcouru : une issue déjà présente sur
+  le chemin n'est pas réexplorée, le cycle est signalé ;
+- nombre de lignes borné (MAX_ROWS) : un graphe très maillé est tronqué.
+
+Le refus d'un lien qui fermerait un cycle ne suit pas les chemins (leur nombre
+croît exponentiellement dans un graphe maillé) : parcours des seules issues
+atteignables (UNION), chacune explorée une fois, sans limite de profondeur.
+"""
+
+from django.db import connections, router
+
+from .models import IssueLink
+
+# Profondeur par défaut et plafond de ?depth=
+DEFAULT_DEPTH = 5
+MAX_DEPTH = 20
+# Chemins parcourus au maximum par requête
+MAX_ROWS = 1000
+
+UPSTREAM = "upstream"
+DOWNSTREAM = "downstream"
+DIRECTIONS = (UPSTREAM, DOWNSTREAM)
+
+
+def _walk_sql(direction):
+    """
+    CTE « walk » : une ligne par lien parcouru (link_id, parent_id, node_id, depth, path, cycle).
+    - amont : liens dont la cible est le nœud courant, on remonte vers la source ;
+    - aval : liens dont la source est le nœud courant, on descend vers la cible.
+    Paramètres : issue de départ, type de lien (deux fois), profondeur maximale.
+    """
+    connection = connections[router.db_for_read(IssueLink)]
+    quote = connection.ops.quote_name
+    table = quote(IssueLink._meta.db_table)
+    near, far = ("target_id", "source_id") if direction == UPSTREAM else ("source_id", "target_id")
+    return f"""
+        WITH RECURSIVE walk (link_id, parent_id, node_id, depth, path, cycle) AS (
+            SELECT l.id, l.{near}, l.{far}, 1,
+                   ',' || CAST(l.{near} AS TEXT) || ',' || CAST(l.{far} AS TEXT) || ',', 0
+            FROM {table} l
+            WHERE l.{near} = %s AND l.kind = %s
+            UNION ALL
+            SELECT l.id, l.{near}, l.{far}, w.depth + 1,
+                   w.path || CAST(l.{far} AS TEXT) || ',',
+                   CASE WHEN w.path LIKE '%%,' || CAST(l.{far} AS TEXT) || ',%%' THEN 1 ELSE 0 END
+            FROM walk w
+            JOIN {table} l ON l.{near} = w.node_id AND l.kind = %s
+            WHERE w.cycle = 0 AND w.depth < %s
+        )
+    """
+
+
+def _run(sql, params):
+    with connections[router.db_for_read(IssueLink)].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def walk_links(issue_id, direction=UPSTREAM, max_depth=DEFAULT_DEPTH, kind=IssueLink.Kind.BLOCKS):
+    """
+    Parcourt les liens à partir de l'issue, en une requête.
+    Renvoie (lignes, tronqué) ; chaque ligne : (link_id, parent_id, node_id, depth, path, cycle).
+    Le parcours va un niveau au-delà de max_depth pour savoir si l'arbre est tronqué.
+    """
+    sql = _walk_sql(direction) + "SELECT link_id, parent_id, node_id, depth, path, cycle FROM walk LIMIT %s"
+    rows = _run(sql, [issue_id, str(kind), str(kind), max_depth + 1, MAX_ROWS + 1])
+    truncated = len(rows) > MAX_ROWS or any(row[3] > max_depth for row in rows)
+    return [row for row in rows[:MAX_ROWS] if row[3] <= max_depth], truncated
+
+
+def dependency_graph(issue_id, direction=UPSTREAM, max_depth=DEFAULT_DEPTH) -> dict:
+    """
+    Graphe de blocage de l'issue :
+    - depths : {issue_id: profondeur minimale} des issues atteintes ;
+    - links : liens BLOCKS parcourus (source bloque target), sans doublon ;
+    - cycles : chemins revenant sur une issue déjà visitée ([12, 9, 4, 12]) ;
+    - truncated : profondeur ou nombre de chemins atteint.
+    """
+    rows, truncated = walk_links(issue_id, direction, max_depth)
+    depths, links, cycles = {}, {}, []
+    for link_id, parent_id, node_id, depth, path, cycle in rows:
+        source, target = (node_id, parent_id) if direction == UPSTREAM else (parent_id, node_id)
+        link = links.setdefault(link_id, {"id": link_id, "source": source, "target": target, "depth": depth})
+        link["depth"] = min(link["depth"], depth)
+        if cycle:
+            # Le chemin se termine par l'issue déjà visitée
+            cycles.append([int(value) for value in path.strip(",").split(",")])
+            continue
+        if node_id != issue_id and depth < depths.get(node_id, max_depth + 1):
+            depths[node_id] = depth
+    return {
+        "depths": depths,
+        "links": sorted(links.values(), key=lambda link: (link["depth"], link["id"])),
+        "cycles": sorted(cycles),
+        "truncated": truncated,
+    }
+
+
+def creates_blocking_cycle(source_id, target_id) -> bool:
+    """
+    « source bloque target » fermerait-il un cycle, c'est-à-dire target
+    bloque-t-il déjà source (directement ou non) ?
+    Ensemble des issues bloquées par target (UNION : pas de doublon, donc
+    au plus une ligne par issue), arrêté dès que source est atteinte.
+    """
+    connection = connections[router.db_for_read(IssueLink)]
+    table = connection.ops.quote_name(IssueLink._meta.db_table)
+    sql = f"""
+        WITH RECURSIVE reach (node_id) AS (
+            SELECT l.target_id FROM {table} l WHERE l.source_id = %s AND l.kind = %s
+            UNION
+            SELECT l.target_id
+            FROM reach r
+            JOIN {table} l ON l.source_id = r.node_id AND l.kind = %s
+        )
+        SELECT 1 FROM reach WHERE node_id = %s LIMIT 1
+    """
+    kind = str(IssueLink.Kind.BLOCKS)
+    return bool(_run(sql, [target_id, kind, kind, source_id]))
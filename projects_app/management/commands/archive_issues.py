@@ -0,0 +1,42 @@
+"""
+Archivage des issues terminées : python manage.py archive_issues --days 180
+
+À planifier (cron) : déplace par lots les issues DONE non modifiées depuis
+--days jours, avec leurs commentaires, vers les tables d'archive.
+Une issue archivée se restaure avec --restore <id> (ou automatiquement
+lorsqu'elle est modifiée via l'API).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects_app.archive import archive_issues, restore_issue
+
+
+class Command(BaseCommand):
+    help = "Archive par lots les issues DONE anciennes et leurs commentaires."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Ancienneté minimale en jours (défaut : SOFTDESK_ARCHIVE_AFTER_DAYS).")
+        parser.add_argument("--batch-size", type=int, default=None, help="Issues par transaction.")
+        parser.add_argument("--restore", type=int, action="append", default=[],
+                            help="Identifiant d'issue archivée à restaurer.")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            for issue_id in options["restore"]:
+                if not restore_issue(issue_id):
+                    raise CommandError(f"Issue {issue_id} absente de l'archive.")
+                self.stdout.write(self.style.SUCCESS(f"Issue {issue_id} restaurée."))
+            return
+
+        verbose = options["verbosity"] > 1
+
+        def on_progress(counts):
+            if verbose:
+                self.stdout.write(f"  {counts['issues']} issues, {counts['comments']} commentaires")
+
+        counts = archive_issues(days=options["days"], batch_size=options["batch_size"], on_progress=on_progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archivage terminé : {counts['issues']} issues, {counts['comments']} commentaires."
+        ))
@@ -0,0 +1,72 @@
+"""
+Banc d'essai du rendu des réponses : python manage.py bench_responses
+
+Construit une page d'issues représentative (sortie d'IssueSerializer, longues
+descriptions) puis mesure, pour chaque renderer et chaque encodage :
+- la taille de la réponse en octets ;
+- le temps CPU moyen par réponse (rendu + compression).
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from softdesk import middleware, renderers
+
+WORDS = "le ticket reste bloqué tant que la migration de la base n'est pas terminée".split()
+
+
+def sample_page(items, description_size):
+    """
+    Page paginée au format de IssueViewSet.list.
+    Texte pseudo-aléatoire (graine fixe) : moins compressible qu'une répétition.
+    """
+    rng = random.Random(0)
+
+    def text():
+        return " ".join(rng.choice(WORDS) for _ in range(description_size // 5))[:description_size]
+
+    results = [
+        {
+            "id": pk, "title": f"Issue {pk}", "description": text(),
+            "tag": "BUG", "priority": "HIGH", "status": "IN_PROGRESS",
+            "project": 1, "author": 1, "assignee": 2,
+            "created_at": "2025-09-25T17:53:00.000000Z", "updated_at": "2025-09-26T08:12:45.123456Z",
+        }
+        for pk in range(1, items + 1)
+    ]
+    return {"count": items, "next": None, "previous": None, "results": results}
+
+
+class Command(BaseCommand):
+    help = "Mesure taille et coût CPU des renderers et de la compression sur une page d'issues."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=20, help="Issues par page (PAGE_SIZE).")
+        parser.add_argument("--description-size", type=int, default=2000, help="Longueur des descriptions.")
+        parser.add_argument("--repeat", type=int, default=200, help="Nombre de rendus mesurés.")
+
+    def handle(self, *args, **options):
+        data = sample_page(options["items"], options["description_size"])
+        repeat = options["repeat"]
+
+        candidates = [("json (DRF)", JSONRenderer()), ("json compact", renderers.CompactJSONRenderer())]
+        if renderers.msgpack is not None:
+            candidates.append(("msgpack", renderers.MessagePackRenderer()))
+
+        # Mêmes réglages que le middleware (settings.SOFTDESK_COMPRESSION)
+        compression = middleware.CompressionMiddleware(get_response=None)
+        encodings = ["identity", "gzip"] + (["br"] if middleware.brotli is not None else [])
+
+        self.stdout.write(f"{'renderer':<14}{'encodage':<10}{'octets':>10}{'CPU µs':>10}")
+        for name, renderer in candidates:
+            for encoding in encodings:
+                start = time.process_time()
+                for _ in range(repeat):
+                    body = renderer.render(data)
+                    if encoding != "identity":
+                        body = compression.encode(body, encoding)
+                cpu_us = (time.process_time() - start) / repeat * 1e6
+                self.stdout.write(f"{name:<14}{encoding:<10}{len(body):>10}{cpu_us:>10.0f}")
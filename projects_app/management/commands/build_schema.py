@@ -0,0 +1,43 @@
+"""
+Préparation du cache du schéma OpenAPI : python manage.py build_schema
+
+À lancer au déploiement : génère le schéma une fois, l'écrit sur disque pour
+chaque format servi par /api/v1/schema/ (YAML, JSON), puis supprime les
+fichiers des versions précédentes du code. Les workers n'ont plus qu'à lire
+ces fichiers au premier appel.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from softdesk import schema
+
+
+class Command(BaseCommand):
+    help = "Génère le schéma OpenAPI et l'écrit dans le cache disque (SOFTDESK_SCHEMA_CACHE_DIR)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-old", action="store_true", help="Conserver les fichiers des versions précédentes.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        document = schema.generate_schema()
+
+        renderers = {}
+        for renderer_class in schema.CachedSpectacularAPIView.renderer_classes:
+            renderers.setdefault(renderer_class.format, renderer_class())
+
+        for renderer in renderers.values():
+            path = schema.cache_path(renderer.format)
+            body = schema.render_schema(renderer, document)
+            schema.write_cache_file(path, body)
+            self.stdout.write(f"{path} ({len(body)} octets)")
+
+        if not options["keep_old"]:
+            removed = schema.prune_cache_files()
+            if removed:
+                self.stdout.write(f"{removed} fichier(s) obsolète(s) supprimé(s).")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Schéma {schema.get_code_version()} généré en {elapsed:.2f} s."))
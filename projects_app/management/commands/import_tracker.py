@@ -0,0 +1,66 @@
+"""
+Import en masse depuis l'ancien outil de suivi :
+
+    python manage.py import_tracker issues export/issues.jsonl
+    python manage.py import_tracker comments export/comments.csv --rejects rejets.jsonl
+
+Les issues doivent être importées avant leurs commentaires. L'état de l'import
+(points de reprise, correspondance des issues) est conservé en base : relancer
+la même commande après une interruption reprend au dernier lot validé.
+Voir projects_app/importer.py.
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects_app.importer import KINDS, ImportState, Importer
+
+
+class Command(BaseCommand):
+    help = "Importe des issues ou des commentaires (JSONL/CSV) par lots, avec reprise sur interruption."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=KINDS, help="Type d'enregistrements à importer.")
+        parser.add_argument("path", type=Path, help="Fichier JSONL ou CSV.")
+        parser.add_argument("--format", choices=("jsonl", "csv"), help="Format (par défaut : extension du fichier).")
+        parser.add_argument("--batch-size", type=int, default=None, help="Enregistrements par transaction.")
+        parser.add_argument("--rejects", type=Path, default=None,
+                            help="Fichier JSONL recevant les enregistrements rejetés et leur motif.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not path.is_file():
+            raise CommandError(f"Fichier introuvable : {path}")
+        fmt = options["format"] or ("csv" if path.suffix.lower() == ".csv" else "jsonl")
+
+        rejects = options["rejects"].open("a", encoding="utf-8") if options["rejects"] else None
+        verbose = options["verbosity"] > 1
+
+        def on_reject(number, reason, record):
+            if rejects:
+                rejects.write(json.dumps({"record": number, "error": reason, "data": record}, default=str) + "\n")
+            if verbose:
+                self.stderr.write(f"  #{number} : {reason}")
+
+        def on_progress(records, created, rejected):
+            self.stdout.write(f"  {records} enregistrements lus, {created} créés, {rejected} rejetés")
+
+        importer = Importer(
+            options["kind"], path, fmt, ImportState(),
+            batch_size=options["batch_size"], on_progress=on_progress, on_reject=on_reject,
+        )
+        try:
+            stats = importer.run()
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if rejects:
+                rejects.close()
+
+        if stats["skipped"]:
+            self.stdout.write(f"Reprise : {stats['skipped']} enregistrements déjà traités ignorés.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Import {options['kind']} terminé : {stats['created']} créés, {stats['rejected']} rejetés."
+        ))
@@ -0,0 +1,43 @@
+"""
+Commande de purge par lots : python manage.py purge --project 12 --user 7
+
+La purge peut être interrompue (Ctrl+C, redéploiement...) puis relancée
+avec les mêmes arguments : les lots déjà validés ne sont pas rejoués, et les
+contenus orphelins de toute la table sont supprimés (y compris ceux laissés
+par une purge interrompue).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects_app.deletion import purge_project, purge_user
+
+
+class Command(BaseCommand):
+    help = "Supprime des projets et/ou des utilisateurs par lots bornés, avec suivi de progression."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, action="append", default=[], help="Identifiant de projet à purger.")
+        parser.add_argument("--user", type=int, action="append", default=[], help="Identifiant d'utilisateur à purger.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Nombre de lignes par transaction.")
+
+    def handle(self, *args, **options):
+        if not (options["project"] or options["user"]):
+            raise CommandError("Indiquer au moins un --project ou un --user.")
+
+        batch_size = options["batch_size"]
+        verbose = options["verbosity"] > 1
+
+        def on_progress(label, total):
+            # Progression détaillée uniquement en -v 2
+            if verbose:
+                self.stdout.write(f"  {label}: {total}")
+
+        for project_id in options["project"]:
+            self.stdout.write(f"Projet {project_id}...")
+            counts = purge_project(project_id, batch_size=batch_size, on_progress=on_progress, sweep_blobs=True)
+            self.stdout.write(self.style.SUCCESS(f"Projet {project_id} purgé : {counts}"))
+
+        for user_id in options["user"]:
+            self.stdout.write(f"Utilisateur {user_id}...")
+            counts = purge_user(user_id, batch_size=batch_size, on_progress=on_progress, sweep_blobs=True)
+            self.stdout.write(self.style.SUCCESS(f"Utilisateur {user_id} purgé : {counts}"))
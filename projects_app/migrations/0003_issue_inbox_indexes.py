@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects_app', '0002_issue_comment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['assignee', 'status', '-updated_at'], name='issue_assignee_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['author', 'status', '-updated_at'], name='issue_author_inbox_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import Exists, OuterRef
+
+# Nombre de projets traités par lot
+BATCH_SIZE = 1000
+
+
+def backfill_author_contributors(apps, schema_editor):
+    """
+    Garantit que chaque auteur de projet figure dans Contributor avec le rôle AUTHOR :
+    - création de l'entrée manquante ;
+    - promotion en AUTHOR si l'auteur était inscrit comme simple contributeur.
+    """
+    Project = apps.get_model("projects_app", "Project")
+    Contributor = apps.get_model("projects_app", "Contributor")
+    db = schema_editor.connection.alias
+
+    promoted = Contributor.objects.using(db).filter(role="CONTRIBUTOR").filter(
+        Exists(Project.objects.using(db).filter(pk=OuterRef("project_id"), author_id=OuterRef("user_id")))
+    )
+    promoted.update(role="AUTHOR")
+
+    missing = (
+        Project.objects.using(db)
+        .filter(~Exists(Contributor.objects.using(db).filter(project_id=OuterRef("pk"), user_id=OuterRef("author_id"))))
+        .order_by("pk")
+        .values_list("pk", "author_id")
+    )
+    while True:
+        batch = list(missing[:BATCH_SIZE])
+        if not batch:
+            break
+        Contributor.objects.using(db).bulk_create(
+            [Contributor(project_id=project_id, user_id=author_id, role="AUTHOR") for project_id, author_id in batch]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects_app', '0003_issue_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_author_contributors, migrations.RunPython.noop),
+    ]
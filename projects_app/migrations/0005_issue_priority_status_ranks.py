@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:32
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+# Copie figée des rangs de Issue.PRIORITY_RANKS / Issue.STATUS_RANKS
+PRIORITY_RANKS = {"HIGH": 1, "MEDIUM": 2, "LOW": 3}
+STATUS_RANKS = {"TODO": 1, "IN_PROGRESS": 2, "DONE": 3}
+
+
+def backfill_ranks(apps, schema_editor):
+    """
+    Calcule les rangs des issues existantes en un seul UPDATE ... CASE.
+    """
+    Issue = apps.get_model("projects_app", "Issue")
+    Issue.objects.using(schema_editor.connection.alias).update(
+        priority_rank=Case(*[When(priority=k, then=Value(v)) for k, v in PRIORITY_RANKS.items()], default=Value(2)),
+        status_rank=Case(*[When(status=k, then=Value(v)) for k, v in STATUS_RANKS.items()], default=Value(1)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects_app', '0004_backfill_author_contributors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='status_rank',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'priority_rank', '-created_at'], name='issue_project_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects_app', '0006_archive_tables'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('issue_id', models.BigIntegerField(blank=True, null=True)),
+                ('target_id', models.BigIntegerField()),
+                ('verb', models.CharField(choices=[('issue.created', 'Issue created'), ('issue.updated', 'Issue updated'), ('issue.deleted', 'Issue deleted'), ('comment.created', 'Comment created'), ('comment.updated', 'Comment updated'), ('comment.deleted', 'Comment deleted'), ('contributor.added', 'Contributor added'), ('contributor.updated', 'Contributor updated'), ('contributor.removed', 'Contributor removed')], max_length=32)),
+                ('changes', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='activities', to='projects_app.project')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['project', '-created_at'], name='activity_project_idx'), models.Index(fields=['issue_id', '-created_at'], name='activity_issue_idx')],
+            },
+        ),
+    ]
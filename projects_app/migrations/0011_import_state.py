@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects_app', '0010_issue_inbox_index_tiebreak'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedIssue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.CharField(max_length=255, unique=True)),
+                ('issue_id', models.BigIntegerField()),
+                ('project_id', models.BigIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16)),
+                ('source', models.CharField(max_length=500)),
+                ('records', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('kind', 'source')},
+            },
+        ),
+    ]
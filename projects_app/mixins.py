@@ -0,0 +1,293 @@
+"""
+Mixins de vues pour l'app 'projects_app'.
+"""
+
+from contextlib import ExitStack
+
+from django.db import transaction
+from django.db.models import Value
+from django.utils.http import parse_header_parameters
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, PermissionDenied, UnsupportedMediaType, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from softdesk.mixins import BatchRetrieveMixin
+from . import attachments
+from .archive import restore_issue
+from .models import Project, Issue, ArchivedIssue
+from .permissions import member_project_ids
+
+
+class ProjectBatchRetrieveMixin(BatchRetrieveMixin):
+    """
+    Récupération par lot (?ids=) pour les ressources rattachées à un projet :
+    la lecture est autorisée aux membres du projet, vérifiés pour tout le lot
+    par une seule requête sur Contributor.
+    """
+    def get_batch_project_id(self, obj):
+        raise NotImplementedError
+
+    def get_batch_allowed_ids(self, objects):
+        objects = list(objects)
+        # Route imbriquée : queryset déjà limité au projet autorisé
+        if getattr(self, "project", None) is not None:
+            return {obj.pk for obj in objects}
+        members = member_project_ids(self.request.user, {self.get_batch_project_id(obj) for obj in objects})
+        return {obj.pk for obj in objects if self.get_batch_project_id(obj) in members}
+
+
+class ArchiveMixin:
+    """
+    Accès aux objets archivés (voir archive.py) pour les vues Issue / Comment.
+
+    - Liste avec ?include_archived=1 : union des tables vivante et d'archive,
+      paginée sur les seules colonnes de tri (UNION ALL), puis chargement des
+      objets de la page (une requête par table).
+    - Détail d'un objet archivé : servi en lecture avec ?include_archived=1 ;
+      toute écriture restaure d'abord l'issue (et ses commentaires), dans une
+      transaction annulée si l'écriture échoue ensuite (validation, permissions...).
+    """
+    restored = False
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        La transaction n'est ouverte qu'à la première restauration (voir
+        restore_archived_issue) ; une réponse en erreur l'annule, comme un lot
+        atomique (voir softdesk/batch.py).
+        """
+        with ExitStack() as self.restore_transaction:
+            response = super().dispatch(request, *args, **kwargs)
+            if self.restored and response.status_code >= 400:
+                transaction.set_rollback(True)
+        return response
+
+    def restore_archived_issue(self, issue_id):
+        """
+        Restaure l'issue avant une écriture, dans la transaction de la requête.
+        """
+        if not self.restored:
+            self.restore_transaction.enter_context(transaction.atomic())
+            self.restored = True
+        return restore_issue(issue_id)
+
+    def include_archived(self):
+        return self.request.query_params.get("include_archived", "").lower() in ("1", "true", "yes")
+
+    def get_archived_queryset(self):
+        """
+        Pendant archivé de get_queryset() (mêmes restrictions d'accès).
+        """
+        raise NotImplementedError
+
+    def get_archived_issue_id(self, obj):
+        """
+        Issue à restaurer pour rendre `obj` modifiable.
+        """
+        raise NotImplementedError
+
+    def paginate_with_archived(self, queryset, archived):
+        """
+        Renvoie (page, objets) ; page vaut None si la vue n'est pas paginée.
+        """
+        # Tri de la liste vivante, rejoué sur l'union ; l'identifiant départage les ex aequo
+        ordering = [
+            ("-" if term.startswith("-") else "") + ("id" if term.lstrip("-") == "pk" else term.lstrip("-"))
+            for term in (queryset.query.order_by or queryset.model._meta.ordering)
+        ]
+        if not any(term.lstrip("-") == "id" for term in ordering):
+            ordering.append("-id")
+        columns = list(dict.fromkeys(term.lstrip("-") for term in ordering))
+
+        def keys(qs, is_archived):
+            return qs.order_by().annotate(is_archived=Value(is_archived)).values(*columns, "is_archived")
+
+        union = keys(queryset, False).union(keys(archived, True), all=True).order_by(*ordering)
+        page = self.paginate_queryset(union)
+        rows = list(page if page is not None else union)
+
+        live_ids = [row["id"] for row in rows if not row["is_archived"]]
+        archived_ids = [row["id"] for row in rows if row["is_archived"]]
+        loaded = {(False, obj.pk): obj for obj in queryset.order_by().filter(pk__in=live_ids)}
+        loaded.update({(True, obj.pk): obj for obj in archived.order_by().filter(pk__in=archived_ids)})
+        objects = [loaded[(row["is_archived"], row["id"])] for row in rows if (row["is_archived"], row["id"]) in loaded]
+        return page, objects
+
+    def get_archived_object(self, lookup, queryset=None):
+        """
+        Détail introuvable dans la table vivante : cherche dans l'archive
+        (dans `queryset`, par défaut get_archived_queryset()).
+        - Lecture : l'objet archivé, si ?include_archived=1.
+        - Écriture : permissions vérifiées sur l'objet archivé, puis restauration
+          (annulée si l'écriture échoue) ; renvoie l'objet vivant.
+        None si l'objet n'est pas archivé (ou si la lecture ne demande pas l'archive).
+        """
+        read_only = self.request.method in SAFE_METHODS
+        if read_only and not self.include_archived():
+            return None
+        if queryset is None:
+            queryset = self.get_archived_queryset()
+        obj = queryset.filter(**{self.lookup_field: lookup}).first()
+        if obj is None:
+            return None
+        self.check_object_permissions(self.request, obj)
+        if read_only:
+            return obj
+        self.restore_archived_issue(self.get_archived_issue_id(obj))
+        return self.get_queryset().filter(**{self.lookup_field: lookup}).first()
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Requête trop volumineuse."
+    default_code = "request_too_large"
+
+
+class LengthRequired(APIException):
+    status_code = status.HTTP_411_LENGTH_REQUIRED
+    default_detail = "En-tête Content-Length requis."
+    default_code = "length_required"
+
+
+class AttachmentUploadMixin:
+    """
+    Action « attachments » des issues et des commentaires (voir attachments.py) :
+    - GET : pièces jointes de l'objet ;
+    - POST : ajout d'une pièce jointe. Le corps de la requête est le contenu brut
+      du fichier (pas de multipart), son Content-Type celui du fichier ; le nom est
+      donné par Content-Disposition (filename=...) ou ?filename=.
+
+    Le corps n'est jamais chargé en mémoire : request.data n'est pas lu, le flux
+    est copié par blocs sur disque.
+    """
+    def get_attachment_queryset(self, obj):
+        raise NotImplementedError
+
+    def get_attachment_target(self, obj):
+        """
+        Champs de rattachement : project_id, issue_id, comment_id.
+        """
+        raise NotImplementedError
+
+    def attachments_response(self, request, obj):
+        if request.method in SAFE_METHODS:
+            queryset = self.get_attachment_queryset(obj).select_related("blob", "author")
+            return Response(self.get_serializer(queryset, many=True).data)
+        attachment = self.upload_attachment(request, **self.get_attachment_target(obj))
+        return Response(self.get_serializer(attachment).data, status=status.HTTP_201_CREATED)
+
+    def upload_attachment(self, request, **target):
+        content_type = request.content_type.split(";")[0].strip().lower()
+        if content_type.startswith("multipart/") or content_type == "application/x-www-form-urlencoded":
+            raise UnsupportedMediaType(content_type, "Envoyez le contenu brut du fichier, sans formulaire.")
+
+        length = request.META.get("CONTENT_LENGTH")
+        if not length or not length.isdigit():
+            raise LengthRequired()
+        # Refus avant toute lecture du corps
+        max_size = attachments.get_conf()["MAX_SIZE"]
+        if int(length) > max_size:
+            raise RequestTooLarge(f"Fichier trop volumineux ({max_size} octets au maximum).")
+
+        _, params = parse_header_parameters(request.headers.get("Content-Disposition", ""))
+        filename = attachments.clean_filename(params.get("filename") or request.query_params.get("filename"))
+        if not filename:
+            raise ValidationError({"filename": "Nom de fichier requis (Content-Disposition ou ?filename=)."})
+
+        try:
+            return attachments.create_attachment(
+                # Flux de la requête borné par Content-Length, sans passer par les parsers DRF
+                request.stream,
+                filename=filename,
+                content_type=content_type,
+                author=request.user,
+                expected_size=int(length),
+                **target,
+            )
+        except attachments.UploadTooLarge as exc:
+            raise RequestTooLarge(str(exc))
+        except attachments.UploadError as exc:
+            raise ValidationError({"detail": str(exc)})
+
+
+class ProjectScopedMixin:
+    """
+    Vues imbriquées sous /projects/{project_pk}/ (et /issues/{issue_pk}/).
+
+    Le projet de l'URL est chargé et autorisé une seule fois, au début de la
+    requête (phase check_permissions), puis réutilisé par :
+    - les permissions (IsProjectContributor ne refait aucune requête) ;
+    - les querysets (filtrés directement sur le projet, sans jointure d'appartenance) ;
+    - les serializers (contexte « project » / « issue »).
+    """
+    project = None
+    issue = None
+    not_found_message = "Objet introuvable."
+
+    def check_permissions(self, request):
+        # Sans authentification, IsAuthenticated renvoie 401 avant toute résolution
+        if request.user and request.user.is_authenticated:
+            self.resolve_scope(request)
+        super().check_permissions(request)
+
+    def resolve_scope(self, request):
+        """
+        Résout le projet (404 s'il n'existe pas, 403 si l'utilisateur n'est pas membre),
+        puis l'issue de l'URL le cas échéant (404 si elle n'appartient pas au projet).
+        """
+        try:
+            self.project = Project.objects.with_role(request.user).get(pk=self.kwargs["project_pk"])
+        except Project.DoesNotExist:
+            raise NotFound("Projet introuvable.")
+        if self.project.member_role is None:
+            raise PermissionDenied("Vous devez être contributeur de ce projet.")
+
+        issue_pk = self.kwargs.get("issue_pk")
+        if issue_pk is not None:
+            self.issue = Issue.objects.filter(pk=issue_pk, project=self.project).first()
+            if self.issue is None:
+                self.issue = self.resolve_archived_issue(request, issue_pk)
+            if self.issue is None:
+                raise NotFound("Issue introuvable.")
+
+    def resolve_archived_issue(self, request, issue_pk):
+        """
+        Issue archivée de l'URL : lue telle quelle avec ?include_archived=1,
+        restaurée avant une écriture (nouveau commentaire...) ; la restauration
+        est annulée si les permissions ou la validation échouent ensuite.
+        """
+        archived = ArchivedIssue.objects.filter(pk=issue_pk, project=self.project).first()
+        if archived is None:
+            return None
+        if request.method in SAFE_METHODS:
+            return archived if self.include_archived() else None
+        self.restore_archived_issue(issue_pk)
+        return Issue.objects.filter(pk=issue_pk, project=self.project).first()
+
+    def get_object(self):
+        """
+        Détail limité au périmètre de l'URL : 404 pour un objet d'un autre projet/issue.
+        """
+        queryset = self.get_queryset()
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        obj = queryset.filter(**{self.lookup_field: lookup}).first()
+        if obj is None:
+            # Objet archivé : vérifie lui-même ses permissions (voir ArchiveMixin)
+            obj = self.get_archived_object(lookup)
+            if obj is None:
+                raise NotFound(self.not_found_message)
+            return obj
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    def get_batch_queryset(self):
+        """
+        Récupération par lot limitée au périmètre de l'URL (404 pour les autres objets).
+        """
+        return self.get_queryset()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["project"] = self.project
+        context["issue"] = self.issue
+        return context
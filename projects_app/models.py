@@ -1,10 +1,53 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
 
 # On réutilise le modèle User custom déclaré dans settings.AUTH_USER_MODEL
 User = settings.AUTH_USER_MODEL
 
 
+class ProjectQuerySet(models.QuerySet):
+    def _with_issue_count(self):
+        """
+        Nombre d'issues par projet, via une sous-requête corrélée (pas de GROUP BY global).
+        """
+        issue_count = (
+            Issue.objects.filter(project_id=models.OuterRef("pk"))
+            .order_by()
+            .values("project_id")
+            .annotate(count=models.Count("pk"))
+            .values("count")
+        )
+        return self.annotate(issue_count=Coalesce(models.Subquery(issue_count), 0))
+
+    def for_member(self, user):
+        """
+        Projets dont l'utilisateur est membre, pilotés par la seule relation Contributor
+        (l'auteur y figure avec le rôle AUTHOR). Le rôle de l'utilisateur et le nombre
+        d'issues sont calculés dans la même requête.
+        """
+        return (
+            self.filter(contributors__user=user)
+            .annotate(member_role=models.F("contributors__role"))
+            ._with_issue_count()
+        )
+
+    def with_role(self, user):
+        """
+        Tous les projets, annotés du rôle de l'utilisateur (None s'il n'est pas membre).
+        """
+        role = Contributor.objects.filter(project_id=models.OuterRef("pk"), user=user).order_by().values("role")[:1]
+        return self.annotate(member_role=models.Subquery(role))
+
+    def with_membership(self, user):
+        """
+        Rôle de l'utilisateur et nombre d'issues, pour tous les projets.
+        Utilisé pour le détail : distinguer 404 (inexistant) et 403 (non membre).
+        """
+        return self.with_role(user)._with_issue_count()
+
+
 class Project(models.Model):
     # Types possibles d’un projet (exemples)
     FRONTEND = "FRONTEND"
@@ -32,6 +75,8 @@ class Project(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
 
@@ -71,6 +116,17 @@ class Contributor(models.Model):
         return f"{self.user} -> {self.project} [{self.role}]"
 
 
+class IssueQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Issues des projets dont l'utilisateur est contributeur.
+        Sous-requête EXISTS : pas de jointure multipliant les lignes, donc pas de DISTINCT.
+        """
+        return self.filter(
+            models.Exists(Contributor.objects.filter(project_id=models.OuterRef("project_id"), user=user))
+        )
+
+
 class Issue(models.Model):
     # Catégories possibles pour un ticket (bug, fonctionnalité ou tâche)
     class Tag(models.TextChoices):
@@ -101,6 +157,13 @@ class Issue(models.Model):
     # Statut du ticket
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.TODO)
 
+    # Rangs numériques dérivés de priority / status (tri et index corrects) :
+    # priorité 1 = la plus haute, statut 1 = début du workflow. Synchronisés dans save().
+    PRIORITY_RANKS = {Priority.HIGH: 1, Priority.MEDIUM: 2, Priority.LOW: 3}
+    STATUS_RANKS = {Status.TODO: 1, Status.IN_PROGRESS: 2, Status.DONE: 3}
+    priority_rank = models.PositiveSmallIntegerField(default=2, editable=False)
+    status_rank = models.PositiveSmallIntegerField(default=1, editable=False)
+
     # Projet auquel l'issue est rattachée
     project = models.ForeignKey("projects_app.Project", on_delete=models.CASCADE, related_name="issues")
     # Auteur ayant créé le ticket
@@ -112,14 +175,70 @@ class Issue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = IssueQuerySet.as_manager()
+
+    # Faux pour les issues vivantes, vrai pour ArchivedIssue (même serializer)
+    is_archived = False
+
     class Meta:
         # Trie les issues de la plus récente à la plus ancienne
         ordering = ["-created_at"]
+        indexes = [
+            # Boîte de réception : « mes issues assignées / créées », par statut, récentes d'abord
+            # (id en dernier : ordre unique de la pagination par curseur)
+            models.Index(fields=["assignee", "status", "-updated_at", "-id"], name="issue_assignee_inbox_idx"),
+            models.Index(fields=["author", "status", "-updated_at", "-id"], name="issue_author_inbox_idx"),
+            # Tableaux « priorité la plus haute d'abord, puis plus récentes » d'un projet
+            models.Index(fields=["project", "priority_rank", "-created_at"], name="issue_project_priority_idx"),
+        ]
 
     def __str__(self):
         # Représentation lisible d'une issue
         return f"[{self.project_id}] {self.title}"
 
+    def sync_ranks(self):
+        """
+        Recalcule les rangs à partir des choix. À appeler explicitement avant un
+        bulk_create/bulk_update, qui ne passent pas par save().
+        """
+        self.priority_rank = self.PRIORITY_RANKS[self.priority]
+        self.status_rank = self.STATUS_RANKS[self.status]
+
+    def save(self, *args, **kwargs):
+        self.sync_ranks()
+        # Une sauvegarde partielle de priority/status doit aussi écrire le rang
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "priority" in update_fields:
+                update_fields.add("priority_rank")
+            if "status" in update_fields:
+                update_fields.add("status_rank")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+
+class CommentQuerySet(models.QuerySet):
+    def latest_per_issue(self, issue_ids, limit):
+        """
+        Les `limit` derniers commentaires de chaque issue, en une seule requête :
+        ROW_NUMBER() OVER (PARTITION BY issue_id ORDER BY created_at DESC) <= limit.
+        Chaque ligne porte aussi `issue_comment_count`, le nombre total de
+        commentaires de son issue (COUNT(*) OVER (PARTITION BY issue_id)).
+        """
+        partition = [models.F("issue_id")]
+        return (
+            self.filter(issue_id__in=issue_ids)
+            .annotate(
+                issue_rank=models.Window(
+                    RowNumber(), partition_by=partition,
+                    order_by=[models.F("created_at").desc(), models.F("pk").desc()],
+                ),
+                issue_comment_count=models.Window(models.Count("pk"), partition_by=partition),
+            )
+            .filter(issue_rank__lte=limit)
+        )
+
 
 class Comment(models.Model):
     # Issue à laquelle le commentaire est lié
@@ -133,6 +252,10 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    is_archived = False
+
     class Meta:
         # Trie les commentaires par ordre chronologique
         ordering = ["created_at"]
@@ -140,3 +263,213 @@ class Comment(models.Model):
     def __str__(self):
         # Représentation lisible d'un commentaire
         return f"Comment #{self.pk} on issue {self.issue_id}"
+
+
+class ArchivedIssue(models.Model):
+    """
+    Issue terminée depuis longtemps, sortie de la table Issue (voir archive.py).
+    Mêmes colonnes qu'Issue et même identifiant : les liens et les serializers
+    restent valables, et la restauration réinsère la ligne à l'identique.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    tag = models.CharField(max_length=16, choices=Issue.Tag.choices)
+    priority = models.CharField(max_length=16, choices=Issue.Priority.choices)
+    status = models.CharField(max_length=16, choices=Issue.Status.choices)
+    priority_rank = models.PositiveSmallIntegerField()
+    status_rank = models.PositiveSmallIntegerField()
+    project = models.ForeignKey("projects_app.Project", on_delete=models.CASCADE, related_name="archived_issues")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_issues_authored"
+    )
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_issues_assigned"
+    )
+    # Dates d'origine conservées (pas d'auto_now)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    objects = IssueQuerySet.as_manager()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"[{self.project_id}] {self.title} (archivée)"
+
+
+class ArchivedComment(models.Model):
+    """
+    Commentaire d'une issue archivée, même identifiant que dans Comment.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    issue = models.ForeignKey(ArchivedIssue, on_delete=models.CASCADE, related_name="comments")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_comments_authored"
+    )
+    description = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    # Même requête « derniers commentaires par issue » que Comment
+    objects = CommentQuerySet.as_manager()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"Comment #{self.pk} on archived issue {self.issue_id}"
+
+
+class Activity(models.Model):
+    """
+    Journal d'activité, en ajout seul (voir activity.py) : qui a modifié quoi,
+    avec le détail des champs changés ({"status": ["TODO", "DONE"], ...}).
+    L'issue est référencée par son seul identifiant : l'historique survit à
+    la suppression ou à l'archivage de l'issue.
+    """
+    class Verb(models.TextChoices):
+        ISSUE_CREATED = "issue.created", "Issue created"
+        ISSUE_UPDATED = "issue.updated", "Issue updated"
+        ISSUE_DELETED = "issue.deleted", "Issue deleted"
+        COMMENT_CREATED = "comment.created", "Comment created"
+        COMMENT_UPDATED = "comment.updated", "Comment updated"
+        COMMENT_DELETED = "comment.deleted", "Comment deleted"
+        CONTRIBUTOR_ADDED = "contributor.added", "Contributor added"
+        CONTRIBUTOR_UPDATED = "contributor.updated", "Contributor updated"
+        CONTRIBUTOR_REMOVED = "contributor.removed", "Contributor removed"
+
+    # Pas d'index dédié : couvert par activity_project_idx
+    project = models.ForeignKey(
+        "projects_app.Project", on_delete=models.CASCADE, related_name="activities", db_index=False
+    )
+    issue_id = models.BigIntegerField(null=True, blank=True)
+    # Objet concerné (issue, commentaire ou contributeur)
+    target_id = models.BigIntegerField()
+    verb = models.CharField(max_length=32, choices=Verb.choices)
+    # Auteur de l'action ; conservé anonyme si son compte est supprimé
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+")
+    changes = models.JSONField(default=dict, blank=True)
+    # Date de l'action (et non de l'écriture différée du journal)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # Fils d'activité d'un projet et d'une issue, plus récents d'abord
+            models.Index(fields=["project", "-created_at"], name="activity_project_idx"),
+            models.Index(fields=["issue_id", "-created_at"], name="activity_issue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.verb} #{self.target_id} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class AttachmentBlob(models.Model):
+    """
+    Contenu d'une pièce jointe, stocké une seule fois sur disque quelle que
+    soit la quantité de pièces jointes identiques (voir attachments.py).
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} octets)"
+
+
+class Attachment(models.Model):
+    """
+    Fichier joint à une issue, ou à l'un de ses commentaires (comment_id renseigné).
+    Issue et commentaire sont référencés par leur seul identifiant : la pièce
+    jointe suit l'issue lors de son archivage (même identifiant dans les deux tables).
+    """
+    project = models.ForeignKey("projects_app.Project", on_delete=models.CASCADE, related_name="attachments")
+    issue_id = models.BigIntegerField()
+    comment_id = models.BigIntegerField(null=True, blank=True)
+    blob = models.ForeignKey(AttachmentBlob, on_delete=models.PROTECT, related_name="attachments")
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255)
+    # Auteur de l'envoi ; la pièce jointe reste en place si son compte est supprimé hors purge
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="attachments"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["issue_id", "created_at"], name="attachment_issue_idx"),
+            models.Index(fields=["comment_id"], name="attachment_comment_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} (issue {self.issue_id})"
+
+
+class IssueLink(models.Model):
+    """
+    Lien entre deux issues d'un même projet (voir links.py) :
+    - BLOCKS : source bloque target ;
+    - DUPLICATES : source est un doublon de target ;
+    - RELATES : lien simple, non orienté (enregistré avec source < target).
+    Les issues sont référencées par leur identifiant : les liens suivent l'archivage.
+    """
+    class Kind(models.TextChoices):
+        BLOCKS = "BLOCKS", "Blocks"
+        RELATES = "RELATES", "Relates to"
+        DUPLICATES = "DUPLICATES", "Duplicates"
+
+    project = models.ForeignKey("projects_app.Project", on_delete=models.CASCADE, related_name="issue_links")
+    source_id = models.BigIntegerField()
+    target_id = models.BigIntegerField()
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Index (source_id, kind, target_id) : parcours vers l'aval
+        unique_together = ("source_id", "kind", "target_id")
+        ordering = ["created_at", "id"]
+        indexes = [
+            # Parcours vers l'amont (bloqueurs d'une issue)
+            models.Index(fields=["target_id", "kind", "source_id"], name="issuelink_target_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.source_id} {self.kind} #{self.target_id}"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Point de reprise d'un fichier importé (voir importer.py) : nombre
+    d'enregistrements traités, validé dans la même transaction que le lot.
+    """
+    kind = models.CharField(max_length=16)
+    source = models.CharField(max_length=500)
+    records = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("kind", "source")
+
+    def __str__(self):
+        return f"{self.kind} {self.source} : {self.records}"
+
+
+class ImportedIssue(models.Model):
+    """
+    Issue créée par l'import : identifiant dans l'ancien outil → issue, pour
+    écarter les doublons et rattacher les commentaires importés ensuite.
+    """
+    external_id = models.CharField(max_length=255, unique=True)
+    issue_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.external_id} → #{self.issue_id}"
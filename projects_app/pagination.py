@@ -0,0 +1,28 @@
+"""
+Classes de pagination spécifiques à l'app 'projects_app'.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class InboxCursorPagination(CursorPagination):
+    """
+    Pagination par curseur de la boîte de réception.
+    - Pas de COUNT(*) ni d'OFFSET : chaque page est une lecture d'index.
+    - Ordre : dernières mises à jour d'abord, puis identifiant décroissant, pour
+      un ordre unique (issues importées avec le même updated_at) ;
+      index assignee/author, status, -updated_at, -id.
+    """
+    ordering = ("-updated_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ActivityCursorPagination(CursorPagination):
+    """
+    Fil d'activité (journal en ajout seul) : plus récent d'abord, par curseur
+    (index project / issue_id, -created_at).
+    """
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -7,16 +7,69 @@ Règles clés (CDC) :
 - Comment : seul l'auteur du commentaire (ou staff) peut modifier/supprimer.
 """
 
+from contextlib import contextmanager
+
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from .models import Project, Contributor, Issue, Comment
+from .models import Project, Contributor, Issue, Comment, ArchivedIssue, ArchivedComment, Attachment, IssueLink
+
+# Attribut portant le cache d'appartenance partagé (voir shared_membership_cache)
+MEMBERSHIP_CACHE_ATTR = "_project_membership_cache"
 
 
 def is_contributor(user, project_id) -> bool:
     """
     Indique si l'utilisateur appartient au projet.
     Utilise .exists() pour éviter de charger des objets en mémoire.
+    Si un cache partagé est actif pour cet utilisateur, une appartenance
+    déjà vérifiée n'est pas redemandée à la base.
+    """
+    cache = getattr(user, MEMBERSHIP_CACHE_ATTR, None)
+    try:
+        key = int(project_id)
+    except (TypeError, ValueError):
+        key = None
+    if cache is not None and key in cache:
+        return True
+
+    member = Contributor.objects.filter(user=user, project_id=project_id).exists()
+    # Seules les appartenances positives sont mémorisées : un ajout de membre
+    # en cours de lot est donc toujours vu ; un retrait vide le cache.
+    if member and cache is not None and key is not None:
+        cache.add(key)
+    return member
+
+
+@contextmanager
+def shared_membership_cache(user):
     """
-    return Contributor.objects.filter(user=user, project_id=project_id).exists()
+    Active, le temps du bloc, un cache d'appartenance porté par l'objet user.
+    Utilisé par l'endpoint /batch : toutes les sous-requêtes partagent le même
+    utilisateur authentifié, donc les mêmes vérifications d'appartenance.
+    """
+    setattr(user, MEMBERSHIP_CACHE_ATTR, set())
+    try:
+        yield
+    finally:
+        delattr(user, MEMBERSHIP_CACHE_ATTR)
+
+
+def clear_membership_cache(user):
+    """
+    Vide le cache partagé après une modification des contributeurs.
+    """
+    cache = getattr(user, MEMBERSHIP_CACHE_ATTR, None)
+    if cache is not None:
+        cache.clear()
+
+
+def member_project_ids(user, project_ids) -> set:
+    """
+    Sous-ensemble des projets dont l'utilisateur est membre, en une seule requête.
+    Sert aux vérifications groupées (récupération par lot d'identifiants).
+    """
+    return set(
+        Contributor.objects.filter(user=user, project_id__in=project_ids).values_list("project_id", flat=True)
+    )
 
 
 class IsProjectAuthorOrReadOnly(BasePermission):
@@ -31,6 +84,9 @@ class IsProjectAuthorOrReadOnly(BasePermission):
             # L'auteur peut toujours lire son projet
             if obj.author_id == request.user.id:
                 return True
+            # Rôle déjà annoté par ProjectQuerySet : pas de requête supplémentaire
+            if hasattr(obj, "member_role"):
+                return obj.member_role is not None
             # Sinon, il faut être contributeur du projet
             return Contributor.objects.filter(project=obj, user=request.user).exists()
         # Pour écrire, il faut être l'auteur
@@ -63,8 +119,10 @@ class IsProjectContributor(BasePermission):
     - POST : l'utilisateur doit être contributeur du projet ciblé.
       * Issue : 'project' dans le body ou la query.
       * Comment : 'issue' dans le body ou la query, puis on déduit le projet.
-    - Détail (retrieve/update/partial_update/destroy) :
+    - Détail (retrieve/update/partial_update/destroy, actions comme /attachments/) :
       vérification via l'objet manipulé (has_object_permission).
+    - Routes imbriquées (/projects/{id}/...) : l'appartenance a déjà été
+      vérifiée une fois par la vue, aucune requête supplémentaire.
     """
     def has_permission(self, request, view):
         user = request.user
@@ -72,12 +130,19 @@ class IsProjectContributor(BasePermission):
         if not (user and user.is_authenticated):
             return False
 
+        # Route imbriquée : projet déjà résolu et autorisé par la vue (ProjectScopedMixin)
+        if getattr(view, "project", None) is not None:
+            return True
+
         # Lecture générale autorisée si authentifié
         if request.method in SAFE_METHODS:
             return True
 
         # Sur les actions "detail", on délègue à has_object_permission
-        if getattr(view, "action", None) in ("retrieve", "update", "partial_update", "destroy"):
+        # (le corps n'est pas lu : l'envoi d'une pièce jointe reste un flux brut)
+        if getattr(view, "detail", False) or getattr(view, "action", None) in (
+            "retrieve", "update", "partial_update", "destroy"
+        ):
             return True
 
         # Création (POST) : contrôler l'appartenance au projet
@@ -91,10 +156,11 @@ class IsProjectContributor(BasePermission):
             # On récupère l'issue puis on déduit le projet
             issue_id = request.data.get("issue") or request.query_params.get("issue")
             if issue_id:
-                try:
-                    project_id = Issue.objects.only("project_id").get(pk=issue_id).project_id
-                except Issue.DoesNotExist:
-                    return False
+                # Issue éventuellement archivée : elle sera restaurée par la vue
+                project_id = (
+                    Issue.objects.filter(pk=issue_id).values_list("project_id", flat=True).first()
+                    or ArchivedIssue.objects.filter(pk=issue_id).values_list("project_id", flat=True).first()
+                )
 
         # Autorisé uniquement si l'utilisateur est contributeur du projet ciblé
         return bool(project_id) and is_contributor(user, project_id)
@@ -103,13 +169,19 @@ class IsProjectContributor(BasePermission):
         """
         Vérifie l'appartenance au projet à partir de l'objet (Issue/Comment/Project).
         """
+        # Route imbriquée : le queryset est déjà restreint au projet autorisé
+        if getattr(view, "project", None) is not None:
+            return True
+
         # Déduction du project_id selon le type de l'objet
-        if isinstance(obj, Issue):
+        if isinstance(obj, (Issue, ArchivedIssue)):
             project_id = obj.project_id
-        elif isinstance(obj, Comment):
+        elif isinstance(obj, (Comment, ArchivedComment)):
             project_id = obj.issue.project_id
         elif isinstance(obj, Project):
             project_id = obj.id
+        elif isinstance(obj, (Attachment, IssueLink)):
+            project_id = obj.project_id
         else:
             project = getattr(obj, "project", None)
             project_id = getattr(project, "id", None)
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Project, Contributor, Issue, Comment
+from django.db import transaction
+from .models import Project, Contributor, Issue, Comment, ArchivedIssue, Activity, Attachment, IssueLink
+from .links import creates_blocking_cycle
+from .permissions import is_contributor
 
 User = get_user_model()
 
@@ -15,27 +18,45 @@ class SimpleUserSerializer(serializers.ModelSerializer):
         fields = ("id", "username", "email")
 
 
+class MemberSerializer(serializers.ModelSerializer):
+    """
+    Membre d'un projet pour l'autocomplétion de l'assigné (voir directory.py).
+    """
+    class Meta:
+        model = User
+        fields = ("id", "username", "first_name", "last_name")
+
+
 class ProjectSerializer(serializers.ModelSerializer):
     """
     Sérialiseur de projet.
     - L'auteur est en lecture seule et renvoyé via SimpleUserSerializer.
     - À la création, on associe automatiquement le créateur comme AUTHOR dans Contributor.
+    - role / issue_count proviennent des annotations de ProjectQuerySet
+      (rôle de l'utilisateur courant, nombre d'issues du projet).
     """
     author = SimpleUserSerializer(read_only=True)
+    role = serializers.CharField(source="member_role", read_only=True, allow_null=True)
+    issue_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Project
-        fields = ("id", "name", "description", "type", "author", "created_at")
+        fields = ("id", "name", "description", "type", "author", "role", "issue_count", "created_at")
         read_only_fields = ("id", "author", "created_at")
 
+    @transaction.atomic
     def create(self, validated_data):
         """
         Crée un projet avec l'utilisateur courant comme auteur.
-        Ajoute également une entrée Contributor avec le rôle AUTHOR.
+        Ajoute également une entrée Contributor avec le rôle AUTHOR,
+        dans la même transaction : la liste des projets repose sur cette entrée.
         """
         request = self.context.get("request")
         project = Project.objects.create(author=request.user, **validated_data)
         Contributor.objects.create(user=request.user, project=project, role=Contributor.ROLE_AUTHOR)
+        # Mêmes annotations que ProjectQuerySet.for_member
+        project.member_role = Contributor.ROLE_AUTHOR
+        project.issue_count = 0
         return project
 
 
@@ -70,30 +91,47 @@ class IssueSerializer(serializers.ModelSerializer):
     Sérialiseur d'issue.
     - L'auteur est toujours le request.user et reste en lecture seule côté client.
     - Valide que le créateur et l'assigné appartiennent au projet ciblé.
+    - Sur les routes imbriquées, le projet vient du contexte (URL) et n'est pas modifiable.
     """
     author = serializers.ReadOnlyField(source="author.id")
+    # Vrai pour une issue servie depuis l'archive (?include_archived=1)
+    archived = serializers.BooleanField(source="is_archived", read_only=True)
 
     class Meta:
         model = Issue
         fields = [
             "id", "title", "description", "tag", "priority", "status",
-            "project", "author", "assignee", "created_at", "updated_at"
+            "priority_rank", "status_rank",
+            "project", "author", "assignee", "archived", "created_at", "updated_at"
         ]
-        read_only_fields = ["id", "author", "created_at", "updated_at"]
+        read_only_fields = ["id", "author", "priority_rank", "status_rank", "archived", "created_at", "updated_at"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("project") is not None:
+            fields["project"].read_only = True
+        return fields
 
     def validate(self, attrs):
         """
         Règles de validation :
-        - Le demandeur doit être contributeur du projet.
+        - Le demandeur doit être contributeur du projet
+          (déjà vérifié par la vue si le projet vient de l'URL).
         - L'assigné doit aussi être contributeur du même projet.
         """
         request = self.context["request"]
+        scoped_project = self.context.get("project")
+        if scoped_project is not None:
+            attrs["project"] = scoped_project
         project = attrs.get("project") or (self.instance and self.instance.project)
         project_id = project.id if project else None
         assignee = attrs.get("assignee") or (self.instance and self.instance.assignee)
 
         # L'utilisateur courant doit appartenir au projet
-        if project_id and not Contributor.objects.filter(user=request.user, project_id=project_id).exists():
+        if (
+            scoped_project is None and project_id
+            and not is_contributor(request.user, project_id)
+        ):
             raise serializers.ValidationError("You must be a contributor of this project.")
 
         # L'assigné doit appartenir au même projet
@@ -114,22 +152,36 @@ class CommentSerializer(serializers.ModelSerializer):
     Sérialiseur de commentaire.
     - L'auteur est imposé côté serveur.
     - Vérifie que l'utilisateur qui commente est bien contributeur du projet de l'issue.
+    - Sur les routes imbriquées, l'issue vient du contexte (URL) et n'est pas modifiable.
     """
     author = serializers.ReadOnlyField(source="author.id")
+    archived = serializers.BooleanField(source="is_archived", read_only=True)
 
     class Meta:
         model = Comment
-        fields = ["id", "issue", "author", "description", "created_at", "updated_at"]
-        read_only_fields = ["id", "author", "created_at", "updated_at"]
+        fields = ["id", "issue", "author", "description", "archived", "created_at", "updated_at"]
+        read_only_fields = ["id", "author", "archived", "created_at", "updated_at"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("issue") is not None:
+            fields["issue"].read_only = True
+        return fields
 
     def validate(self, attrs):
         """
         Refuse la création/modification si l'utilisateur n'est pas contributeur
         du projet auquel appartient l'issue ciblée.
+        Sur une route imbriquée, l'appartenance a déjà été vérifiée par la vue.
         """
+        scoped_issue = self.context.get("issue")
+        if scoped_issue is not None:
+            attrs["issue"] = scoped_issue
+            return attrs
+
         request = self.context["request"]
         issue = attrs.get("issue") or (self.instance and self.instance.issue)
-        if issue and not Contributor.objects.filter(user=request.user, project=issue.project).exists():
+        if issue and not is_contributor(request.user, issue.project_id):
             raise serializers.ValidationError("You must be a contributor of this project.")
         return attrs
 
@@ -139,3 +191,109 @@ class CommentSerializer(serializers.ModelSerializer):
         """
         validated_data["author"] = self.context["request"].user
         return super().create(validated_data)
+
+
+class IssueWithCommentsSerializer(IssueSerializer):
+    """
+    Issue enrichie pour les tableaux (?include=latest_comments:N) :
+    - comment_count : nombre total de commentaires ;
+    - latest_comments : les N derniers commentaires, du plus ancien au plus récent.
+    Les données sont préchargées par la vue pour toute la page
+    (context["latest_comments"] : {issue_id: (total, [commentaires])}).
+    """
+    comment_count = serializers.SerializerMethodField()
+    latest_comments = serializers.SerializerMethodField()
+
+    class Meta(IssueSerializer.Meta):
+        fields = IssueSerializer.Meta.fields + ["comment_count", "latest_comments"]
+
+    def get_comment_count(self, obj):
+        return self.context["latest_comments"].get(obj.pk, (0, []))[0]
+
+    def get_latest_comments(self, obj):
+        comments = self.context["latest_comments"].get(obj.pk, (0, []))[1]
+        return CommentSerializer(comments, many=True, context=self.context).data
+
+
+class ActivitySerializer(serializers.ModelSerializer):
+    """
+    Entrée du journal d'activité (lecture seule).
+    changes : {"champ": [ancienne valeur, nouvelle valeur]} ; None pour un champ
+    texte modifié (contenu non conservé).
+    """
+    actor = SimpleUserSerializer(read_only=True, allow_null=True)
+    issue = serializers.IntegerField(source="issue_id", read_only=True, allow_null=True)
+    target = serializers.IntegerField(source="target_id", read_only=True)
+
+    class Meta:
+        model = Activity
+        fields = ("id", "verb", "project", "issue", "target", "actor", "changes", "created_at")
+        read_only_fields = fields
+
+
+class AttachmentSerializer(serializers.ModelSerializer):
+    """
+    Pièce jointe (lecture seule : l'envoi se fait par le corps brut de la requête).
+    download_url : téléchargement, avec prise en charge des requêtes Range.
+    """
+    author = SimpleUserSerializer(read_only=True, allow_null=True)
+    issue = serializers.IntegerField(source="issue_id", read_only=True)
+    comment = serializers.IntegerField(source="comment_id", read_only=True, allow_null=True)
+    size = serializers.IntegerField(source="blob.size", read_only=True)
+    sha256 = serializers.CharField(source="blob.sha256", read_only=True)
+    download_url = serializers.HyperlinkedIdentityField(view_name="attachment-download")
+
+    class Meta:
+        model = Attachment
+        fields = (
+            "id", "project", "issue", "comment", "filename", "content_type", "size", "sha256",
+            "author", "download_url", "created_at",
+        )
+        read_only_fields = fields
+
+
+class IssueLinkSerializer(serializers.ModelSerializer):
+    """
+    Lien entre deux issues (voir IssueLink).
+    À la création, la source est l'issue de l'URL (context["source"]) :
+    POST /issues/{id}/links/ {"target": 12, "kind": "BLOCKS"}.
+    - La cible doit appartenir au même projet (issue vivante ou archivée).
+    - Un lien BLOCKS qui fermerait un cycle de blocage est refusé.
+    """
+    author = serializers.ReadOnlyField(source="author_id")
+    source = serializers.IntegerField(source="source_id", read_only=True)
+    target = serializers.IntegerField(source="target_id")
+
+    class Meta:
+        model = IssueLink
+        fields = ("id", "project", "source", "target", "kind", "author", "created_at")
+        read_only_fields = ("id", "project", "source", "author", "created_at")
+        # Unicité vérifiée dans validate() (après normalisation des liens RELATES)
+        validators = []
+
+    def validate(self, attrs):
+        source = self.context["source"]
+        source_id, target_id, kind = source.pk, attrs["target_id"], attrs["kind"]
+        if target_id == source_id:
+            raise serializers.ValidationError({"target": "Une issue ne peut pas être liée à elle-même."})
+        in_project = (
+            Issue.objects.filter(pk=target_id, project_id=source.project_id).exists()
+            or ArchivedIssue.objects.filter(pk=target_id, project_id=source.project_id).exists()
+        )
+        if not in_project:
+            raise serializers.ValidationError({"target": "Issue introuvable dans ce projet."})
+
+        # Lien non orienté : un seul enregistrement pour les deux sens
+        if kind == IssueLink.Kind.RELATES:
+            source_id, target_id = sorted((source_id, target_id))
+        if IssueLink.objects.filter(source_id=source_id, target_id=target_id, kind=kind).exists():
+            raise serializers.ValidationError("Ce lien existe déjà.")
+        if kind == IssueLink.Kind.BLOCKS and creates_blocking_cycle(source_id, target_id):
+            raise serializers.ValidationError({"target": "Ce lien créerait un cycle de blocage."})
+
+        attrs.update(project_id=source.project_id, source_id=source_id, target_id=target_id)
+        return attrs
+
+    def create(self, validated_data):
+        validated_data["author"] = self.context["request"].user
+        return super().create(validated_data)
@@ -1,3 +1,808 @@
-from django.test import TestCase
+import cProfile
+import gzip
+import json
+import shutil
+import sqlite3
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError
+from django.http import FileResponse
+from django.test import override_settings
+from django.utils import timezone
+from drf_spectacular.drainage import GENERATOR_STATS
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from softdesk import admin as large_admin, schema
+from softdesk.profiling import ProfileStore
+from softdesk.throttling import ProjectBucketThrottle, SQLiteBucketStore, UserBucketThrottle
+
+from . import activity
+from .admin import IssueAdmin
+from .archive import archive_issues
+from .attachments import blob_path, create_attachment
+from .deletion import purge_issue, purge_project, purge_user
+from .importer import ImportState
+from .models import (
+    Activity, ArchivedComment, ArchivedIssue, Attachment, AttachmentBlob, Comment, Contributor, ImportedIssue, Issue,
+    IssueLink, Project,
+)
+from .views import IssueViewSet, ProjectIssueViewSet
+
+User = get_user_model()
+
+
+# Seaux en mémoire : les tests ne partagent pas le fichier de seaux (var/) du serveur
+@override_settings(SOFTDESK_THROTTLE_STORE=":memory:")
+class SoftDeskTestCase(APITestCase):
+    """
+    Projet de alice (auteur), avec bob comme contributeur ; carol n'est pas membre.
+    Six issues créées par alice et assignées à bob, trois commentaires de bob chacune.
+    """
+    def setUp(self):
+        self.alice = User.objects.create_user("alice", password="pw123456!")
+        self.bob = User.objects.create_user("bob", password="pw123456!")
+        self.carol = User.objects.create_user("carol", password="pw123456!")
+        self.project = Project.objects.create(name="P1", type=Project.BACKEND, author=self.alice)
+        Contributor.objects.create(user=self.alice, project=self.project, role=Contributor.ROLE_AUTHOR)
+        Contributor.objects.create(user=self.bob, project=self.project)
+        self.issues = [
+            Issue.objects.create(title=f"Issue {index}", project=self.project, author=self.alice, assignee=self.bob)
+            for index in range(6)
+        ]
+        for issue in self.issues:
+            for index in range(3):
+                Comment.objects.create(issue=issue, author=self.bob, description=f"Commentaire {index}")
+        self.client.force_authenticate(self.alice)
+
+
+class AttachmentStorageMixin:
+    """
+    Stockage des pièces jointes dans un répertoire temporaire propre à chaque test.
+    """
+    def setUp(self):
+        super().setUp()
+        self.storage = Path(tempfile.mkdtemp(prefix="softdesk-attachments-"))
+        self.addCleanup(shutil.rmtree, self.storage, ignore_errors=True)
+        override = override_settings(SOFTDESK_ATTACHMENTS_DIR=self.storage)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def attach(self, issue, data, comment=None, filename="app.log"):
+        return create_attachment(
+            _Stream(data), project_id=issue.project_id, issue_id=issue.pk,
+            comment_id=comment.pk if comment else None, filename=filename, author=self.bob,
+        )
+
+    def stored_files(self):
+        return [path for path in self.storage.rglob("*") if path.is_file()]
+
+
+class _Stream:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, size):
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+class PurgeTests(AttachmentStorageMixin, SoftDeskTestCase):
+    def test_purge_project_removes_dependencies_in_batches(self):
+        progress = []
+        counts = purge_project(self.project.pk, batch_size=4, on_progress=lambda label, total: progress.append(label))
+        self.assertEqual(counts["comments"], 18)
+        self.assertEqual(counts["issues"], 6)
+        self.assertEqual(counts["project"], 1)
+        self.assertEqual(progress.count("comments"), 5)
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(Contributor.objects.exists())
+
+    def test_purge_user_keeps_other_projects(self):
+        other = Project.objects.create(name="P2", type=Project.IOS, author=self.carol)
+        Contributor.objects.create(user=self.carol, project=other, role=Contributor.ROLE_AUTHOR)
+        Issue.objects.create(title="Autre", project=other, author=self.carol, assignee=self.carol)
+        purge_user(self.bob.pk)
+        self.assertFalse(User.objects.filter(pk=self.bob.pk).exists())
+        self.assertFalse(Comment.objects.exists())
+        # Issues assignées à bob supprimées, projets d'alice et carol conservés
+        self.assertEqual(list(Issue.objects.values_list("title", flat=True)), ["Autre"])
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_shared_content_survives_issue_purge(self):
+        self.attach(self.issues[0], b"journal")
+        kept = self.attach(self.issues[1], b"journal")
+        counts = purge_issue(self.issues[0].pk)
+        self.assertEqual(counts["attachments"], 1)
+        self.assertEqual(counts["blobs"], 0)
+        self.assertTrue(blob_path(kept.blob.sha256).exists())
+
+    def test_issue_purge_only_checks_its_own_contents(self):
+        self.attach(self.issues[0], b"journal")
+        stray = self.attach(self.issues[1], b"capture")
+        # Orphelin laissé par ailleurs : hors du périmètre d'une purge d'issue
+        Attachment.objects.filter(pk=stray.pk)._raw_delete("default")
+        counts = purge_issue(self.issues[0].pk)
+        self.assertEqual(counts["blobs"], 1)
+        self.assertEqual(list(AttachmentBlob.objects.all()), [stray.blob])
+
+    def test_interrupted_purge_removes_orphan_contents_on_rerun(self):
+        self.attach(self.issues[0], b"journal")
+        self.attach(self.issues[1], b"capture", comment=self.issues[1].comments.first())
+        # Purge interrompue juste après la suppression des pièces jointes
+        Attachment.objects.filter(project=self.project)._raw_delete("default")
+        self.assertEqual(len(self.stored_files()), 2)
+
+        # Relevé avant suppression : les contenus déjà détachés ne sont plus vus
+        self.assertEqual(purge_issue(self.issues[0].pk)["blobs"], 0)
+        # La commande balaye la table
+        call_command("purge", "--project", str(self.project.pk), stdout=StringIO())
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+
+def throttle_settings(**rates):
+    """
+    REST_FRAMEWORK avec les taux de test (les throttles ne sont actifs qu'en production).
+    """
+    return {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {**settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], **rates},
+    }
+
+
+@mock.patch.object(IssueViewSet, "throttle_classes", [UserBucketThrottle, ProjectBucketThrottle])
+@mock.patch.object(ProjectIssueViewSet, "throttle_classes", [UserBucketThrottle, ProjectBucketThrottle])
+class ThrottleTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        # Seaux neufs pour chaque test
+        store = Path(tempfile.mkdtemp(prefix="softdesk-throttle-"))
+        self.addCleanup(shutil.rmtree, store, ignore_errors=True)
+        override = override_settings(
+            REST_FRAMEWORK=throttle_settings(project_read="2/min", user_read="100/min", login="2/min"),
+            SOFTDESK_THROTTLE_STORE=store / "buckets.sqlite3",
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get_issues(self, user, query):
+        self.client.force_authenticate(user)
+        return self.client.get(f"/api/v1/issues/?{query}").status_code
+
+    def test_store_refuses_when_empty_and_reports_wait(self):
+        store = SQLiteBucketStore(":memory:")
+        self.assertEqual(store.consume("k", 2, 1.0, now=100.0), (True, 0.0))
+        self.assertEqual(store.consume("k", 2, 1.0, now=100.0), (True, 0.0))
+        allowed, wait = store.consume("k", 2, 1.0, now=100.5)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 0.5)
+
+    def test_locked_store_lets_requests_through(self):
+        locked = sqlite3.OperationalError("database is locked")
+        with mock.patch.object(SQLiteBucketStore, "consume", side_effect=locked), \
+                self.assertLogs("softdesk.throttling", "WARNING"):
+            statuses = [self.get_issues(self.alice, f"project={self.project.pk}") for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 200])
+
+    def test_store_waits_briefly_for_a_lock(self):
+        path = Path(settings.SOFTDESK_THROTTLE_STORE)
+        store = SQLiteBucketStore(path)
+        store.consume("k", 2, 1.0)
+        holder = sqlite3.connect(path, isolation_level=None)
+        self.addCleanup(holder.close)
+        holder.execute("BEGIN IMMEDIATE")
+        with self.assertRaises(sqlite3.OperationalError):
+            store.consume("k", 2, 1.0)
+        holder.execute("ROLLBACK")
+        self.assertTrue(store.consume("k", 2, 1.0)[0])
+
+    def test_members_share_the_project_bucket(self):
+        query = f"project={self.project.pk}"
+        self.assertEqual(self.get_issues(self.alice, query), 200)
+        self.assertEqual(self.get_issues(self.bob, query), 200)
+        self.assertEqual(self.get_issues(self.alice, query), 429)
+
+    def test_non_members_do_not_spend_the_project_bucket(self):
+        for _ in range(5):
+            self.assertEqual(self.get_issues(self.carol, f"project={self.project.pk}"), 200)
+        self.assertEqual(self.get_issues(self.alice, f"project={self.project.pk}"), 200)
+
+    def test_nested_routes_use_the_resolved_project(self):
+        self.client.force_authenticate(self.bob)
+        url = f"/api/v1/projects/{self.project.pk}/issues/"
+        self.assertEqual([self.client.get(url).status_code for _ in range(3)], [200, 200, 429])
+
+    def test_non_numeric_project_has_no_bucket(self):
+        request = mock.Mock(user=self.alice, query_params={"project": "x' OR 1"})
+        view = mock.Mock(kwargs={}, basename="issue", project=None)
+        self.assertIsNone(ProjectBucketThrottle().get_bucket_key(request, view))
+
+    def test_login_bucket_per_ip(self):
+        self.client.force_authenticate(None)
+        codes = [
+            self.client.post("/api/v1/auth/login", {"username": "alice", "password": "x"}).status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(codes, [401, 401, 429])
+
+
+class CompressionTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        Issue.objects.update(description="lorem ipsum " * 200)
+
+    def test_large_responses_are_gzipped(self):
+        response = self.client.get("/api/v1/issues/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(gzip.decompress(response.content))["count"], 6)
+
+    def test_token_routes_are_never_compressed(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            "/api/v1/auth/login", {"username": "alice", "password": "pw123456!"}, HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_batch_refuses_token_routes(self):
+        response = self.client.post("/api/v1/batch", {"requests": [
+            {"method": "POST", "path": "/api/v1/auth/login", "body": {"username": "alice", "password": "pw123456!"}},
+            {"method": "POST", "path": "/api/v1/auth/token/refresh", "body": {"refresh": "x"}},
+            {"method": "GET", "path": "/api/v1/issues/"},
+        ]}, format="json", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        responses = json.loads(gzip.decompress(response.content))["responses"]
+        self.assertEqual([entry["status"] for entry in responses], [400, 400, 200])
+        self.assertNotIn("access", json.dumps(responses[0]))
+
+
+class InboxTests(SoftDeskTestCase):
+    def test_cursor_pages_are_stable_with_equal_timestamps(self):
+        # Issues importées en masse : même updated_at
+        Issue.objects.bulk_create([
+            Issue(title=f"Import {index}", project=self.project, author=self.alice, assignee=self.bob)
+            for index in range(20)
+        ])
+        Issue.objects.update(updated_at=Issue.objects.first().updated_at)
+        self.client.force_authenticate(self.bob)
+
+        seen, url = [], "/api/v1/inbox/?page_size=4"
+        while url:
+            page = self.client.get(url).data
+            seen += [issue["id"] for issue in page["results"]]
+            url = page["next"]
+        self.assertEqual(len(seen), 26)
+        self.assertEqual(seen, sorted(Issue.objects.values_list("pk", flat=True), reverse=True))
+
+    def test_counts_by_box(self):
+        Issue.objects.filter(pk=self.issues[0].pk).update(status=Issue.Status.DONE)
+        self.client.force_authenticate(self.bob)
+        counts = self.client.get("/api/v1/inbox/counts/").data
+        self.assertEqual(counts["assigned"]["open"], 5)
+        self.assertEqual(counts["assigned"]["by_status"]["DONE"], 1)
+        self.assertEqual(counts["authored"]["open"], 0)
+
+
+class FacetTests(SoftDeskTestCase):
+    def test_each_facet_is_counted_on_its_own(self):
+        first = self.issues[0]
+        first.assignee, first.status = self.alice, Issue.Status.DONE
+        first.save()
+        response = self.client.get(f"/api/v1/issues/?project={self.project.pk}&facets=status,assignee")
+        facets = response.json()["facets"]
+        self.assertEqual(facets["status"], {"TODO": 5, "IN_PROGRESS": 0, "DONE": 1})
+        self.assertEqual(facets["assignee"], {str(self.alice.pk): 1, str(self.bob.pk): 5})
+
+
+class BatchTests(AttachmentStorageMixin, SoftDeskTestCase):
+    def batch(self, operations, atomic=False):
+        response = self.client.post("/api/v1/batch", {"atomic": atomic, "requests": operations}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["responses"]
+
+    def test_sub_requests_share_authentication(self):
+        responses = self.batch([
+            {"method": "POST", "path": "/api/v1/issues/",
+             "body": {"title": "Lot", "project": self.project.pk, "assignee": self.bob.pk}},
+            {"method": "GET", "path": f"/api/v1/projects/{self.project.pk}/issues/"},
+            {"method": "DELETE", "path": f"/api/v1/comments/{self.issues[0].comments.first().pk}/"},
+            {"method": "GET", "path": "/api/v1/nope/"},
+        ])
+        self.assertEqual([entry["status"] for entry in responses], [201, 200, 403, 404])
+        self.assertEqual(responses[1]["body"]["count"], 7)
+
+    def test_atomic_batch_rolls_back(self):
+        responses = self.batch([
+            {"method": "POST", "path": "/api/v1/issues/",
+             "body": {"title": "Lot", "project": self.project.pk, "assignee": self.bob.pk}},
+            {"method": "PATCH", "path": "/api/v1/issues/999999/", "body": {"title": "x"}},
+            {"method": "GET", "path": "/api/v1/issues/"},
+        ], atomic=True)
+        self.assertEqual([entry["status"] for entry in responses], [201, 404, 424])
+        self.assertEqual(Issue.objects.count(), 6)
+
+    def test_sub_request_exception_does_not_abort_the_batch(self):
+        operations = [
+            {"method": "POST", "path": "/api/v1/issues/",
+             "body": {"title": "Lot", "project": self.project.pk, "assignee": self.bob.pk}},
+            {"method": "GET", "path": "/api/v1/issues/?project=abc"},
+            {"method": "GET", "path": f"/api/v1/projects/{self.project.pk}/"},
+        ]
+        with self.assertLogs("softdesk.batch", "ERROR"):
+            responses = self.batch(operations)
+        self.assertEqual([entry["status"] for entry in responses], [201, 500, 200])
+        self.assertEqual(Issue.objects.count(), 7)
+
+        with self.assertLogs("softdesk.batch", "ERROR"):
+            responses = self.batch(operations, atomic=True)
+        self.assertEqual([entry["status"] for entry in responses], [201, 500, 424])
+        self.assertEqual(Issue.objects.count(), 7)
+
+    def test_streamed_download_is_refused_and_closed(self):
+        attachment = self.attach(self.issues[0], b"journal")
+        original_close = FileResponse.close
+        with mock.patch.object(FileResponse, "close", autospec=True, side_effect=original_close) as close:
+            responses = self.batch([
+                {"method": "GET", "path": f"/api/v1/attachments/{attachment.pk}/download/"},
+                {"method": "GET", "path": f"/api/v1/attachments/{attachment.pk}/"},
+            ])
+        self.assertEqual([entry["status"] for entry in responses], [400, 200])
+        close.assert_called_once()
+
+
+class ImportTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = Path(tempfile.mkdtemp(prefix="softdesk-import-"))
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        records = [
+            {"external_id": f"X{index}", "project": "P1", "author": "alice", "assignee": "bob",
+             "title": f"Importée {index}", "priority": "high", "created_at": "2019-01-02T03:04:05"}
+            for index in range(25)
+        ]
+        records += [
+            {"external_id": "X1", "project": "P1", "author": "alice", "assignee": "bob", "title": "Doublon"},
+            {"external_id": "Y", "project": "P1", "author": "carol", "assignee": "bob", "title": "Non membre"},
+        ]
+        self.issues_file = self.directory / "issues.jsonl"
+        self.issues_file.write_text("\n".join(json.dumps(record) for record in records) + "\nnot json\n")
+        self.comments_file = self.directory / "comments.jsonl"
+        self.comments_file.write_text("\n".join(
+            json.dumps({"issue": f"X{index}", "author": "bob", "description": f"Commentaire {index}"})
+            for index in range(12)
+        ))
+
+    def run_import(self, kind, path, *args):
+        call_command("import_tracker", kind, str(path), "--batch-size", "10", *args, stdout=StringIO())
+
+    def imported_issues(self):
+        return Issue.objects.filter(title__startswith="Importée")
+
+    def test_import_rejects_invalid_rows_and_keeps_dates(self):
+        rejects = self.directory / "rejects.jsonl"
+        self.run_import("issues", self.issues_file, "--rejects", str(rejects))
+        self.assertEqual(self.imported_issues().count(), 25)
+        self.assertEqual(len(rejects.read_text().splitlines()), 3)
+        issue = Issue.objects.get(title="Importée 1")
+        self.assertEqual(issue.priority_rank, 1)
+        self.assertEqual(issue.created_at.year, 2019)
+
+    def test_rerun_after_completion_creates_nothing(self):
+        self.run_import("issues", self.issues_file)
+        self.run_import("issues", self.issues_file)
+        self.assertEqual(self.imported_issues().count(), 25)
+
+    def test_crash_before_checkpoint_does_not_duplicate(self):
+        original = ImportState.save_batch
+        calls = []
+
+        def crash_on_second_batch(state, *args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OperationalError("disk I/O error")
+            return original(state, *args, **kwargs)
+
+        for kind, path, model, expected in (
+            ("issues", self.issues_file, Issue, 6 + 25),
+            ("comments", self.comments_file, Comment, 18 + 12),
+        ):
+            calls.clear()
+            with mock.patch.object(ImportState, "save_batch", crash_on_second_batch):
+                with self.assertRaises(OperationalError):
+                    self.run_import(kind, path)
+            # Le second lot est annulé avec son point de reprise
+            self.assertEqual(model.objects.count(), expected - (25 if kind == "issues" else 12) + 10)
+            self.run_import(kind, path)
+            self.assertEqual(model.objects.count(), expected)
+
+        comment = Comment.objects.get(description="Commentaire 3")
+        self.assertEqual(comment.issue.title, "Importée 3")
+
+    def test_comments_of_purged_or_archived_issues_are_rejected_per_row(self):
+        self.run_import("issues", self.issues_file)
+        purge_issue(Issue.objects.get(title="Importée 0").pk)
+        Issue.objects.filter(title="Importée 1").update(
+            status=Issue.Status.DONE, updated_at=timezone.now() - timedelta(days=365)
+        )
+        archive_issues()
+        self.assertFalse(ImportedIssue.objects.filter(external_id="X0").exists())
+
+        rejects = self.directory / "rejects.jsonl"
+        self.run_import("comments", self.comments_file, "--rejects", str(rejects))
+        self.assertEqual(Comment.objects.filter(description__startswith="Commentaire ").count(), 18 + 10)
+        self.assertEqual(len(rejects.read_text().splitlines()), 2)
+        # L'issue archivée reste connue (pas de doublon), l'issue purgée peut être réimportée
+        again = self.directory / "again.jsonl"
+        again.write_text("\n".join(
+            json.dumps({"external_id": ext, "project": "P1", "author": "alice", "assignee": "bob", "title": ext})
+            for ext in ("X0", "X1")
+        ))
+        self.run_import("issues", again)
+        self.assertEqual(list(Issue.objects.filter(title__in=["X0", "X1"]).values_list("title", flat=True)), ["X0"])
+
+    def test_project_purge_removes_import_mappings(self):
+        self.run_import("issues", self.issues_file)
+        purge_project(self.project.pk)
+        self.assertFalse(ImportedIssue.objects.exists())
+
+
+
+class ActivityTests(SoftDeskTestCase):
+    def entry(self, project_id=None, actor=None, target_id=1):
+        return Activity(
+            verb=Activity.Verb.ISSUE_UPDATED, project_id=project_id or self.project.pk, target_id=target_id,
+            actor_id=(actor or self.alice).pk,
+        )
+
+    def flush(self, *entries):
+        buffer = activity.ActivityBuffer()
+        for entry in entries:
+            buffer.append(entry)
+        return buffer.flush()
+
+    def test_entries_of_purged_projects_and_users_do_not_drop_the_others(self):
+        other = Project.objects.create(name="P2", type=Project.IOS, author=self.carol)
+        gone_project = self.entry(project_id=other.pk)
+        gone_actor = self.entry(actor=self.carol, target_id=2)
+        purge_project(other.pk)
+        self.carol.delete()
+        self.assertEqual(self.flush(self.entry(), gone_project, gone_actor), 2)
+        self.assertEqual(list(Activity.objects.order_by("target_id").values_list("actor_id", flat=True)),
+                         [self.alice.pk, None])
+
+    def test_failing_batch_only_loses_its_own_entries(self):
+        broken = self.entry(target_id=None)
+        with override_settings(SOFTDESK_ACTIVITY={"BATCH_SIZE": 1}), self.assertLogs("projects_app.activity"):
+            written = self.flush(self.entry(), broken, self.entry(target_id=3))
+        self.assertEqual(written, 2)
+        self.assertEqual(Activity.objects.count(), 2)
+
+class ArchiveTests(SoftDeskTestCase):
+    """
+    L'issue 0 est terminée depuis un an, puis archivée avec ses commentaires.
+    """
+    def setUp(self):
+        super().setUp()
+        self.issue = self.issues[0]
+        Issue.objects.filter(pk=self.issue.pk).update(
+            status=Issue.Status.DONE, updated_at=timezone.now() - timedelta(days=365)
+        )
+        self.assertEqual(archive_issues(), {"issues": 1, "comments": 3})
+
+    def test_comments_are_copied_in_bounded_chunks(self):
+        Issue.objects.filter(pk__in=[issue.pk for issue in self.issues[1:4]]).update(
+            status=Issue.Status.DONE, updated_at=timezone.now() - timedelta(days=365)
+        )
+        expected = list(Comment.objects.filter(issue_id__in=[issue.pk for issue in self.issues[1:4]]).values_list(
+            "pk", "issue_id", "author_id", "description", "created_at"
+        ).order_by("pk"))
+        # 2 issues par lot, 9 commentaires copiés par tranches de 2 lignes
+        self.assertEqual(archive_issues(batch_size=2), {"issues": 3, "comments": 9})
+        archived = list(ArchivedComment.objects.exclude(issue_id=self.issue.pk).values_list(
+            "pk", "issue_id", "author_id", "description", "created_at"
+        ).order_by("pk"))
+        self.assertEqual(archived, expected)
+
+    def assertArchived(self):
+        self.assertTrue(ArchivedIssue.objects.filter(pk=self.issue.pk).exists())
+        self.assertFalse(Issue.objects.filter(pk=self.issue.pk).exists())
+        self.assertEqual(ArchivedComment.objects.filter(issue_id=self.issue.pk).count(), 3)
+
+    def test_archived_issue_is_read_on_request(self):
+        self.assertEqual(self.client.get(f"/api/v1/issues/{self.issue.pk}/").status_code, 404)
+        response = self.client.get(f"/api/v1/issues/{self.issue.pk}/?include_archived=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["archived"])
+        response = self.client.get(f"/api/v1/issues/?project={self.project.pk}&include_archived=1")
+        self.assertEqual(response.data["count"], 6)
+        self.assertArchived()
+
+    def test_invalid_write_does_not_restore(self):
+        response = self.client.patch(f"/api/v1/issues/{self.issue.pk}/", {"assignee": self.carol.pk}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/v1/comments/", {"issue": self.issue.pk}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            f"/api/v1/projects/{self.project.pk}/issues/{self.issue.pk}/comments/", {}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertArchived()
+
+    def test_forbidden_write_does_not_restore(self):
+        # Commentaire de bob, sur la route imbriquée (issue résolue avant les permissions)
+        comment = ArchivedComment.objects.filter(issue_id=self.issue.pk).first()
+        response = self.client.patch(
+            f"/api/v1/projects/{self.project.pk}/issues/{self.issue.pk}/comments/{comment.pk}/",
+            {"description": "x"}, format="json",
+        )
+        self.assertEqual(response.status_code, 403)
+        # bob est contributeur, mais pas auteur de l'issue ni des commentaires de alice
+        self.client.force_authenticate(self.bob)
+        response = self.client.patch(f"/api/v1/issues/{self.issue.pk}/", {"status": "TODO"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        response = self.client.delete(f"/api/v1/projects/{self.project.pk}/issues/{self.issue.pk}/")
+        self.assertEqual(response.status_code, 403)
+        self.client.force_authenticate(self.carol)
+        response = self.client.post("/api/v1/comments/", {"issue": self.issue.pk, "description": "x"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertArchived()
+
+    def test_failed_batch_write_does_not_restore(self):
+        response = self.client.post("/api/v1/batch", {"requests": [
+            {"method": "PATCH", "path": f"/api/v1/issues/{self.issue.pk}/", "body": {"assignee": self.carol.pk}},
+        ]}, format="json")
+        self.assertEqual(response.data["responses"][0]["status"], 400)
+        self.assertArchived()
+
+    def test_reopening_restores_and_is_not_archived_again(self):
+        response = self.client.patch(f"/api/v1/issues/{self.issue.pk}/", {"status": "TODO"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["archived"])
+        self.assertEqual(Comment.objects.filter(issue_id=self.issue.pk).count(), 3)
+        self.assertFalse(ArchivedIssue.objects.exists())
+
+    def test_comment_restores_and_is_not_archived_again(self):
+        response = self.client.post(
+            "/api/v1/comments/", {"issue": self.issue.pk, "description": "Toujours présent"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        issue = Issue.objects.get(pk=self.issue.pk)
+        self.assertEqual(issue.status, Issue.Status.DONE)
+        self.assertEqual(issue.comments.count(), 4)
+        # Date de mise à jour renouvelée : pas de réarchivage au passage suivant
+        self.assertGreater(issue.updated_at, timezone.now() - timedelta(minutes=1))
+        self.assertEqual(archive_issues(), {"issues": 0, "comments": 0})
+
+
+class ProfilingTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user("admin", password="pw123456!", is_staff=True)
+        self.profiles = Path(tempfile.mkdtemp(prefix="softdesk-profiles-"))
+        self.addCleanup(shutil.rmtree, self.profiles, ignore_errors=True)
+        override = override_settings(SOFTDESK_PROFILES_DIR=self.profiles)
+        override.enable()
+        self.addCleanup(override.disable)
+        # Le middleware authentifie lui-même le jeton (pas d'authentification forcée DRF)
+        self.client.force_authenticate(None)
+
+    def profiled_get(self, user, path="/api/v1/projects/", mode="1"):
+        token = RefreshToken.for_user(user).access_token
+        return self.client.get(path, HTTP_AUTHORIZATION=f"Bearer {token}", HTTP_X_PROFILE=mode)
+
+    def test_staff_requests_are_profiled(self):
+        response = self.profiled_get(self.staff)
+        self.assertEqual(response.status_code, 200)
+        profile = ProfileStore().load(response["X-Profile-Id"])
+        self.assertEqual(profile["path"], "/api/v1/projects/")
+        self.assertGreater(profile["sql"]["count"], 0)
+        self.assertIn("validate", profile["serializers_ms"])
+
+    def test_other_users_are_not_profiled(self):
+        response = self.profiled_get(self.alice)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(ProfileStore().ids(), [])
+
+    def test_busy_profiler_serves_the_request_unprofiled(self):
+        # Python 3.12+ : ValueError si un autre profileur est déjà actif
+        busy = mock.patch.object(cProfile.Profile, "enable", side_effect=ValueError("Another profiling tool"))
+        with busy, self.assertLogs("softdesk.profiling", "WARNING"):
+            response = self.profiled_get(self.staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(ProfileStore().ids(), [])
+
+    def test_profile_endpoints_are_documented(self):
+        GENERATOR_STATS.reset()
+        with GENERATOR_STATS.silence():
+            document = schema.generate_schema()
+        problems = [message for message in (*GENERATOR_STATS._error_cache, *GENERATOR_STATS._warn_cache)
+                    if "Profile" in message or "operationId" in message]
+        self.assertEqual(problems, [])
+        operations = {
+            path: operation["operationId"]
+            for path, item in document["paths"].items() if path.startswith("/api/v1/profiles/")
+            for operation in item.values()
+        }
+        self.assertEqual(sorted(operations.values()), [
+            "profiles_list", "profiles_pstats", "profiles_retrieve", "profiles_speedscope",
+        ])
+
+    def test_admin_pages(self):
+        profile_id = self.profiled_get(self.staff)["X-Profile-Id"]
+        sampled_id = self.profiled_get(self.staff, mode="sample")["X-Profile-Id"]
+        self.client.force_login(self.alice)
+        self.assertEqual(self.client.get("/admin/profiles/").status_code, 302)
+
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get("/admin/"), "/admin/profiles/")
+        response = self.client.get("/admin/profiles/")
+        self.assertContains(response, f"/admin/profiles/{profile_id}/")
+        self.assertContains(response, f"/admin/profiles/{sampled_id}/")
+        self.assertContains(self.client.get(f"/admin/profiles/{profile_id}/"), "Fonctions les plus coûteuses")
+        self.assertEqual(self.client.get(f"/admin/profiles/{profile_id}/pstats/").status_code, 200)
+        self.assertEqual(self.client.get(f"/admin/profiles/{sampled_id}/pstats/").status_code, 404)
+        response = self.client.get(f"/admin/profiles/{sampled_id}/speedscope/")
+        self.assertEqual(response.json()["profiles"][0]["type"], "sampled")
+        self.assertEqual(self.client.get("/admin/profiles/0000000000000-zzzzzz/").status_code, 404)
+
+
+class AttachmentTests(AttachmentStorageMixin, SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 40
+        self.attachment = self.attach(self.issues[0], self.content)
+        self.url = f"/api/v1/attachments/{self.attachment.pk}/download/"
+        self.etag = f'"{self.attachment.blob.sha256}"'
+
+    def test_upload_stores_identical_content_once(self):
+        url = f"/api/v1/issues/{self.issues[1].pk}/attachments/?filename=copie.bin"
+        response = self.client.generic("POST", url, self.content, content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(AttachmentBlob.objects.count(), 1)
+        self.assertEqual(len(self.stored_files()), 1)
+        url = f"/api/v1/issues/{self.issues[1].pk}/attachments/"
+        response = self.client.generic("POST", url, self.content, content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 400)
+
+    def test_full_download_and_conditional_request(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag).status_code, 304)
+
+    def test_range_requests(self):
+        size = len(self.content)
+        for header, start, end in (("bytes=10-19", 10, 19), ("bytes=-5", size - 5, size - 1),
+                                   (f"bytes={size - 3}-", size - 3, size - 1)):
+            response = self.client.get(self.url, HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/{size}")
+            self.assertEqual(b"".join(response.streaming_content), self.content[start:end + 1])
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{size}")
+        # Plusieurs plages : contenu complet
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-1,5-6")
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_if_range_with_stale_etag_serves_full_content(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"ancien"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=self.etag)
+        self.assertEqual(response.status_code, 206)
+        response.close()
+
+    def test_non_members_cannot_download(self):
+        self.client.force_authenticate(self.carol)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class LinkTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        # Échelle de losanges : head bloque a1 et b1, chaque étage bloque les deux du suivant,
+        # le dernier bloque tail. 2^30 chemins de head à tail pour 62 issues.
+        self.head, self.tail = self.issues[:2]
+        rungs = [
+            Issue.objects.bulk_create(
+                Issue(title=f"Étage {index}", project=self.project, author=self.alice, assignee=self.bob)
+                for _ in range(2)
+            )
+            for index in range(30)
+        ]
+        layers = [[self.head], *rungs, [self.tail]]
+        IssueLink.objects.bulk_create(
+            IssueLink(project=self.project, source_id=source.pk, target_id=target.pk, kind=IssueLink.Kind.BLOCKS)
+            for upper, lower in zip(layers, layers[1:]) for source in upper for target in lower
+        )
+
+    def link(self, source, target):
+        return self.client.post(
+            f"/api/v1/issues/{source.pk}/links/", {"target": target.pk, "kind": "BLOCKS"}, format="json",
+        )
+
+    def test_cycle_check_visits_each_issue_once(self):
+        response = self.link(self.tail, self.head)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cycle", response.json()["target"][0])
+        # Raccourci dans le sens des liens existants : pas de cycle
+        self.assertEqual(self.link(self.head, self.tail).status_code, 201)
+
+    def test_dependency_graph_stays_bounded(self):
+        response = self.client.get(f"/api/v1/issues/{self.tail.pk}/dependencies/?depth=20")
+        self.assertEqual(response.status_code, 200)
+
+
+class AdminTests(SoftDeskTestCase):
+    url = "/admin/projects_app/issue/"
+
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_superuser("admin", password="pw123456!")
+        self.client.force_login(self.staff)
+        self.ids = sorted((issue.pk for issue in self.issues), reverse=True)
+
+    def page_ids(self, response):
+        return [issue.pk for issue in response.context["cl"].result_list]
+
+    def test_keyset_navigation(self):
+        with mock.patch.object(IssueAdmin, "list_per_page", 4):
+            first = self.client.get(self.url)
+            self.assertEqual(self.page_ids(first), self.ids[:4])
+            self.assertIsNone(first.context["cl"].keyset_first_url)
+            next_url = first.context["cl"].keyset_next_url
+            self.assertEqual(next_url, f"?id__lt={self.ids[3]}")
+
+            second = self.client.get(self.url + next_url)
+        self.assertEqual(self.page_ids(second), self.ids[4:])
+        self.assertIsNone(second.context["cl"].keyset_next_url)
+        self.assertEqual(second.context["cl"].keyset_first_url, "?")
+        self.assertContains(first, "Suivants »")
+        self.assertContains(second, "« Début")
+
+    def test_unfiltered_count_is_estimated_on_large_tables(self):
+        with mock.patch.object(large_admin, "ESTIMATE_THRESHOLD", 5):
+            response = self.client.get(self.url)
+        paginator = response.context["cl"].paginator
+        # SQLite sans ANALYZE : identifiant maximal
+        self.assertEqual(paginator.count, max(self.ids))
+        self.assertTrue(paginator.estimated)
+        self.assertContains(response, "Nombre approximatif.")
+
+    def test_filtered_count_is_bounded(self):
+        with mock.patch.object(large_admin, "COUNT_LIMIT", 3):
+            response = self.client.get(self.url + "?status__exact=TODO")
+        paginator = response.context["cl"].paginator
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.estimated)
+        response = self.client.get(self.url + "?status__exact=TODO")
+        self.assertEqual(response.context["cl"].paginator.count, 6)
+        self.assertFalse(response.context["cl"].paginator.estimated)
+
+    def test_delete_uses_the_batched_purge(self):
+        url = f"/admin/projects_app/project/{self.project.pk}/delete/"
+        # Confirmation : seul l'objet choisi est listé, sans recenser ses dépendances
+        response = self.client.get(url)
+        self.assertEqual(response.context["deleted_objects"], [str(self.project)])
+        response = self.client.post(url, {"post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(Comment.objects.exists())
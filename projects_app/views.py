@@ -1,10 +1,43 @@
-from rest_framework import viewsets, permissions, filters
-from rest_framework.exceptions import PermissionDenied, NotFound
-from django.db.models import Q
+from rest_framework import viewsets, mixins, permissions, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, NotFound, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from django.db.models import Exists, OuterRef, Q
 
-from .models import Project, Contributor, Issue, Comment
-from .serializers import ProjectSerializer, ContributorSerializer, IssueSerializer, CommentSerializer
+from .models import (
+    Project, Contributor, Issue, Comment, ArchivedIssue, ArchivedComment, Activity, Attachment, IssueLink,
+)
+from .serializers import (
+    ProjectSerializer,
+    ContributorSerializer,
+    IssueSerializer,
+    IssueWithCommentsSerializer,
+    CommentSerializer,
+    ActivitySerializer,
+    AttachmentSerializer,
+    IssueLinkSerializer,
+    MemberSerializer,
+)
+from . import activity as activity_log
+from .attachments import attachment_response, delete_attachments
+from . import links as issue_links
+from . import directory
+from .deletion import purge_project, purge_issue
+from .inbox import BOXES, inbox_queryset, get_inbox_counts, invalidate_inbox_counts
+from .pagination import InboxCursorPagination, ActivityCursorPagination
+from .mixins import ProjectScopedMixin, ProjectBatchRetrieveMixin, ArchiveMixin, AttachmentUploadMixin
+from .filters import (
+    RankOrderingFilter,
+    RankFilter,
+    IssueFilter,
+    parse_choices,
+    parse_facets,
+    compute_facets,
+)
 from .permissions import (
+    clear_membership_cache,
+    is_contributor,
     IsProjectAuthorOrReadOnly,
     IsProjectAuthorForContributorWrite,
     IsProjectContributor,
@@ -13,12 +46,14 @@ from .permissions import (
 )
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ProjectBatchRetrieveMixin, viewsets.ModelViewSet):
     """
     Gestion des projets.
     - Liste : renvoie les projets dont l'utilisateur est auteur ou contributeur.
+    - Lot : ?ids=1,2,3 (voir BatchRetrieveMixin).
     - Détail : 403 si l'utilisateur n'est ni auteur ni contributeur.
     - Création/édition/suppression : réservées à l'auteur (voir permissions).
+    - Membres : /projects/{id}/members/?q= (autocomplétion de l'assigné).
     """
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectAuthorOrReadOnly]
@@ -28,22 +63,35 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         Retourne les projets visibles par l'utilisateur.
-        Utilise une union auteur + contributeur.
-        Prefetch des contributeurs pour limiter les requêtes.
+        Une seule requête pilotée par l'appartenance (Contributor) : rôle de
+        l'utilisateur et nombre d'issues annotés, auteur chargé par jointure.
         """
-        user = self.request.user
-        qs_author = Project.objects.filter(author=user)
-        qs_contrib = Project.objects.filter(contributors__user=user)
-        return qs_author.union(qs_contrib).distinct().prefetch_related("contributors")
+        return Project.objects.for_member(self.request.user).select_related("author")
+
+    def get_batch_queryset(self):
+        """
+        Tous les projets demandés, annotés du rôle de l'utilisateur.
+        """
+        return Project.objects.with_membership(self.request.user).select_related("author")
+
+    def get_batch_allowed_ids(self, objects):
+        """
+        Le rôle annoté suffit : aucune requête d'appartenance supplémentaire.
+        """
+        return {obj.pk for obj in objects if obj.member_role is not None or obj.author_id == self.request.user.id}
 
     def get_object(self):
         """
-        Récupère l'objet sans filtrer par le queryset personnalisé,
+        Récupère l'objet sans filtrer par appartenance (annoté du rôle de l'utilisateur),
         puis applique un contrôle d'accès objet (403 si non autorisé).
         """
         lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
         try:
-            obj = Project.objects.get(**{self.lookup_field: lookup})
+            obj = (
+                Project.objects.with_membership(self.request.user)
+                .select_related("author")
+                .get(**{self.lookup_field: lookup})
+            )
         except Project.DoesNotExist:
             raise NotFound("Projet introuvable.")
         self.check_object_permissions(self.request, obj)
@@ -55,11 +103,51 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """
         serializer.save()
 
+    def perform_destroy(self, instance):
+        """
+        Suppression par lots (commentaires → issues → contributeurs → projet)
+        pour ne pas charger tout le projet en mémoire.
+        """
+        purge_project(instance.pk)
+
+    @action(
+        detail=True, methods=["get"],
+        serializer_class=ActivitySerializer, pagination_class=ActivityCursorPagination,
+    )
+    def activity(self, request, pk=None):
+        """
+        Fil d'activité du projet (issues, commentaires, contributeurs), paginé par curseur.
+        """
+        project = self.get_object()
+        page = self.paginate_queryset(Activity.objects.filter(project=project).select_related("actor"))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
 
-class ContributorViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["get"], serializer_class=MemberSerializer, pagination_class=None)
+    def members(self, request, pk=None):
+        """
+        Autocomplétion de l'assigné : membres dont le username, le prénom ou le nom
+        commence par ?q= (casse et accents ignorés), ?limit= résultats au plus.
+        Servi depuis l'annuaire en cache du projet (voir directory.py) : une seule
+        requête SQL, la vérification d'appartenance.
+        """
+        limit = request.query_params.get("limit", str(directory.DEFAULT_LIMIT))
+        if not limit.isdigit() or not 1 <= int(limit) <= directory.MAX_LIMIT:
+            raise ValidationError({"limit": f"Entier entre 1 et {directory.MAX_LIMIT} attendu."})
+        if not pk.isdigit():
+            raise NotFound("Projet introuvable.")
+        if not is_contributor(request.user, pk):
+            if not Project.objects.filter(pk=pk).exists():
+                raise NotFound("Projet introuvable.")
+            raise PermissionDenied("Vous devez être contributeur de ce projet.")
+        # Membres déjà au format de MemberSerializer (dictionnaires en cache)
+        return Response(directory.search_members(pk, request.query_params.get("q", ""), int(limit)))
+
+
+class ContributorViewSet(ProjectBatchRetrieveMixin, viewsets.ModelViewSet):
     """
     Gestion des contributeurs d'un projet.
     - Liste : visible pour les membres du projet.
+    - Lot : ?ids=1,2,3 (voir BatchRetrieveMixin).
     - Ajout/suppression : réservées à l'auteur du projet.
     """
     serializer_class = ContributorSerializer
@@ -80,6 +168,12 @@ class ContributorViewSet(viewsets.ModelViewSet):
         project_id = self.request.query_params.get("project")
         return qs.filter(project_id=project_id) if project_id else qs
 
+    def get_batch_queryset(self):
+        return Contributor.objects.select_related("user", "project")
+
+    def get_batch_project_id(self, obj):
+        return obj.project_id
+
     def get_object(self):
         """
         Récupère un contributeur, sinon 404.
@@ -100,33 +194,162 @@ class ContributorViewSet(viewsets.ModelViewSet):
         project = serializer.validated_data["project"]
         if project.author_id != self.request.user.id:
             raise PermissionDenied("Seul l’auteur du projet peut ajouter des contributeurs.")
-        serializer.save()
+        contributor = serializer.save()
+        directory.invalidate_member_directory(contributor.project_id)
+        activity_log.record(
+            Activity.Verb.CONTRIBUTOR_ADDED, contributor.project_id, contributor.pk, actor=self.request.user,
+            changes=activity_log.initial(contributor, activity_log.CONTRIBUTOR_FIELDS),
+        )
+
+    def perform_update(self, serializer):
+        before = activity_log.snapshot(serializer.instance, activity_log.CONTRIBUTOR_FIELDS)
+        before_project_id = serializer.instance.project_id
+        contributor = serializer.save()
+        directory.invalidate_member_directory(before_project_id, contributor.project_id)
+        changes = activity_log.diff(before, activity_log.snapshot(contributor, activity_log.CONTRIBUTOR_FIELDS))
+        if changes:
+            activity_log.record(
+                Activity.Verb.CONTRIBUTOR_UPDATED, contributor.project_id, contributor.pk,
+                actor=self.request.user, changes=changes,
+            )
 
+    def perform_destroy(self, instance):
+        """
+        Retire le contributeur et invalide le cache d'appartenance partagé éventuel (/batch).
+        """
+        activity_log.record(
+            Activity.Verb.CONTRIBUTOR_REMOVED, instance.project_id, instance.pk, actor=self.request.user,
+            changes={"user": [instance.user_id, None]},
+        )
+        instance.delete()
+        clear_membership_cache(self.request.user)
+        directory.invalidate_member_directory(instance.project_id)
 
-class IssueViewSet(viewsets.ModelViewSet):
+
+class IssueViewSet(ProjectBatchRetrieveMixin, ArchiveMixin, AttachmentUploadMixin, viewsets.ModelViewSet):
     """
     Gestion des issues (tickets).
     - Liste : uniquement pour les projets où l'utilisateur est contributeur.
+    - Lot : ?ids=1,2,3 (voir BatchRetrieveMixin).
     - Détail : 403 si l'utilisateur n'est pas membre du projet parent.
     - Écriture : réservée à l'auteur de l'issue ou au staff.
+    - Archive : ?include_archived=1 en lecture ; une écriture restaure l'issue (voir ArchiveMixin).
+    - Pièces jointes : /issues/{id}/attachments/, ajout ouvert à tout contributeur.
+    - Liens : /issues/{id}/links/ ; arbre de blocage : /issues/{id}/dependencies/.
     """
     queryset = Issue.objects.select_related("project", "author", "assignee")
     serializer_class = IssueSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectContributor, IsIssueAuthorOrStaff]
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
-    ordering_fields = ["created_at", "priority", "status"]
+    filter_backends = [RankOrderingFilter, filters.SearchFilter, RankFilter, IssueFilter]
+    # priority / status sont triés via leurs rangs numériques (voir RankOrderingFilter)
+    ordering_fields = ["created_at", "priority", "status", "priority_rank", "status_rank"]
     search_fields = ["title", "description"]
 
     def get_queryset(self):
         """
         Filtre par ?project=<id> si fourni.
-        Restreint aux issues visibles par l'utilisateur (membre du projet).
+        Restreint aux issues visibles par l'utilisateur (membre du projet),
+        via EXISTS : pas de DISTINCT, les regroupements (facettes) restent exacts.
         """
         qs = super().get_queryset()
         project_id = self.request.query_params.get("project")
         if project_id:
             qs = qs.filter(project_id=project_id)
-        return qs.filter(project__contributors__user=self.request.user).distinct()
+        return qs.visible_to(self.request.user)
+
+    def get_archived_queryset(self):
+        qs = ArchivedIssue.objects.select_related("project", "author", "assignee")
+        project_id = self.request.query_params.get("project")
+        if project_id:
+            qs = qs.filter(project_id=project_id)
+        return qs.visible_to(self.request.user)
+
+    def get_archived_issue_id(self, obj):
+        return obj.pk
+
+    def get_batch_queryset(self):
+        return Issue.objects.select_related("project", "author", "assignee")
+
+    def get_batch_project_id(self, obj):
+        return obj.project_id
+
+    # ?include=latest_comments:N — valeur par défaut et plafond de N
+    LATEST_COMMENTS_DEFAULT = 3
+    LATEST_COMMENTS_MAX = 20
+
+    def get_latest_comments_limit(self):
+        """
+        Lit ?include=latest_comments[:N] ; None si l'option n'est pas demandée.
+        """
+        for item in self.request.query_params.get("include", "").split(","):
+            name, _, value = item.strip().partition(":")
+            if name != "latest_comments":
+                continue
+            if not value:
+                return self.LATEST_COMMENTS_DEFAULT
+            if not value.isdigit() or not 1 <= int(value) <= self.LATEST_COMMENTS_MAX:
+                raise ValidationError(
+                    {"include": f"latest_comments:N attend un entier entre 1 et {self.LATEST_COMMENTS_MAX}."}
+                )
+            return int(value)
+        return None
+
+    def list(self, request, *args, **kwargs):
+        """
+        Liste paginée, filtrée côté serveur (voir IssueFilter).
+        - ?include=latest_comments:N : chaque issue embarque son nombre de
+          commentaires et ses N derniers commentaires, chargés pour toute la page
+          en une seule requête (fonction de fenêtre), au lieu d'un appel
+          /comments/?issue= par issue côté client.
+        - ?facets=status,priority,tag,assignee : bloc « facets » donnant les comptes
+          par valeur pour le filtre courant, une requête groupée par facette.
+        """
+        if self.is_batch_request(request):
+            return self.batch_retrieve(request)
+
+        limit = self.get_latest_comments_limit()
+        facet_names = parse_facets(request)
+
+        querysets = [self.filter_queryset(self.get_queryset())]
+        if self.include_archived():
+            querysets.append(self.filter_queryset(self.get_archived_queryset()))
+            page, issues = self.paginate_with_archived(*querysets)
+        else:
+            page = self.paginate_queryset(querysets[0])
+            issues = list(page if page is not None else querysets[0])
+
+        if limit is None:
+            data = self.get_serializer(issues, many=True).data
+        else:
+            context = {**self.get_serializer_context(), "latest_comments": self.load_latest_comments(issues, limit)}
+            data = IssueWithCommentsSerializer(issues, many=True, context=context).data
+
+        if page is None:
+            # Sans pagination, la liste est enveloppée seulement si des facettes sont demandées
+            if not facet_names:
+                return Response(data)
+            return Response({"results": data, "facets": compute_facets(facet_names, *querysets)})
+        response = self.get_paginated_response(data)
+        if facet_names:
+            response.data["facets"] = compute_facets(facet_names, *querysets)
+        return response
+
+    def load_latest_comments(self, issues, limit):
+        """
+        {issue_id: (nombre de commentaires, N derniers commentaires)} pour la page,
+        une requête par table (commentaires vivants, commentaires archivés).
+        """
+        latest = {}
+        for model, archived in ((Comment, False), (ArchivedComment, True)):
+            issue_ids = [issue.pk for issue in issues if issue.is_archived == archived]
+            if not issue_ids:
+                continue
+            for comment in model.objects.latest_per_issue(issue_ids, limit).select_related("author"):
+                total, comments = latest.setdefault(comment.issue_id, (comment.issue_comment_count, []))
+                comments.append(comment)
+        for total, comments in latest.values():
+            comments.sort(key=lambda comment: (comment.created_at, comment.pk))
+        return latest
 
     def get_object(self):
         """
@@ -137,7 +360,13 @@ class IssueViewSet(viewsets.ModelViewSet):
         try:
             obj = Issue.objects.select_related("project", "author", "assignee").get(**{self.lookup_field: lookup})
         except Issue.DoesNotExist:
-            raise NotFound("Issue introuvable.")
+            # Issue archivée : lecture avec ?include_archived=1, restauration avant écriture
+            obj = self.get_archived_object(
+                lookup, ArchivedIssue.objects.select_related("project", "author", "assignee")
+            )
+            if obj is None:
+                raise NotFound("Issue introuvable.")
+            return obj
         self.check_object_permissions(self.request, obj)
         return obj
 
@@ -145,15 +374,135 @@ class IssueViewSet(viewsets.ModelViewSet):
         """
         Affecte automatiquement l'auteur de l'issue à l'utilisateur courant.
         """
-        serializer.save(author=self.request.user)
+        issue = serializer.save(author=self.request.user)
+        invalidate_inbox_counts(issue.author_id, issue.assignee_id)
+        activity_log.record(
+            Activity.Verb.ISSUE_CREATED, issue.project_id, issue.pk, actor=self.request.user, issue_id=issue.pk,
+            changes=activity_log.initial(issue, activity_log.ISSUE_FIELDS),
+        )
+
+    def perform_update(self, serializer):
+        """
+        Invalide les compteurs de boîte de réception de l'ancien et du nouvel assigné,
+        et journalise les champs modifiés.
+        """
+        before = activity_log.snapshot(serializer.instance, activity_log.ISSUE_FIELDS)
+        issue = serializer.save()
+        invalidate_inbox_counts(issue.author_id, before["assignee_id"], issue.assignee_id)
+        changes = activity_log.diff(before, activity_log.snapshot(issue, activity_log.ISSUE_FIELDS))
+        if changes:
+            activity_log.record(
+                Activity.Verb.ISSUE_UPDATED, issue.project_id, issue.pk, actor=self.request.user,
+                issue_id=issue.pk, changes=changes,
+            )
+
+    def perform_destroy(self, instance):
+        """
+        Supprime les commentaires de l'issue par lots, puis l'issue.
+        L'historique de l'issue est conservé (journal rattaché au projet).
+        """
+        purge_issue(instance.pk)
+        invalidate_inbox_counts(instance.author_id, instance.assignee_id)
+        activity_log.record(
+            Activity.Verb.ISSUE_DELETED, instance.project_id, instance.pk, actor=self.request.user,
+            issue_id=instance.pk, changes={"title": [instance.title, None]},
+        )
+
+    @action(
+        detail=True, methods=["get"],
+        serializer_class=ActivitySerializer, pagination_class=ActivityCursorPagination,
+    )
+    def activity(self, request, *args, **kwargs):
+        """
+        Historique de l'issue (modifications, commentaires), paginé par curseur.
+        Issue archivée : avec ?include_archived=1.
+        """
+        issue = self.get_object()
+        page = self.paginate_queryset(Activity.objects.filter(issue_id=issue.pk).select_related("actor"))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(
+        detail=True, methods=["get", "post"], serializer_class=AttachmentSerializer, pagination_class=None,
+        permission_classes=[permissions.IsAuthenticated, IsProjectContributor],
+    )
+    def attachments(self, request, *args, **kwargs):
+        """
+        Pièces jointes de l'issue et de ses commentaires ; POST : ajout d'un fichier
+        (corps brut, voir AttachmentUploadMixin).
+        """
+        return self.attachments_response(request, self.get_object())
 
+    def get_attachment_queryset(self, issue):
+        return Attachment.objects.filter(issue_id=issue.pk)
 
-class CommentViewSet(viewsets.ModelViewSet):
+    def get_attachment_target(self, issue):
+        return {"project_id": issue.project_id, "issue_id": issue.pk}
+
+    @action(
+        detail=True, methods=["get", "post"], serializer_class=IssueLinkSerializer, pagination_class=None,
+        permission_classes=[permissions.IsAuthenticated, IsProjectContributor],
+    )
+    def links(self, request, *args, **kwargs):
+        """
+        Liens directs de l'issue (dans les deux sens) ; POST : nouveau lien dont
+        l'issue est la source ({"target": 12, "kind": "BLOCKS"}). Ouvert à tout contributeur.
+        """
+        issue = self.get_object()
+        if request.method in SAFE_METHODS:
+            queryset = IssueLink.objects.filter(Q(source_id=issue.pk) | Q(target_id=issue.pk))
+            return Response(self.get_serializer(queryset, many=True).data)
+        serializer = self.get_serializer(data=request.data, context={**self.get_serializer_context(), "source": issue})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"], pagination_class=None)
+    def dependencies(self, request, *args, **kwargs):
+        """
+        Arbre de blocage de l'issue, calculé en une requête (voir links.py) :
+        - ?direction=upstream (défaut) : issues qui la bloquent, directement ou non ;
+          ?direction=downstream : issues qu'elle bloque ;
+        - ?depth=N : profondeur maximale.
+        Réponse : issues atteintes (avec leur profondeur), liens parcourus, cycles détectés.
+        """
+        issue = self.get_object()
+        direction = request.query_params.get("direction", issue_links.UPSTREAM)
+        if direction not in issue_links.DIRECTIONS:
+            raise ValidationError({"direction": f"Valeurs possibles : {', '.join(issue_links.DIRECTIONS)}."})
+        depth = request.query_params.get("depth", str(issue_links.DEFAULT_DEPTH))
+        if not depth.isdigit() or not 1 <= int(depth) <= issue_links.MAX_DEPTH:
+            raise ValidationError({"depth": f"Entier entre 1 et {issue_links.MAX_DEPTH} attendu."})
+
+        graph = issue_links.dependency_graph(issue.pk, direction, int(depth))
+        depths = graph.pop("depths")
+        # Issues du graphe, vivantes ou archivées, limitées au projet de l'issue
+        issues = [
+            *Issue.objects.select_related("project", "author", "assignee")
+            .filter(pk__in=depths, project_id=issue.project_id),
+            *ArchivedIssue.objects.select_related("project", "author", "assignee")
+            .filter(pk__in=depths, project_id=issue.project_id),
+        ]
+        issues.sort(key=lambda obj: (depths[obj.pk], obj.pk))
+        data = IssueSerializer(issues, many=True, context=self.get_serializer_context()).data
+        return Response({
+            "issue": issue.pk,
+            "direction": direction,
+            "depth": int(depth),
+            "issues": [{**item, "depth": depths[item["id"]]} for item in data],
+            **graph,
+        })
+
+
+class CommentViewSet(ProjectBatchRetrieveMixin, ArchiveMixin, AttachmentUploadMixin, viewsets.ModelViewSet):
     """
     Gestion des commentaires.
     - Liste : commentaires des issues appartenant à des projets où l'utilisateur est contributeur.
+    - Lot : ?ids=1,2,3 (voir BatchRetrieveMixin).
     - Détail : 403 si l'utilisateur n'est pas membre du projet parent.
     - Écriture : réservée à l'auteur du commentaire ou au staff.
+    - Archive : ?include_archived=1 en lecture ; commenter ou modifier un
+      commentaire d'une issue archivée la restaure (voir ArchiveMixin).
+    - Pièces jointes : /comments/{id}/attachments/, ajout réservé à l'auteur du commentaire.
     """
     queryset = Comment.objects.select_related("issue", "author", "issue__project")
     serializer_class = CommentSerializer
@@ -172,6 +521,49 @@ class CommentViewSet(viewsets.ModelViewSet):
             qs = qs.filter(issue_id=issue_id)
         return qs.filter(issue__project__contributors__user=self.request.user).distinct()
 
+    def get_archived_queryset(self):
+        """
+        Commentaires archivés, même filtre ; appartenance vérifiée par EXISTS
+        (pas de DISTINCT dans l'union).
+        """
+        qs = ArchivedComment.objects.select_related("issue", "author", "issue__project")
+        issue_id = self.request.query_params.get("issue")
+        if issue_id:
+            qs = qs.filter(issue_id=issue_id)
+        return qs.filter(
+            Exists(Contributor.objects.filter(project_id=OuterRef("issue__project_id"), user=self.request.user))
+        )
+
+    def get_archived_issue_id(self, obj):
+        return obj.issue_id
+
+    def list(self, request, *args, **kwargs):
+        if self.is_batch_request(request) or not self.include_archived():
+            return super().list(request, *args, **kwargs)
+        page, comments = self.paginate_with_archived(
+            self.filter_queryset(self.get_queryset()), self.filter_queryset(self.get_archived_queryset())
+        )
+        data = self.get_serializer(comments, many=True).data
+        return self.get_paginated_response(data) if page is not None else Response(data)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Commenter une issue archivée la restaure d'abord (l'appartenance au projet
+        a déjà été vérifiée par IsProjectContributor) ; restauration annulée si le
+        commentaire est refusé (voir ArchiveMixin).
+        """
+        issue_id = str(request.data.get("issue", ""))
+        scoped = getattr(self, "issue", None) is not None
+        if not scoped and issue_id.isdigit() and not Issue.objects.filter(pk=issue_id).exists():
+            self.restore_archived_issue(int(issue_id))
+        return super().create(request, *args, **kwargs)
+
+    def get_batch_queryset(self):
+        return Comment.objects.select_related("issue", "author", "issue__project")
+
+    def get_batch_project_id(self, obj):
+        return obj.issue.project_id
+
     def get_object(self):
         """
         Charge un commentaire (avec relations) ou renvoie 404.
@@ -181,7 +573,12 @@ class CommentViewSet(viewsets.ModelViewSet):
         try:
             obj = Comment.objects.select_related("issue", "author", "issue__project").get(**{self.lookup_field: lookup})
         except Comment.DoesNotExist:
-            raise NotFound("Commentaire introuvable.")
+            obj = self.get_archived_object(
+                lookup, ArchivedComment.objects.select_related("issue", "author", "issue__project")
+            )
+            if obj is None:
+                raise NotFound("Commentaire introuvable.")
+            return obj
         self.check_object_permissions(self.request, obj)
         return obj
 
@@ -189,4 +586,198 @@ class CommentViewSet(viewsets.ModelViewSet):
         """
         Affecte automatiquement l'auteur du commentaire à l'utilisateur courant.
         """
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        activity_log.record(
+            Activity.Verb.COMMENT_CREATED, comment.issue.project_id, comment.pk, actor=self.request.user,
+            issue_id=comment.issue_id,
+        )
+
+    def perform_update(self, serializer):
+        before = activity_log.snapshot(serializer.instance, activity_log.COMMENT_FIELDS)
+        comment = serializer.save()
+        changes = activity_log.diff(before, activity_log.snapshot(comment, activity_log.COMMENT_FIELDS))
+        if changes:
+            activity_log.record(
+                Activity.Verb.COMMENT_UPDATED, comment.issue.project_id, comment.pk, actor=self.request.user,
+                issue_id=comment.issue_id, changes=changes,
+            )
+
+    def perform_destroy(self, instance):
+        activity_log.record(
+            Activity.Verb.COMMENT_DELETED, instance.issue.project_id, instance.pk, actor=self.request.user,
+            issue_id=instance.issue_id,
+        )
+        delete_attachments(Attachment.objects.filter(comment_id=instance.pk))
+        instance.delete()
+
+    @action(detail=True, methods=["get", "post"], serializer_class=AttachmentSerializer, pagination_class=None)
+    def attachments(self, request, *args, **kwargs):
+        """
+        Pièces jointes du commentaire ; POST : ajout d'un fichier (corps brut,
+        voir AttachmentUploadMixin).
+        """
+        return self.attachments_response(request, self.get_object())
+
+    def get_attachment_queryset(self, comment):
+        return Attachment.objects.filter(comment_id=comment.pk)
+
+    def get_attachment_target(self, comment):
+        return {"project_id": comment.issue.project_id, "issue_id": comment.issue_id, "comment_id": comment.pk}
+
+
+class ProjectIssueViewSet(ProjectScopedMixin, IssueViewSet):
+    """
+    Issues d'un projet : /projects/{project_pk}/issues/.
+    Le projet est résolu et autorisé une fois par requête (ProjectScopedMixin),
+    le champ 'project' est imposé par l'URL.
+    """
+    not_found_message = "Issue introuvable."
+
+    def get_queryset(self):
+        """
+        Issues du projet de l'URL, sans jointure d'appartenance.
+        """
+        return Issue.objects.select_related("project", "author", "assignee").filter(project=self.project)
+
+    def get_archived_queryset(self):
+        return ArchivedIssue.objects.select_related("project", "author", "assignee").filter(project=self.project)
+
+
+class ProjectIssueCommentViewSet(ProjectScopedMixin, CommentViewSet):
+    """
+    Commentaires d'une issue : /projects/{project_pk}/issues/{issue_pk}/comments/.
+    Le projet et l'issue sont résolus une fois par requête, le champ 'issue' est imposé par l'URL.
+    """
+    not_found_message = "Commentaire introuvable."
+
+    def get_queryset(self):
+        """
+        Commentaires de l'issue de l'URL, sans jointure d'appartenance.
+        """
+        return Comment.objects.select_related("issue", "author", "issue__project").filter(issue_id=self.issue.pk)
+
+    def get_archived_queryset(self):
+        return ArchivedComment.objects.select_related("issue", "author", "issue__project").filter(
+            issue_id=self.issue.pk
+        )
+
+
+class IssueLinkViewSet(mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Lien entre deux issues : lecture et suppression (création via /issues/{id}/links/).
+    - Détail : 403 si l'utilisateur n'est pas membre du projet.
+    - Suppression : réservée à l'auteur du lien ou au staff.
+    """
+    serializer_class = IssueLinkSerializer
+    permission_classes = [permissions.IsAuthenticated, IsProjectContributor, IsAuthorOrReadOnly]
+
+    def get_queryset(self):
+        return IssueLink.objects.filter(
+            Exists(Contributor.objects.filter(project_id=OuterRef("project_id"), user=self.request.user))
+        )
+
+    def get_object(self):
+        """
+        Charge un lien ou renvoie 404, puis vérifie les permissions objet (403).
+        """
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        try:
+            obj = IssueLink.objects.get(**{self.lookup_field: lookup})
+        except IssueLink.DoesNotExist:
+            raise NotFound("Lien introuvable.")
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AttachmentViewSet(
+    mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet
+):
+    """
+    Pièces jointes des issues et des commentaires (voir attachments.py).
+    - Liste : pièces jointes des projets de l'utilisateur, filtre ?issue=<id> ou ?comment=<id>.
+    - Détail : 403 si l'utilisateur n'est pas membre du projet.
+    - Téléchargement : /attachments/{id}/download/ (ETag, requêtes Range).
+    - Suppression : réservée à l'auteur de l'envoi ou au staff.
+    L'ajout se fait sur /issues/{id}/attachments/ ou /comments/{id}/attachments/.
+    """
+    serializer_class = AttachmentSerializer
+    permission_classes = [permissions.IsAuthenticated, IsProjectContributor, IsAuthorOrReadOnly]
+
+    def get_queryset(self):
+        """
+        Pièces jointes visibles par l'utilisateur (membre du projet, via EXISTS).
+        """
+        qs = Attachment.objects.select_related("blob", "author").filter(
+            Exists(Contributor.objects.filter(project_id=OuterRef("project_id"), user=self.request.user))
+        )
+        for param in ("issue", "comment"):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            if not value.isdigit():
+                raise ValidationError({param: "Identifiant entier attendu."})
+            qs = qs.filter(**{f"{param}_id": value})
+        return qs
+
+    def get_object(self):
+        """
+        Charge une pièce jointe ou renvoie 404, puis vérifie les permissions objet (403).
+        """
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        try:
+            obj = Attachment.objects.select_related("blob", "author").get(**{self.lookup_field: lookup})
+        except Attachment.DoesNotExist:
+            raise NotFound("Pièce jointe introuvable.")
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    def perform_destroy(self, instance):
+        """
+        Supprime la pièce jointe, puis son contenu s'il n'est plus référencé.
+        """
+        delete_attachments(Attachment.objects.filter(pk=instance.pk))
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, *args, **kwargs):
+        """
+        Contenu du fichier, lu par blocs (ou délégué au serveur web, voir SENDFILE).
+        """
+        return attachment_response(request, self.get_object())
+
+
+class InboxViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Boîte de réception « mon travail », tous projets confondus.
+    - ?box=assigned (défaut) : issues assignées à l'utilisateur.
+    - ?box=authored : issues créées par l'utilisateur.
+    - Filtres : ?status=TODO,IN_PROGRESS et ?priority=HIGH (listes séparées par des virgules).
+    - Pagination par curseur, dernières mises à jour d'abord.
+    - /inbox/counts/ : compteurs d'issues ouvertes et par statut (en cache).
+    """
+    serializer_class = IssueSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InboxCursorPagination
+
+    def get_queryset(self):
+        """
+        Issues de la boîte demandée, filtrées par statut et priorité.
+        """
+        box = self.request.query_params.get("box", "assigned")
+        if box not in BOXES:
+            raise ValidationError({"box": f"Valeurs possibles : {', '.join(BOXES)}."})
+
+        qs = inbox_queryset(self.request.user, box)
+        statuses = parse_choices(self.request, "status", Issue.Status.values)
+        if statuses:
+            qs = qs.filter(status__in=statuses)
+        priorities = parse_choices(self.request, "priority", Issue.Priority.values)
+        if priorities:
+            qs = qs.filter(priority__in=priorities)
+        return qs
+
+    @action(detail=False, methods=["get"])
+    def counts(self, request):
+        """
+        Compteurs de la boîte de réception de l'utilisateur courant.
+        """
+        return Response(get_inbox_counts(request.user))
@@ -0,0 +1,141 @@
+"""
+Classes d'administration partagées par les apps du projet, pour les tables volumineuses.
+
+Une liste de l'admin Django standard compte toutes les lignes (deux COUNT(*)),
+pagine par OFFSET et recense tous les objets liés avant une suppression :
+- comptage estimé (EstimatedCountPaginator) : statistiques du moteur pour une
+  liste non filtrée, COUNT(*) borné à COUNT_LIMIT lignes pour une liste filtrée ;
+- navigation par clé (KeysetChangeList) : lien « Suivants » en ?id__lt=<dernier id>,
+  une lecture d'index quelle que soit la profondeur, au lieu de ?p=<n> ;
+- suppression par lots (purge) : les fonctions de deletion.py remplacent le
+  collecteur de Django, qui charge en mémoire tous les objets liés.
+"""
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+# En dessous, le comptage exact est assez rapide pour être conservé
+ESTIMATE_THRESHOLD = 100_000
+# Lignes comptées au maximum pour une liste filtrée (recherche, filtres)
+COUNT_LIMIT = 10_000
+
+KEYSET_PARAM = "id__lt"
+
+
+def estimate_row_count(model, using):
+    """
+    Nombre approximatif de lignes de la table, sans la parcourir :
+    statistiques de PostgreSQL / MySQL / SQLite (après ANALYZE), sinon
+    identifiant maximal (lecture d'index). None si aucune estimation n'est possible.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        "postgresql": ("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                       [connection.ops.quote_name(table)]),
+        "mysql": ("SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() "
+                  "AND table_name = %s", [table]),
+        # Premier nombre de « stat » : lignes de la table lors du dernier ANALYZE
+        "sqlite": ("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]),
+    }
+    if connection.vendor in queries:
+        sql, params = queries[connection.vendor]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+        except DatabaseError:
+            # sqlite_stat1 n'existe qu'après un premier ANALYZE
+            row = None
+        if row and row[0] is not None:
+            estimate = int(str(row[0]).split()[0])
+            # PostgreSQL : -1 tant que la table n'a jamais été analysée
+            if estimate >= 0:
+                return estimate
+    if model._meta.pk.get_internal_type() in ("AutoField", "BigAutoField"):
+        return model._default_manager.using(using).aggregate(top=Max("pk"))["top"] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginateur de l'admin sans COUNT(*) complet sur les grandes tables.
+    `estimated` indique que `count` est approximatif (ou un minimum, pour une liste filtrée).
+    """
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimate
+        # COUNT(*) sur une sous-requête LIMIT : borné quel que soit le filtre
+        count = queryset.order_by()[:COUNT_LIMIT].count()
+        self.estimated = count >= COUNT_LIMIT
+        return count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Liste avec liens de navigation par clé (?id__lt=), disponibles sur l'ordre
+    par défaut (identifiants décroissants).
+    """
+    def get_results(self, request):
+        super().get_results(request)
+        self.keyset_first_url = self.keyset_next_url = None
+        if KEYSET_PARAM in self.params:
+            self.keyset_first_url = self.get_query_string(remove=[KEYSET_PARAM, "p"])
+        # Tri choisi par un clic sur une colonne : pas de navigation par clé
+        if "o" in self.params:
+            return
+        results = list(self.result_list)
+        if len(results) == self.list_per_page:
+            self.keyset_next_url = self.get_query_string({KEYSET_PARAM: results[-1].pk}, remove=["p"])
+
+
+class LargeTableAdminMixin:
+    """
+    Réglages communs des ModelAdmin de tables volumineuses, à placer avant
+    admin.ModelAdmin (ou UserAdmin) dans les bases de la classe.
+    `purge` : fonction de deletion.py appelée avec l'identifiant de l'objet à supprimer
+    (déclarée avec staticmethod).
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    # Ordre de la navigation par clé
+    ordering = ("-id",)
+    change_list_template = "admin/keyset_change_list.html"
+    purge = None
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_deleted_objects(self, objs, request):
+        """
+        Avec une purge, la page de confirmation ne liste que les objets choisis :
+        leurs dépendances sont supprimées par lots, sans être recensées.
+        """
+        if self.purge is None:
+            return super().get_deleted_objects(objs, request)
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(self.opts.verbose_name)
+        return [str(obj) for obj in objs], {self.opts.verbose_name_plural: len(objs)}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        if self.purge is None:
+            return super().delete_model(request, obj)
+        self.purge(obj.pk)
+
+    def delete_queryset(self, request, queryset):
+        if self.purge is None:
+            return super().delete_queryset(request, queryset)
+        for obj in queryset:
+            self.delete_model(request, obj)
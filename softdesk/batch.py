@@ -0,0 +1,176 @@
+"""
+Endpoint de requêtes groupées : POST /api/v1/batch
+
+Exécute en un seul appel HTTP une liste de sous-requêtes vers les routes
+existantes de l'API, dans le même processus :
+- l'authentification (JWT) est faite une seule fois, puis transmise aux
+  sous-requêtes (authentification forcée DRF) ;
+- les vérifications d'appartenance aux projets sont partagées par tout le lot ;
+- avec "atomic": true, le lot s'exécute dans une transaction, annulée (et
+  interrompue) à la première sous-réponse en erreur.
+
+Corps attendu :
+{
+  "atomic": false,
+  "requests": [
+    {"method": "POST", "path": "/api/v1/issues/", "body": {...}},
+    {"method": "GET", "path": "/api/v1/comments/?issue=3"}
+  ]
+}
+
+Réponse : {"responses": [{"status": 201, "body": {...}}, ...]}, dans l'ordre du lot.
+
+Les routes qui délivrent des jetons (login, refresh) sont refusées : la réponse
+du lot est compressée, contrairement à ces routes (voir softdesk/middleware.py).
+
+Une sous-requête qui lève une exception non gérée produit une entrée 500
+(journalisée) sans interrompre le lot : les réponses des sous-requêtes déjà
+exécutées sont renvoyées ; en mode atomique, le lot est annulé.
+"""
+
+import io
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import permissions, serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenViewBase
+
+from projects_app.permissions import shared_membership_cache
+
+logger = logging.getLogger(__name__)
+
+# Préfixe des routes autorisées dans un lot
+API_PREFIX = "/api/v1/"
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """
+    Une sous-requête du lot.
+    """
+    method = serializers.ChoiceField(choices=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, default=None)
+
+    def validate_path(self, value):
+        if not value.startswith(API_PREFIX):
+            raise serializers.ValidationError(f"Seules les routes {API_PREFIX} sont acceptées.")
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Le lot complet : sous-requêtes et mode transactionnel.
+    """
+    atomic = serializers.BooleanField(default=False)
+    requests = BatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = getattr(settings, "SOFTDESK_BATCH_MAX_REQUESTS", 20)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"{limit} sous-requêtes au maximum.")
+        return value
+
+
+class BatchView(APIView):
+    """
+    Exécute un lot de sous-requêtes (voir la docstring du module).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BatchSerializer  # Documentation du corps dans le schéma OpenAPI
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data["requests"]
+
+        with shared_membership_cache(request.user):
+            if serializer.validated_data["atomic"]:
+                responses = self.run_atomic(request, operations)
+            else:
+                responses = [self.run_operation(request, operation) for operation in operations]
+        return Response({"responses": responses})
+
+    def run_atomic(self, request, operations):
+        """
+        Tout ou rien : à la première erreur, la transaction est annulée et les
+        sous-requêtes restantes ne sont pas exécutées (statut 424).
+        """
+        responses = []
+        with transaction.atomic():
+            for operation in operations:
+                result = self.run_operation(request, operation)
+                responses.append(result)
+                if result["status"] >= 400:
+                    transaction.set_rollback(True)
+                    break
+        skipped = {"status": 424, "body": {"detail": "Non exécutée : le lot a été annulé."}}
+        return responses + [skipped] * (len(operations) - len(responses))
+
+    def build_subrequest(self, request, operation, path, query):
+        """
+        Requête Django minimale pour la vue cible, sans repasser par les middlewares :
+        même en-têtes que la requête de lot, utilisateur déjà authentifié.
+        """
+        body = b"" if operation["body"] is None else json.dumps(operation["body"]).encode()
+
+        sub = HttpRequest()
+        sub.method = operation["method"]
+        sub.path = sub.path_info = path
+        sub.META = {
+            **{key: value for key, value in request.META.items() if key.startswith("HTTP_")},
+            "REQUEST_METHOD": operation["method"],
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "REMOTE_ADDR": request.META.get("REMOTE_ADDR", ""),
+            "SERVER_NAME": request.META.get("SERVER_NAME", ""),
+            "SERVER_PORT": request.META.get("SERVER_PORT", ""),
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+        }
+        sub.GET = QueryDict(query)
+        sub._stream = io.BytesIO(body)
+        sub._read_started = False
+        # Authentification partagée : pas de nouveau décodage JWT par sous-requête
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+        sub._dont_enforce_csrf_checks = True
+        return sub
+
+    def run_operation(self, request, operation):
+        parts = urlsplit(operation["path"])
+        try:
+            match = resolve(parts.path)
+        except Resolver404:
+            return {"status": 404, "body": {"detail": "Route introuvable."}}
+        view_class = getattr(match.func, "view_class", None)
+        if view_class is type(self):
+            return {"status": 400, "body": {"detail": "Un lot ne peut pas contenir /batch."}}
+        # Jetons JWT : jamais dans une réponse de lot, qui peut être compressée (BREACH)
+        if view_class is not None and issubclass(view_class, TokenViewBase):
+            return {"status": 400, "body": {"detail": "Les routes d'authentification sont exclues des lots."}}
+
+        sub = self.build_subrequest(request, operation, parts.path, parts.query)
+        try:
+            response = match.func(sub, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception("Sous-requête en erreur : %s %s", operation["method"], operation["path"])
+            return {"status": 500, "body": {"detail": "Erreur interne du serveur."}}
+
+        if response.streaming:
+            # Téléchargements (FileResponse) : pas de corps JSON possible ; le
+            # fichier est refermé sans être lu
+            response.close()
+            return {"status": 400, "body": {"detail": "Réponse en flux (téléchargement) : à demander hors lot."}}
+        # Réponses DRF : données non rendues, réutilisées telles quelles
+        if hasattr(response, "data"):
+            data = response.data
+        else:
+            data = response.content.decode(response.charset or "utf-8") or None
+        return {"status": response.status_code, "body": data}
@@ -0,0 +1,113 @@
+"""
+Middlewares du projet SoftDesk.
+
+CompressionMiddleware : compression gzip ou Brotli des réponses, négociée via
+l'en-tête Accept-Encoding. Les petites réponses (sous le seuil MIN_SIZE) et
+les types non compressibles sont envoyés tels quels.
+
+Configuration dans settings.SOFTDESK_COMPRESSION :
+- MIN_SIZE : taille minimale (octets) avant compression ;
+- GZIP_LEVEL / BROTLI_QUALITY : compromis CPU / taux de compression ;
+- CONTENT_TYPES : préfixes de Content-Type compressibles ;
+- EXCLUDE_PATHS : chemins jamais compressés (réponses contenant des jetons,
+  pour éviter les attaques de type BREACH) ; /batch refuse ces routes en
+  sous-requête, sa réponse compressée ne contient donc jamais de jeton.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+DEFAULTS = {
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,
+    "CONTENT_TYPES": ("application/json", "application/msgpack", "application/vnd.oai.openapi", "text/"),
+    "EXCLUDE_PATHS": ("/api/v1/auth/login", "/api/v1/auth/token/refresh"),
+}
+
+
+def parse_accept_encoding(header):
+    """
+    Renvoie les encodages acceptés par le client (q > 0), en minuscules.
+    """
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compresse le corps des réponses non streamées :
+    - Brotli si le client l'accepte et que le paquet « brotli » est installé ;
+    - sinon gzip ;
+    - la version compressée n'est gardée que si elle est plus petite.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.conf = {**DEFAULTS, **getattr(settings, "SOFTDESK_COMPRESSION", {})}
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.compress(request, response)
+
+    def choose_encoding(self, request):
+        accepted = parse_accept_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def encode(self, content, encoding):
+        if encoding == "br":
+            return brotli.compress(content, quality=self.conf["BROTLI_QUALITY"])
+        return gzip.compress(content, compresslevel=self.conf["GZIP_LEVEL"], mtime=0)
+
+    def compress(self, request, response):
+        # Réponses non éligibles : streamées, déjà encodées, exclues
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if request.path.startswith(tuple(self.conf["EXCLUDE_PATHS"])):
+            return response
+        content_type = response.get("Content-Type", "")
+        if not content_type.startswith(tuple(self.conf["CONTENT_TYPES"])):
+            return response
+
+        # Le contenu dépend désormais de l'en-tête Accept-Encoding (caches partagés)
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if len(response.content) < self.conf["MIN_SIZE"]:
+            return response
+        encoding = self.choose_encoding(request)
+        if encoding is None:
+            return response
+
+        compressed = self.encode(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = encoding
+        # Un ETag fort ne désigne plus les mêmes octets : on l'affaiblit (comme GZipMiddleware)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        return response
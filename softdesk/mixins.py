@@ -0,0 +1,80 @@
+"""
+Mixins de vues partagés par les apps du projet.
+"""
+
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+
+
+class BatchRetrieveMixin:
+    """
+    Récupération groupée par identifiants : GET /ressource/?ids=1,2,3
+
+    - Une seule requête IN pour charger les objets (get_batch_queryset).
+    - Autorisation en une passe (get_batch_allowed_ids), sans refaire
+      get_object / check_object_permissions pour chaque identifiant.
+    - Résultats dans l'ordre demandé, avec un marqueur par identifiant :
+      {"id": 1, "status": 200, "data": {...}}
+      {"id": 2, "status": 404, "error": "not_found"}
+      {"id": 3, "status": 403, "error": "forbidden"}
+    """
+    batch_max_ids = 100
+
+    def is_batch_request(self, request):
+        return "ids" in request.query_params
+
+    def get_batch_ids(self, request):
+        """
+        Identifiants demandés, dédoublonnés dans l'ordre d'origine.
+        """
+        values = [value.strip() for value in request.query_params["ids"].split(",") if value.strip()]
+        if not values or not all(value.isdigit() for value in values):
+            raise ValidationError({"ids": "Liste d'identifiants entiers attendue."})
+        ids = list(dict.fromkeys(int(value) for value in values))
+        if len(ids) > self.batch_max_ids:
+            raise ValidationError({"ids": f"{self.batch_max_ids} identifiants au maximum."})
+        return ids
+
+    def get_batch_queryset(self):
+        """
+        Queryset dans lequel chercher les identifiants (par défaut, celui de la liste).
+        Un objet absent de ce queryset est signalé « not_found ».
+        """
+        return self.get_queryset()
+
+    def get_batch_allowed_ids(self, objects):
+        """
+        Identifiants lisibles par l'utilisateur. Par défaut : permissions objet
+        de la vue, une par une. À surcharger pour une vérification groupée.
+        """
+        allowed = set()
+        for obj in objects:
+            try:
+                self.check_object_permissions(self.request, obj)
+            except PermissionDenied:
+                continue
+            allowed.add(obj.pk)
+        return allowed
+
+    def batch_retrieve(self, request):
+        ids = self.get_batch_ids(request)
+        objects = {obj.pk: obj for obj in self.get_batch_queryset().filter(pk__in=ids)}
+        allowed_ids = self.get_batch_allowed_ids(objects.values())
+
+        allowed = [objects[pk] for pk in ids if pk in allowed_ids]
+        data = dict(zip((obj.pk for obj in allowed), self.get_serializer(allowed, many=True).data))
+
+        results = []
+        for pk in ids:
+            if pk not in objects:
+                results.append({"id": pk, "status": 404, "error": "not_found"})
+            elif pk not in allowed_ids:
+                results.append({"id": pk, "status": 403, "error": "forbidden"})
+            else:
+                results.append({"id": pk, "status": 200, "data": data[pk]})
+        return Response({"results": results})
+
+    def list(self, request, *args, **kwargs):
+        if self.is_batch_request(request):
+            return self.batch_retrieve(request)
+        return super().list(request, *args, **kwargs)
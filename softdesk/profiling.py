@@ -0,0 +1,550 @@
+"""
+Profilage à la demande d'une requête, réservé au staff.
+
+Déclenchement : en-tête « X-Profile: 1 » ou paramètre « ?_profile=1 » (valeur
+« sample » pour l'échantillonnage), sur une requête authentifiée par un compte
+staff (JWT ou session). Les autres requêtes ne paient qu'un test d'en-tête.
+
+Chaque profil contient :
+- le profil d'exécution : cProfile (par défaut) ou échantillonnage de la pile
+  du thread de la requête toutes les SAMPLE_INTERVAL secondes (moins intrusif) ;
+- les requêtes SQL (texte, durée), avec les doublons exacts (même SQL, mêmes
+  paramètres) et les requêtes répétées avec d'autres paramètres (N+1) ;
+- le temps passé dans les serializers (validation et représentation, mode cProfile).
+Les paramètres SQL ne sont pas conservés, seulement leur empreinte.
+
+Les MAX_PROFILES derniers profils sont gardés sur disque (settings.SOFTDESK_PROFILES_DIR),
+partagés par les workers ; les plus anciens sont supprimés à chaque ajout.
+L'identifiant du profil est renvoyé dans l'en-tête X-Profile-Id.
+
+Consultation (staff) :
+- dans l'admin : /admin/profiles/ (liste, détail, téléchargements), lien depuis
+  l'accueil de l'admin ;
+- par l'API : /api/v1/profiles/ (liste), /api/v1/profiles/{id}/ (détail),
+  /api/v1/profiles/{id}/pstats/ (fichier pour pstats / snakeviz),
+  /api/v1/profiles/{id}/speedscope/ (https://www.speedscope.app).
+
+Python 3.12+ n'accepte qu'un profileur cProfile actif à la fois par processus :
+une requête marquée pendant qu'une autre est profilée est servie sans profil.
+"""
+
+import cProfile
+import hashlib
+import json
+import logging
+import marshal
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib import admin
+from django.db import connections
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import render
+from django.urls import path
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_PROFILES": 50,
+    "SAMPLE_INTERVAL": 0.001,
+    "MAX_QUERIES": 2000,
+}
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "_profile"
+SAMPLE_MODE = "sample"
+
+PROFILE_ID_RE = re.compile(r"^\d{13}-[0-9a-f]{6}$")
+
+# Fonctions des serializers DRF dont le temps cumulé est reporté
+SERIALIZER_FUNCTIONS = {
+    "validate": BaseSerializer.is_valid.__code__,
+    "serialize": BaseSerializer.data.fget.__code__,
+}
+
+# Fonctions les plus coûteuses reprises dans le détail d'un profil
+TOP_FUNCTIONS = 30
+
+
+def get_conf():
+    return {**DEFAULTS, **getattr(settings, "SOFTDESK_PROFILING", {})}
+
+
+def requested_mode(request):
+    """
+    Mode demandé (« cprofile » ou « sample »), None si la requête n'est pas à profiler.
+    """
+    value = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+    if not value or value.lower() in ("0", "false", "no"):
+        return None
+    return SAMPLE_MODE if value.lower() == SAMPLE_MODE else "cprofile"
+
+
+def get_staff_user(request):
+    """
+    Utilisateur staff de la requête : session (admin) ou jeton JWT, vérifié ici
+    car l'authentification DRF n'a lieu que dans la vue.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return user
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    if result is not None and result[0].is_staff:
+        return result[0]
+    return None
+
+
+def function_label(key):
+    filename, line, name = key
+    return f"{filename}:{line}({name})" if line else name
+
+
+def code_key(code):
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+class QueryRecorder:
+    """
+    execute_wrapper : durée de chaque requête SQL, sans conserver ses paramètres.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.queries = []
+        self.dropped = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if len(self.queries) < self.limit:
+                self.queries.append({
+                    "sql": sql,
+                    "params_hash": hashlib.sha1(repr(params).encode(), usedforsecurity=False).hexdigest()[:12],
+                    "ms": round(duration * 1000, 3),
+                    "many": many,
+                    "alias": context["connection"].alias,
+                })
+            else:
+                self.dropped += 1
+
+    def summary(self):
+        """
+        Requêtes annotées (duplicate / repeated) et synthèse par texte SQL.
+        """
+        exact = Counter((query["sql"], query["params_hash"]) for query in self.queries)
+        by_sql = defaultdict(lambda: {"count": 0, "ms": 0.0})
+        for query in self.queries:
+            query["duplicate"] = exact[(query["sql"], query["params_hash"])] > 1
+            entry = by_sql[query["sql"]]
+            entry["count"] += 1
+            entry["ms"] += query["ms"]
+        repeated = sorted(
+            ({"sql": sql, "count": entry["count"], "ms": round(entry["ms"], 3)}
+             for sql, entry in by_sql.items() if entry["count"] > 1),
+            key=lambda entry: (-entry["count"], -entry["ms"]),
+        )
+        return {
+            "count": len(self.queries) + self.dropped,
+            "total_ms": round(sum(query["ms"] for query in self.queries), 3),
+            "duplicates": sum(count - 1 for count in exact.values()),
+            "repeated": repeated,
+            "dropped": self.dropped,
+        }
+
+
+class StackSampler(threading.Thread):
+    """
+    Relevé périodique de la pile d'un thread (sys._current_frames).
+    Chaque échantillon : (pile de la racine vers la feuille, durée représentée).
+    """
+    def __init__(self, thread_id, interval):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(code_key(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples.append((tuple(reversed(stack)), now - last))
+            last = now
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def speedscope_document(name, stacks):
+    """
+    Fichier speedscope (profil « sampled ») à partir de (pile, poids en secondes).
+    """
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, weight in stacks:
+        sample = []
+        for key in stack:
+            if key not in index:
+                index[key] = len(frames)
+                filename, line, function = key
+                frames.append({"name": function, "file": filename, "line": line})
+            sample.append(index[key])
+        samples.append(sample)
+        weights.append(weight)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "softdesk",
+        "name": name,
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+def pstats_stacks(stats, max_depth=128):
+    """
+    Piles reconstruites depuis des statistiques cProfile, pour speedscope.
+    cProfile ne garde que les arcs appelant → appelé : le temps cumulé de chaque
+    fonction est réparti entre ses appelés au prorata des arcs (approximation
+    usuelle des flame graphs issus de cProfile). Les parts infimes sont ignorées.
+    """
+    callees = defaultdict(dict)
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][function] = edge[3]
+    roots = [function for function, value in stats.items() if not value[4]]
+    total = sum(stats[root][3] for root in roots)
+    min_weight = total / 10000
+    stacks = []
+
+    def walk(function, budget, stack):
+        stack = stack + (function,)
+        cumulative = stats[function][3] or budget or 1
+        spent = 0.0
+        if len(stack) < max_depth:
+            for callee, edge_time in callees[function].items():
+                share = edge_time * budget / cumulative
+                # Récursion : le temps reste attribué à l'appel le plus externe
+                if callee in stack or share < min_weight:
+                    continue
+                spent += share
+                walk(callee, share, stack)
+        if budget - spent > 0:
+            stacks.append((stack, budget - spent))
+
+    for root in roots:
+        walk(root, stats[root][3], ())
+    return stacks
+
+
+class ProfileStore:
+    """
+    Derniers profils sur disque : <id>.profile.json (synthèse, SQL), <id>.prof
+    (statistiques cProfile, format pstats) ou <id>.speedscope.json (échantillonnage).
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or settings.SOFTDESK_PROFILES_DIR
+
+    @staticmethod
+    def new_id():
+        # Identifiants triables par date
+        return f"{int(time.time() * 1000):013d}-{secrets.token_hex(3)}"
+
+    def path(self, profile_id, suffix):
+        if not PROFILE_ID_RE.match(profile_id):
+            raise Http404("Profil introuvable.")
+        return self.directory / f"{profile_id}.{suffix}"
+
+    def _write(self, path, data):
+        # Écriture atomique : un worker ne lit jamais un fichier partiel
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def save(self, profile, pstats_data=None, speedscope=None):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = profile["id"]
+        if pstats_data is not None:
+            self._write(self.path(profile_id, "prof"), marshal.dumps(pstats_data))
+        if speedscope is not None:
+            self._write(self.path(profile_id, "speedscope.json"), json.dumps(speedscope).encode())
+        self._write(self.path(profile_id, "profile.json"), json.dumps(profile, default=str).encode())
+        self.prune(get_conf()["MAX_PROFILES"])
+
+    def ids(self):
+        if not self.directory.exists():
+            return []
+        return sorted(path.name.split(".")[0] for path in self.directory.glob("*.profile.json"))
+
+    def prune(self, keep):
+        for profile_id in self.ids()[:-keep or None]:
+            for suffix in ("profile.json", "prof", "speedscope.json"):
+                self.path(profile_id, suffix).unlink(missing_ok=True)
+
+    def load(self, profile_id):
+        try:
+            return json.loads(self.path(profile_id, "profile.json").read_bytes())
+        except FileNotFoundError:
+            raise Http404("Profil introuvable.")
+
+    def load_stats(self, profile_id):
+        try:
+            return marshal.loads(self.path(profile_id, "prof").read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def summaries(self):
+        """
+        Synthèse des profils (chemin, statut, durée, requêtes SQL), du plus récent au plus ancien.
+        """
+        summaries = []
+        for profile_id in reversed(self.ids()):
+            try:
+                profile = self.load(profile_id)
+            except Http404:
+                # Supprimé entre-temps par un autre worker
+                continue
+            profile.pop("queries", None)
+            profile.pop("functions", None)
+            profile["sql"].pop("repeated", None)
+            summaries.append(profile)
+        return summaries
+
+    def pstats_response(self, profile_id):
+        path = self.path(profile_id, "prof")
+        if not path.exists():
+            raise Http404("Pas de statistiques cProfile pour ce profil (mode échantillonnage).")
+        return FileResponse(path.open("rb"), as_attachment=True, filename=f"{profile_id}.prof")
+
+    def speedscope(self, profile_id):
+        """
+        Fichier speedscope enregistré (échantillonnage), sinon reconstruit depuis cProfile.
+        """
+        profile = self.load(profile_id)
+        path = self.path(profile_id, "speedscope.json")
+        if path.exists():
+            return json.loads(path.read_bytes())
+        name = f"{profile['method']} {profile['path']}"
+        return speedscope_document(name, pstats_stacks(self.load_stats(profile_id) or {}))
+
+
+class ProfilingMiddleware:
+    """
+    Profile les requêtes marquées (voir la docstring du module) des comptes staff.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not get_conf()["ENABLED"]:
+            return self.get_response(request)
+        user = get_staff_user(request)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(request, user, mode)
+
+    def profile(self, request, user, mode):
+        conf = get_conf()
+        recorder = QueryRecorder(conf["MAX_QUERIES"])
+        profiler = sampler = None
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            try:
+                if mode == SAMPLE_MODE:
+                    sampler = StackSampler(threading.get_ident(), conf["SAMPLE_INTERVAL"])
+                    sampler.start()
+                    stack.callback(sampler.stop)
+                else:
+                    profiler = cProfile.Profile()
+                    profiler.enable()
+                    stack.callback(profiler.disable)
+            except (ValueError, RuntimeError) as exc:
+                # ValueError : autre profileur déjà actif (Python 3.12+) ;
+                # RuntimeError : thread d'échantillonnage impossible à démarrer
+                logger.warning("Requête servie sans profil (%s) : %s %s", exc, request.method, request.path)
+                return self.get_response(request)
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        try:
+            profile_id = self.store(request, user, mode, response, duration, recorder, profiler, sampler)
+        except Exception:
+            # Le profilage ne doit jamais faire échouer la requête
+            logger.exception("Enregistrement du profil impossible.")
+        else:
+            response["X-Profile-Id"] = profile_id
+        return response
+
+    def store(self, request, user, mode, response, duration, recorder, profiler, sampler):
+        store = ProfileStore()
+        name = f"{request.method} {request.path}"
+        profile = {
+            "id": store.new_id(),
+            "created_at": timezone.now().isoformat(),
+            "method": request.method,
+            "path": request.path,
+            "query_string": request.META.get("QUERY_STRING", ""),
+            "status": response.status_code,
+            "user": user.pk,
+            "mode": mode,
+            "duration_ms": round(duration * 1000, 3),
+            "sql": recorder.summary(),
+            "queries": recorder.queries,
+        }
+        if profiler is not None:
+            profiler.create_stats()
+            stats = profiler.stats
+            profile["serializers_ms"] = {
+                label: round(stats[code_key(code)][3] * 1000, 3) if code_key(code) in stats else 0.0
+                for label, code in SERIALIZER_FUNCTIONS.items()
+            }
+            top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+            profile["functions"] = [
+                {
+                    "function": function_label(key),
+                    "calls": calls,
+                    "tottime_ms": round(tottime * 1000, 3),
+                    "cumtime_ms": round(cumtime * 1000, 3),
+                }
+                for key, (_, calls, tottime, cumtime, _) in top
+            ]
+            store.save(profile, pstats_data=stats)
+        else:
+            self_time = Counter()
+            for stack, weight in sampler.samples:
+                self_time[stack[-1]] += weight
+            profile["samples"] = len(sampler.samples)
+            profile["functions"] = [
+                {"function": function_label(key), "self_ms": round(weight * 1000, 3)}
+                for key, weight in self_time.most_common(TOP_FUNCTIONS)
+            ]
+            store.save(profile, speedscope=speedscope_document(name, sampler.samples))
+        return profile["id"]
+
+
+# Documents JSON libres (voir ProfileStore) : pas de serializer à introspecter
+PROFILE_ID_PARAMETER = OpenApiParameter("id", str, OpenApiParameter.PATH, pattern=PROFILE_ID_RE.pattern)
+
+
+@extend_schema_view(
+    # Action « list » : schéma de l'élément, documenté comme un tableau
+    list=extend_schema(operation_id="profiles_list", responses={200: {"type": "object"}}),
+    retrieve=extend_schema(
+        operation_id="profiles_retrieve", parameters=[PROFILE_ID_PARAMETER], responses={200: OpenApiTypes.OBJECT},
+    ),
+    pstats=extend_schema(
+        operation_id="profiles_pstats", parameters=[PROFILE_ID_PARAMETER],
+        responses={(200, "application/octet-stream"): OpenApiTypes.BINARY},
+    ),
+    speedscope=extend_schema(
+        operation_id="profiles_speedscope", parameters=[PROFILE_ID_PARAMETER], responses={200: OpenApiTypes.OBJECT},
+    ),
+)
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Profils enregistrés (staff uniquement), du plus récent au plus ancien.
+    - Liste : synthèse (chemin, statut, durée, nombre de requêtes SQL).
+    - Détail : requêtes SQL, doublons, temps des serializers, fonctions les plus coûteuses.
+    - /pstats/ : statistiques cProfile (python -m pstats, snakeviz).
+    - /speedscope/ : fichier pour https://www.speedscope.app.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    lookup_value_regex = r"\d{13}-[0-9a-f]{6}"
+
+    def list(self, request):
+        return Response(ProfileStore().summaries())
+
+    def retrieve(self, request, pk=None):
+        return Response(ProfileStore().load(pk))
+
+    @action(detail=True, methods=["get"])
+    def pstats(self, request, pk=None):
+        return ProfileStore().pstats_response(pk)
+
+    @action(detail=True, methods=["get"])
+    def speedscope(self, request, pk=None):
+        response = Response(ProfileStore().speedscope(pk))
+        response["Content-Disposition"] = f'attachment; filename="{pk}.speedscope.json"'
+        return response
+
+
+def admin_profile_list(request):
+    context = {
+        **admin.site.each_context(request),
+        "title": "Profils de requêtes",
+        "profiles": ProfileStore().summaries(),
+        "max_profiles": get_conf()["MAX_PROFILES"],
+    }
+    return render(request, "admin/profiles/profile_list.html", context)
+
+
+def admin_profile_detail(request, profile_id):
+    profile = ProfileStore().load(profile_id)
+    context = {
+        **admin.site.each_context(request),
+        "title": f"Profil {profile['method']} {profile['path']}",
+        "profile": profile,
+    }
+    return render(request, "admin/profiles/profile_detail.html", context)
+
+
+def admin_profile_pstats(request, profile_id):
+    return ProfileStore().pstats_response(profile_id)
+
+
+def admin_profile_speedscope(request, profile_id):
+    response = JsonResponse(ProfileStore().speedscope(profile_id))
+    response["Content-Disposition"] = f'attachment; filename="{profile_id}.speedscope.json"'
+    return response
+
+
+# Pages de l'admin (session staff), à inclure sous admin/profiles/ avant admin.site.urls
+admin_urlpatterns = [
+    path("", admin.site.admin_view(admin_profile_list), name="admin-profile-list"),
+    path("<str:profile_id>/", admin.site.admin_view(admin_profile_detail), name="admin-profile-detail"),
+    path("<str:profile_id>/pstats/", admin.site.admin_view(admin_profile_pstats), name="admin-profile-pstats"),
+    path(
+        "<str:profile_id>/speedscope/", admin.site.admin_view(admin_profile_speedscope),
+        name="admin-profile-speedscope",
+    ),
+]
@@ -0,0 +1,73 @@
+"""
+Renderers DRF plus rapides et plus compacts que le JSONRenderer par défaut.
+
+- CompactJSONRenderer : JSON sans espaces superflus, sérialisé par orjson
+  s'il est installé (sinon repli sur json de la bibliothèque standard).
+- MessagePackRenderer : encodage binaire, choisi par le client via
+  « Accept: application/msgpack » ou « ?format=msgpack » (dépendance optionnelle).
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    msgpack = None
+
+# Séparateurs de ligne Unicode, valides en JSON mais pas en JavaScript
+LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+def _fallback_default(obj):
+    """
+    Types non gérés nativement (Decimal, chaînes paresseuses, QuerySet...) :
+    même conversion que l'encodeur JSON de DRF.
+    """
+    return encoders.JSONEncoder().default(obj)
+
+
+class CompactJSONRenderer(renderers.JSONRenderer):
+    """
+    JSON compact ; orjson si disponible.
+    Une indentation explicite (Accept: application/json; indent=2, API navigable)
+    repasse par le rendu DRF standard.
+    """
+    compact = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_fallback_default, option=orjson.OPT_NON_STR_KEYS)
+        # Même garantie que DRF : la sortie reste un sous-ensemble strict de JavaScript
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Rendu MessagePack (nécessite le paquet « msgpack »).
+    """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if msgpack is None:
+            raise ImproperlyConfigured("MessagePackRenderer requiert le paquet 'msgpack'.")
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_fallback_default, use_bin_type=True)
@@ -0,0 +1,191 @@
+"""
+Schéma OpenAPI précalculé : GET /api/v1/schema/
+
+SpectacularAPIView réintrospecte toutes les vues et tous les serializers à
+chaque appel. Ici, le schéma est généré une seule fois par version du code :
+- rendu (YAML / JSON) gardé en mémoire et sur disque (settings.SOFTDESK_SCHEMA_CACHE_DIR),
+  partagé par les workers et les redémarrages ;
+- versions gzip / Brotli compressées une fois, au niveau maximal ;
+- ETag par contenu : If-None-Match renvoie 304 sans corps.
+
+La version du code vient de settings.SOFTDESK_CODE_VERSION (ex. hash du commit
+déployé) ; à défaut, d'une empreinte des fichiers .py du projet. Le cache
+disque peut être préparé au déploiement : python manage.py build_schema
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from functools import cache
+
+import drf_spectacular
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+from softdesk.middleware import brotli, parse_accept_encoding
+
+# Applications dont le code influe sur le schéma
+SCHEMA_APPS = ("softdesk", "projects_app", "users")
+
+_entries = {}
+_lock = threading.Lock()
+
+
+@cache
+def get_code_version():
+    """
+    Identifiant de la version du code, calculé une fois par processus.
+    Empreinte par défaut : chemin, taille et date de modification des fichiers
+    .py, version de drf-spectacular et réglages du schéma.
+    """
+    configured = getattr(settings, "SOFTDESK_CODE_VERSION", None)
+    if configured:
+        return configured
+
+    digest = hashlib.sha256()
+    digest.update(drf_spectacular.__version__.encode())
+    digest.update(repr(sorted(getattr(settings, "SPECTACULAR_SETTINGS", {}).items())).encode())
+    for app in SCHEMA_APPS:
+        for root, dirs, files in os.walk(settings.BASE_DIR / app):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    stat = os.stat(os.path.join(root, name))
+                    digest.update(f"{root}/{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+class SchemaEntry:
+    """
+    Un rendu du schéma et ses variantes compressées.
+    """
+    def __init__(self, body):
+        self.body = body
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(body, quality=11)
+
+    def content_for(self, request):
+        """
+        (contenu, Content-Encoding) selon l'en-tête Accept-Encoding.
+        """
+        accepted = parse_accept_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.encoded:
+                return self.encoded[encoding], encoding
+        return self.body, None
+
+
+def cache_path(renderer_format):
+    return settings.SOFTDESK_SCHEMA_CACHE_DIR / f"openapi-{get_code_version()}.{renderer_format}"
+
+
+def generate_schema():
+    """
+    Schéma complet, indépendant de la requête (comme « manage.py spectacular »).
+    """
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def render_schema(renderer, schema=None):
+    if schema is None:
+        schema = generate_schema()
+    return renderer.render(schema, renderer.media_type, {})
+
+
+def write_cache_file(path, body):
+    """
+    Écriture atomique : un autre worker ne lit jamais un fichier partiel.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(body)
+    os.replace(tmp, path)
+
+
+def get_schema_entry(renderer):
+    """
+    Rendu du schéma pour ce renderer : mémoire, puis disque, puis génération.
+    """
+    key = (get_code_version(), renderer.format)
+    entry = _entries.get(key)
+    if entry is not None:
+        return entry
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            path = cache_path(renderer.format)
+            try:
+                body = path.read_bytes()
+            except FileNotFoundError:
+                body = render_schema(renderer)
+                write_cache_file(path, body)
+            entry = _entries[key] = SchemaEntry(body)
+    return entry
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Comparaison faible (RFC 9110) entre If-None-Match et l'ETag courant.
+    """
+    tags = parse_etags(if_none_match)
+    return "*" in tags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+
+
+def prune_cache_files():
+    """
+    Supprime les fichiers des versions précédentes du code. Renvoie leur nombre.
+    """
+    directory = settings.SOFTDESK_SCHEMA_CACHE_DIR
+    if not directory.exists():
+        return 0
+    current = f"openapi-{get_code_version()}."
+    removed = 0
+    for path in directory.glob("openapi-*"):
+        if not path.name.startswith(current):
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    SpectacularAPIView servi depuis le cache (voir la docstring du module).
+    Les variantes dépendant de la requête (?lang=, ?version=) sont générées
+    à la demande, comme avant.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get("lang") or request.GET.get("version"):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        entry = get_schema_entry(renderer)
+
+        if etag_matches(request.META.get("HTTP_IF_NONE_MATCH", ""), entry.etag):
+            response = HttpResponseNotModified()
+        else:
+            content, encoding = entry.content_for(request)
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f"; charset={renderer.charset}"
+            response = HttpResponse(content, content_type=content_type)
+            response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, None)}"'
+            if encoding:
+                # Déjà compressé : CompressionMiddleware laisse la réponse telle quelle
+                response["Content-Encoding"] = encoding
+
+        response["ETag"] = entry.etag
+        response["Cache-Control"] = "no-cache"
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
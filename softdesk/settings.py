@@ -1,3 +1,5 @@
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Répertoire racine du projet
@@ -36,6 +38,7 @@ AUTH_USER_MODEL = "users.User"
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # Le CORS doit être déclaré en premier
+    "softdesk.middleware.CompressionMiddleware",  # gzip / Brotli selon Accept-Encoding
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -43,6 +46,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "softdesk.profiling.ProfilingMiddleware",  # Profil des requêtes staff marquées X-Profile
 ]
 
 # Fichier de configuration des URL
@@ -51,7 +55,7 @@ ROOT_URLCONF = "softdesk.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],  # Dossiers de templates supplémentaires si besoin
+        "DIRS": [BASE_DIR / "softdesk" / "templates"],  # Templates partagés (admin)
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -101,25 +105,88 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",  # Pagination simple
     "PAGE_SIZE": 20,  # Taille de page par défaut
+    "DEFAULT_RENDERER_CLASSES": [
+        "softdesk.renderers.CompactJSONRenderer",  # JSON compact (orjson si installé)
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",  # Schéma OpenAPI
 }
 
+# MessagePack proposé via Accept: application/msgpack si le paquet est installé
+if find_spec("msgpack"):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].insert(1, "softdesk.renderers.MessagePackRenderer")
+
+# Compression des réponses (voir softdesk/middleware.py)
+SOFTDESK_COMPRESSION = {
+    "MIN_SIZE": 1024,       # Pas de compression sous 1 Ko
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,    # Échelle 0-11 : coût CPU proche de gzip 6
+}
+
+# Suppression par lots des projets/utilisateurs (lignes par transaction)
+SOFTDESK_DELETE_BATCH_SIZE = 1000
+
+# Archivage des issues DONE non modifiées depuis N jours (voir projects_app/archive.py)
+SOFTDESK_ARCHIVE_AFTER_DAYS = 180
+
+# Journal d'activité (voir projects_app/activity.py)
+SOFTDESK_ACTIVITY = {
+    "FLUSH_INTERVAL": None,  # Secondes ; None = écriture en fin de requête
+    "MAX_BUFFER": 500,       # Écriture immédiate au-delà de N entrées en attente
+}
+
+# Pièces jointes (voir projects_app/attachments.py)
+SOFTDESK_ATTACHMENTS_DIR = BASE_DIR / "var" / "attachments"
+SOFTDESK_ATTACHMENTS = {
+    "MAX_SIZE": 50 * 1024 * 1024,  # Octets par fichier (413 au-delà)
+    "CHUNK_SIZE": 64 * 1024,       # Lecture / écriture par blocs
+    # Envoi délégué au serveur web : "X-Accel-Redirect" (nginx) ou "X-Sendfile" (Apache)
+    "SENDFILE": os.environ.get("SOFTDESK_SENDFILE") or None,
+    "SENDFILE_PREFIX": "/protected/attachments/",  # location internal nginx pointant sur SOFTDESK_ATTACHMENTS_DIR
+}
+
+# Profilage à la demande des requêtes staff (voir softdesk/profiling.py)
+SOFTDESK_PROFILES_DIR = BASE_DIR / "var" / "profiles"
+SOFTDESK_PROFILING = {
+    "ENABLED": True,
+    "MAX_PROFILES": 50,        # Profils conservés (les plus anciens sont supprimés)
+    "SAMPLE_INTERVAL": 0.001,  # Secondes entre deux relevés de pile (mode « sample »)
+    "MAX_QUERIES": 2000,       # Requêtes SQL détaillées par profil
+}
+
+# Nombre maximal de sous-requêtes par appel à /api/v1/batch
+SOFTDESK_BATCH_MAX_REQUESTS = 20
+
 # drf-spectacular : métadonnées du schéma
 SPECTACULAR_SETTINGS = {
     "TITLE": "SoftDesk Support API",
     "VERSION": "1.0.0",
 }
 
+# Schéma OpenAPI précalculé (voir softdesk/schema.py)
+# Version du code déployé (ex. hash du commit) ; à défaut, empreinte des fichiers .py
+SOFTDESK_CODE_VERSION = os.environ.get("SOFTDESK_CODE_VERSION")
+SOFTDESK_SCHEMA_CACHE_DIR = BASE_DIR / "var" / "schema"
+
+# Limitation de débit par seau à jetons (voir softdesk/throttling.py)
+# Format "N/période" : N requêtes en rafale, seau rechargé de N jetons par période.
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = {
+    "anon": "100/hour",            # Utilisateurs anonymes, par IP
+    "user_read": "1000/hour",      # Lectures d'un utilisateur authentifié
+    "user_write": "300/hour",      # Écritures d'un utilisateur authentifié
+    "project_read": "5000/hour",   # Lectures sur un même projet, tous membres confondus
+    "project_write": "1000/hour",  # Écritures sur un même projet
+    "login": "10/min",             # Login / refresh / inscription, par IP
+}
+
+# Fichier SQLite partagé par tous les workers pour l'état des seaux
+# (les tests le remplacent par ":memory:" via override_settings)
+SOFTDESK_THROTTLE_STORE = BASE_DIR / "var" / "throttle.sqlite3"
+
 # Option production : limitation de débit (anti brute-force / DoS)
-# Aucun effet en développement (DEBUG=True)
+# Aucun effet en développement (DEBUG=True), sauf sur les endpoints d'authentification
 if not DEBUG:
-    REST_FRAMEWORK.update({
-        "DEFAULT_THROTTLE_CLASSES": (
-            "rest_framework.throttling.AnonRateThrottle",
-            "rest_framework.throttling.UserRateThrottle",
-        ),
-        "DEFAULT_THROTTLE_RATES": {
-            "anon": "100/hour",   # Limite pour les utilisateurs anonymes
-            "user": "1000/hour",  # Limite pour les utilisateurs authentifiés
-        },
-    })
+    REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = (
+        "softdesk.throttling.UserBucketThrottle",
+        "softdesk.throttling.ProjectBucketThrottle",
+    )
@@ -0,0 +1,233 @@
+"""
+Limitation de débit par seau à jetons (token bucket).
+
+Chaque seau contient au plus `capacité` jetons et se remplit en continu au
+rythme `capacité / période`. Une requête consomme un jeton ; si le seau est
+vide, elle est refusée (429) avec un en-tête Retry-After égal au temps exact
+avant le prochain jeton.
+
+Les seaux sont stockés dans un fichier SQLite partagé : contrairement au
+cache locmem par défaut, tous les workers (processus) voient le même état.
+Avec ":memory:" (tests), chaque processus et chaque thread a ses propres seaux.
+Si le fichier reste verrouillé au-delà de BUSY_TIMEOUT, la requête est
+autorisée (et l'incident journalisé) : la limitation ne doit pas provoquer d'erreur 500.
+
+Portées disponibles (clés de DEFAULT_THROTTLE_RATES) :
+- anon : visiteurs non authentifiés, par adresse IP ;
+- user_read / user_write : par utilisateur, selon la méthode HTTP ;
+- project_read / project_write : par projet ciblé, tous utilisateurs confondus ;
+- login : endpoints d'authentification, par adresse IP.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from projects_app.permissions import is_contributor
+
+logger = logging.getLogger(__name__)
+
+# Durées reconnues dans les taux "N/période" (même convention que DRF)
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    Convertit "60/min" en (capacité, jetons par seconde).
+    """
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class SQLiteBucketStore:
+    """
+    Stockage des seaux dans un fichier SQLite commun aux workers.
+    - Une connexion par thread et par processus (sûr après un fork).
+    - BEGIN IMMEDIATE sérialise les lectures/écritures d'un même seau.
+    - Les seaux redevenus pleins sont purgés périodiquement : un seau absent
+      est équivalent à un seau plein.
+    """
+    PRUNE_EVERY = 1000
+    # Attente maximale (secondes) d'un verrou tenu par un autre worker
+    BUSY_TIMEOUT = 0.5
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self):
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " key TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " full_at REAL NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, pid
+        return self._local.conn
+
+    def consume(self, key, capacity, refill_rate, cost=1.0, now=None):
+        """
+        Tente de retirer `cost` jetons du seau `key`.
+        Retourne (autorisé, secondes à attendre avant que la requête passe).
+        """
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens,"
+                " updated_at = excluded.updated_at, full_at = excluded.full_at",
+                (key, tokens, now, now + (capacity - tokens) / refill_rate),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        self._calls += 1
+        if self._calls % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM buckets WHERE full_at < ?", (now,))
+
+        wait = 0.0 if allowed else (cost - tokens) / refill_rate
+        return allowed, wait
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    """
+    Instance partagée du stockage, créée au premier appel
+    à partir de settings.SOFTDESK_THROTTLE_STORE.
+    """
+    global _store
+    with _store_lock:
+        path = str(getattr(settings, "SOFTDESK_THROTTLE_STORE", ":memory:"))
+        if _store is None or _store.path != path:
+            _store = SQLiteBucketStore(path)
+        return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base des throttles à seau à jetons.
+    Les sous-classes fournissent la portée (get_scope) et l'identité du seau (get_bucket_key).
+    """
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, request, view):
+        raise NotImplementedError
+
+    def get_bucket_key(self, request, view):
+        raise NotImplementedError
+
+    @staticmethod
+    def endpoint_class(request):
+        """
+        Classe d'endpoint selon la méthode : lecture ou écriture.
+        """
+        return "read" if request.method in SAFE_METHODS else "write"
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        key = self.get_bucket_key(request, view) if rate else None
+        # Pas de taux configuré ou pas de seau applicable : pas de limite
+        if key is None:
+            return True
+
+        capacity, refill_rate = parse_rate(rate)
+        try:
+            allowed, self._wait = get_bucket_store().consume(f"{scope}:{key}", capacity, refill_rate)
+        except sqlite3.OperationalError as exc:
+            # Stockage verrouillé ou indisponible : requête autorisée plutôt qu'une erreur 500
+            logger.warning("Seau %s:%s inaccessible, requête autorisée : %s", scope, key, exc)
+            return True
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    """
+    Seau par utilisateur (ou par IP pour les anonymes), séparé lecture / écriture.
+    """
+    def get_scope(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return "anon"
+        return f"user_{self.endpoint_class(request)}"
+
+    def get_bucket_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return str(request.user.pk)
+        return self.get_ident(request)
+
+
+class ProjectBucketThrottle(TokenBucketThrottle):
+    """
+    Seau par projet ciblé, partagé par tous ses membres :
+    protège l'API d'un projet « bruyant » sans pénaliser les autres.
+    Le projet est lu dans l'URL ou la query string, jamais dans le body
+    (le throttle ne doit pas forcer la lecture du corps de la requête).
+
+    Seuls les membres consomment le seau du projet : sinon, n'importe quel
+    compte pourrait vider le seau d'un projet dont il n'est pas membre
+    (les throttles passent avant les permissions d'objet). Les requêtes des
+    non-membres restent limitées par leur seau utilisateur.
+    """
+    def get_scope(self, request, view):
+        return f"project_{self.endpoint_class(request)}"
+
+    def get_bucket_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        # Vues imbriquées : projet déjà résolu et autorisé (ProjectScopedMixin)
+        project = getattr(view, "project", None)
+        if project is not None:
+            return str(project.pk)
+
+        kwargs = getattr(view, "kwargs", {}) or {}
+        project_id = kwargs.get("project_pk") or request.query_params.get("project")
+        if project_id is None and getattr(view, "basename", None) == "project":
+            project_id = kwargs.get("pk")
+        if not (project_id and str(project_id).isdigit()):
+            return None
+        return str(int(project_id)) if is_contributor(request.user, int(project_id)) else None
+
+
+class LoginBucketThrottle(TokenBucketThrottle):
+    """
+    Seau des endpoints d'authentification (login, refresh, inscription), par IP :
+    limite le brute-force indépendamment du compte visé.
+    """
+    def get_scope(self, request, view):
+        return "login"
+
+    def get_bucket_key(self, request, view):
+        return self.get_ident(request)
@@ -10,13 +10,21 @@ from projects_app.views import (
     ContributorViewSet,
     IssueViewSet,
     CommentViewSet,
+    ProjectIssueViewSet,
+    ProjectIssueCommentViewSet,
+    InboxViewSet,
+    AttachmentViewSet,
+    IssueLinkViewSet,
 )
 
 # Authentification JWT
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from softdesk.throttling import LoginBucketThrottle
+from softdesk.batch import BatchView
+from softdesk.profiling import ProfileViewSet, admin_urlpatterns as profile_admin_urlpatterns
 
 # Schéma OpenAPI
-from drf_spectacular.views import SpectacularAPIView
+from softdesk.schema import CachedSpectacularAPIView
 
 
 # Configuration du routeur principal DRF
@@ -33,19 +41,53 @@ router.register(r"contributors", ContributorViewSet, basename="contributor")
 router.register(r"issues", IssueViewSet, basename="issue")
 router.register(r"comments", CommentViewSet, basename="comment")
 
+# Routes imbriquées : le projet (et l'issue) sont résolus et autorisés une fois par requête
+router.register(r"projects/(?P<project_pk>[0-9]+)/issues", ProjectIssueViewSet, basename="project-issue")
+router.register(
+    r"projects/(?P<project_pk>[0-9]+)/issues/(?P<issue_pk>[0-9]+)/comments",
+    ProjectIssueCommentViewSet,
+    basename="project-issue-comment",
+)
+
+# Liens entre issues (lecture, suppression ; création via /issues/{id}/links/)
+router.register(r"issue-links", IssueLinkViewSet, basename="issue-link")
+
+# Pièces jointes (lecture, téléchargement, suppression ; ajout via /issues/{id}/attachments/)
+router.register(r"attachments", AttachmentViewSet, basename="attachment")
+
+# Boîte de réception « mon travail » (issues assignées / créées)
+router.register(r"inbox", InboxViewSet, basename="inbox")
+
+# Profils de requêtes (staff, voir softdesk/profiling.py)
+router.register(r"profiles", ProfileViewSet, basename="profile")
+
 
 urlpatterns = [
-    # Accès à l'administration Django
+    # Accès à l'administration Django (profils de requêtes : pages staff ajoutées)
+    path("admin/profiles/", include(profile_admin_urlpatterns)),
     path("admin/", admin.site.urls),
 
     # Authentification JWT et inscription
-    path("api/v1/auth/login", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/v1/auth/token/refresh", TokenRefreshView.as_view(), name="token_refresh"),
-    path("api/v1/auth/signup", SignupView.as_view(), name="auth-signup"),
+    # (seau "login" par IP, actif même en développement)
+    path(
+        "api/v1/auth/login",
+        TokenObtainPairView.as_view(throttle_classes=[LoginBucketThrottle]),
+        name="token_obtain_pair",
+    ),
+    path(
+        "api/v1/auth/token/refresh",
+        TokenRefreshView.as_view(throttle_classes=[LoginBucketThrottle]),
+        name="token_refresh",
+    ),
+    path("api/v1/auth/signup", SignupView.as_view(throttle_classes=[LoginBucketThrottle]), name="auth-signup"),
+
+    # Lot de sous-requêtes exécutées en un seul appel (authentification partagée)
+    path("api/v1/batch", BatchView.as_view(), name="batch"),
 
     # Inclusion des routes générées par le routeur
     path("api/v1/", include(router.urls)),
 
     # Endpoint pour le schéma OpenAPI (utilisé pour la documentation)
-    path("api/v1/schema/", SpectacularAPIView.as_view(), name="schema"),
+    # Généré une fois par version du code, servi depuis le cache avec ETag
+    path("api/v1/schema/", CachedSpectacularAPIView.as_view(), name="schema"),
 ]
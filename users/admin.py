@@ -1,3 +1,25 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-# Register your models here.
+from projects_app.deletion import purge_user
+from projects_app.directory import invalidate_user_directories
+from softdesk.admin import LargeTableAdminMixin
+
+from .models import User
+
+
+@admin.register(User)
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
+    list_display = ("id", "username", "email", "first_name", "last_name", "is_staff", "is_active")
+    list_filter = ("is_staff", "is_superuser", "is_active")
+    # Recherche par début de chaîne (LIKE 'x%') plutôt que par contenu
+    search_fields = ("=id", "^username", "^email", "^last_name")
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ("RGPD", {"fields": ("age", "can_be_contacted", "can_data_be_shared")}),
+    )
+    purge = staticmethod(purge_user)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            invalidate_user_directories(obj.pk)
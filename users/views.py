@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets, permissions, generics
+from projects_app.deletion import purge_user
+from projects_app.directory import invalidate_user_directories
+from softdesk.mixins import BatchRetrieveMixin
 from .serializers import UserSerializer, SignupSerializer
 
 User = get_user_model()
@@ -16,11 +19,13 @@ class IsSelfOrAdmin(permissions.BasePermission):
         return request.user.is_staff or (obj.id == request.user.id)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
     """
     Vue pour la gestion des utilisateurs.
     - Lecture et modification limitées à soi-même.
     - Les administrateurs peuvent voir et gérer tous les comptes.
+    - Lot : ?ids=1,2,3 ; un compte non accessible est signalé comme introuvable,
+      comme pour le détail.
     """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsSelfOrAdmin]
@@ -34,6 +39,20 @@ class UserViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return User.objects.all() if user.is_staff else User.objects.filter(id=user.id)
 
+    def perform_update(self, serializer):
+        """
+        Un username ou un nom modifié doit apparaître dans l'autocomplétion des projets.
+        """
+        user = serializer.save()
+        invalidate_user_directories(user.pk)
+
+    def perform_destroy(self, instance):
+        """
+        Droit à l'oubli : suppression par lots des projets, issues et commentaires
+        du compte avant le compte lui-même.
+        """
+        purge_user(instance.pk)
+
 
 class SignupView(generics.CreateAPIView):
     """